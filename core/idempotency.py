@@ -0,0 +1,95 @@
+import hashlib
+import json
+from datetime import timedelta
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+from .models import IdempotencyKey
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+
+
+def request_fingerprint(request):
+    """
+    Hashes what makes two requests "the same": method, path, fields and the
+    name & size of uploaded files.
+    """
+    fields = request.data.lists() if hasattr(request.data, 'lists') else request.data.items()
+    payload = {
+        'method': request.method,
+        'path': request.path,
+        'data': sorted((key, value) for key, value in fields if key not in request.FILES),
+        'files': sorted((key, upload.name, upload.size) for key, upload in request.FILES.items()),
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def idempotent(view_method):
+    """
+    Decorator for APIView handlers honouring an optional Idempotency-Key header.
+
+    The first request claims the key, later ones with the same key get the
+    stored response back (with an Idempotent-Replayed header), a 409 while
+    the first is still in flight, or a 422 if the payload differs. A claim
+    without a response after IDEMPOTENCY_LEASE_SECONDS belongs to a worker
+    that died mid-request and is taken over.
+    """
+    def wrapper(view, request, *args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if not key:
+            return view_method(view, request, *args, **kwargs)
+
+        fingerprint = request_fingerprint(request)
+        record = None
+        while record is None:
+            now = timezone.now()
+            lease = now - timedelta(seconds=settings.IDEMPOTENCY_LEASE_SECONDS)
+            IdempotencyKey.objects.filter(user=request.user, key=key).filter(
+                Q(expires_at__lte=now) | Q(status_code__isnull=True, created_at__lte=lease)
+            ).delete()
+            try:
+                with transaction.atomic():
+                    record = IdempotencyKey.objects.create(
+                        user=request.user, key=key, request_hash=fingerprint,
+                        expires_at=now + timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL),
+                    )
+            except IntegrityError:
+                existing = IdempotencyKey.objects.filter(user=request.user, key=key).first()
+                if existing is None:
+                    # The other request gave the key up in the meantime: claim it again
+                    continue
+                if existing.request_hash != fingerprint:
+                    return Response(
+                        {"detail": f"{IDEMPOTENCY_HEADER} was already used for a different request."},
+                        status=status.HTTP_422_UNPROCESSABLE_ENTITY
+                    )
+                if existing.status_code is None:
+                    return Response(
+                        {"detail": "A request with this key is still being processed."},
+                        status=status.HTTP_409_CONFLICT
+                    )
+                return Response(
+                    existing.response_body, status=existing.status_code,
+                    headers={'Idempotent-Replayed': 'true'}
+                )
+
+        try:
+            response = view_method(view, request, *args, **kwargs)
+        except Exception:
+            # Let the client retry with the same key
+            record.delete()
+            raise
+        if response.status_code >= 500:
+            record.delete()
+        else:
+            # By pk and without a row check: past its lease the claim may
+            # have been taken over, and the new owner's response wins
+            IdempotencyKey.objects.filter(pk=record.pk).update(
+                status_code=response.status_code, response_body=response.data
+            )
+        return response
+
+    return wrapper
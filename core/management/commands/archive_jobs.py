@@ -0,0 +1,80 @@
+import time
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+from jobs.models import Job
+
+ARCHIVE_APPLICATIONS = """
+INSERT INTO jobs_archivedapplication
+    (id, job_id, applicant_id, resume, cover_letter, status, applied_at, archived_at)
+SELECT id, job_id, applicant_id, resume, cover_letter, status, applied_at, %s
+FROM jobs_application WHERE job_id IN ({ids})
+"""
+
+ARCHIVE_JOBS = """
+INSERT INTO jobs_archivedjob
+    (id, employer_id, category_id, title, description, company_logo, location,
+     salary, job_type, created_at, updated_at, archived_at)
+SELECT id, employer_id, category_id, title, description, company_logo, location,
+       salary, job_type, created_at, updated_at, %s
+FROM jobs_job WHERE id IN ({ids})
+"""
+
+
+class Command(BaseCommand):
+    help = 'Moves long-inactive jobs and their applications into the archive tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=90,
+            help='Archive jobs that have been inactive (not updated) for this many days'
+        )
+        parser.add_argument('--batch-size', type=int, default=500, help='Jobs moved per transaction')
+        parser.add_argument(
+            '--sleep', type=float, default=0.1,
+            help='Pause between batches, leaves room for regular traffic and vacuum'
+        )
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        candidates = Job.objects.filter(is_active=False, updated_at__lt=cutoff)
+        if options['dry_run']:
+            self.stdout.write(f'{candidates.count()} jobs would be archived.')
+            return
+
+        started = time.monotonic()
+        jobs_moved = applications_moved = 0
+        while True:
+            # Each batch is its own short transaction: rows locked by a
+            # concurrent request are skipped and picked up by a later run.
+            with transaction.atomic():
+                ids = list(
+                    candidates.order_by('id').select_for_update(skip_locked=True)
+                    .values_list('id', flat=True)[:options['batch_size']]
+                )
+                if not ids:
+                    break
+                placeholders = ', '.join(['%s'] * len(ids))
+                now = timezone.now()
+                with connection.cursor() as cursor:
+                    cursor.execute(ARCHIVE_APPLICATIONS.format(ids=placeholders), [now, *ids])
+                    cursor.execute(
+                        f'DELETE FROM jobs_application WHERE job_id IN ({placeholders})', ids
+                    )
+                    applications_moved += cursor.rowcount
+                    cursor.execute(ARCHIVE_JOBS.format(ids=placeholders), [now, *ids])
+                # Removes the job rows and their remaining side-table rows
+                Job.objects.filter(id__in=ids).delete()
+                jobs_moved += len(ids)
+
+            self.stdout.write(
+                f'  {jobs_moved} jobs, {applications_moved} applications archived '
+                f'({jobs_moved / (time.monotonic() - started):.0f} jobs/s)'
+            )
+            time.sleep(options['sleep'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Archived {jobs_moved} jobs and {applications_moved} applications.'
+        ))
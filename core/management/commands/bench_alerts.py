@@ -0,0 +1,104 @@
+import random
+import statistics
+import time
+from collections import Counter
+from functools import lru_cache
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from jobs.alerts import anchor_for, job_terms, match_jobs, term_frequency, tokens
+from jobs.models import Category, Job, SavedSearch
+
+SALARY_MINIMUMS = range(30000, 210000, 10000)
+
+
+class Command(BaseCommand):
+    help = (
+        'Times matching new jobs against generated saved searches (inserted in a '
+        'transaction that is rolled back)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--searches', type=int, default=1000000, help='Saved searches to generate')
+        parser.add_argument('--jobs', type=int, default=200, help='Jobs matched, the newest active ones')
+        parser.add_argument('--target-ms', type=float, default=100.0, help='Per-job time to stay under')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def criteria(self, rng, words, places, categories):
+        """
+        A search like the ones applicants save: mostly title keywords, some
+        locations, and filters on top; a few have filters only.
+        """
+        search = {}
+        kind = rng.random()
+        if kind < 0.85:
+            search['keywords'] = ' '.join(rng.sample(words, min(len(words), rng.choice((1, 2, 2)))))
+        elif places and kind < 0.97:
+            search['location'] = rng.choice(places)
+        if categories and rng.random() < 0.2:
+            search['category_id'] = rng.choice(categories)
+        if rng.random() < 0.3:
+            search['job_type'] = rng.choice(Job.JOB_TYPES)[0]
+        if rng.random() < 0.3 or not search:
+            search['salary_min'] = rng.choice(SALARY_MINIMUMS)
+        return search
+
+    def handle(self, *args, **options):
+        jobs = list(Job.objects.filter(is_active=True).order_by('-created_at')[:options['jobs']])
+        sample = Job.objects.filter(is_active=True).values_list('title', 'location')[:5000]
+        words = sorted(set().union(*(tokens(title) for title, _ in sample)))
+        places = sorted(set().union(*(tokens(location) for _, location in sample)))
+        users = list(get_user_model().objects.filter(role='applicant').values_list('pk', flat=True)[:1000])
+        categories = list(Category.objects.values_list('pk', flat=True))
+        if not jobs or not users:
+            raise CommandError('No jobs or applicants to work with; run seed_db first.')
+
+        rng = random.Random(options['seed'])
+        frequency = lru_cache(maxsize=None)(term_frequency)
+        anchors = Counter()
+        with transaction.atomic():
+            remaining = options['searches']
+            while remaining:
+                batch = []
+                for _ in range(min(remaining, 10000)):
+                    search = self.criteria(rng, words, places, categories)
+                    search['anchor'] = anchor_for(
+                        search.get('keywords', ''), search.get('location', ''), search.get('category_id'),
+                        search.get('job_type', ''), search.get('salary_min'), frequency=frequency,
+                    )
+                    anchors[search['anchor']] += 1
+                    batch.append(SavedSearch(user_id=rng.choice(users), **search))
+                SavedSearch.objects.bulk_create(batch)
+                remaining -= len(batch)
+            if connection.vendor == 'postgresql':
+                with connection.cursor() as cursor:
+                    cursor.execute('ANALYZE jobs_savedsearch')
+            self.stdout.write(f'{options["searches"]} saved searches under {len(anchors)} anchors')
+
+            timings, candidates, matches = [], [], 0
+            for job in jobs:
+                terms = job_terms(job, tokens(job.title), tokens(job.location))
+                candidates.append(sum(anchors[term] for term in terms))
+                started = time.perf_counter()
+                matches += sum(1 for _ in match_jobs([job]))
+                timings.append((time.perf_counter() - started) * 1000)
+            started = time.perf_counter()
+            list(match_jobs(jobs))
+            batch_ms = (time.perf_counter() - started) * 1000
+            transaction.set_rollback(True)
+
+        timings.sort()
+        p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+        self.stdout.write(
+            f'{len(jobs)} jobs: {statistics.median(candidates):.0f} candidates per job (median, '
+            f'max {max(candidates)}), {matches / len(jobs):.1f} matches per job'
+        )
+        self.stdout.write(
+            f'  one job at a time: median {statistics.median(timings):.1f} ms, '
+            f'p95 {p95:.1f} ms, max {timings[-1]:.1f} ms'
+        )
+        self.stdout.write(f'  all {len(jobs)} jobs in one batch: {batch_ms:.1f} ms')
+        if p95 <= options['target_ms']:
+            self.stdout.write(self.style.SUCCESS(f'p95 is within {options["target_ms"]:.0f} ms.'))
+        else:
+            self.stdout.write(self.style.ERROR(f'p95 is over {options["target_ms"]:.0f} ms.'))
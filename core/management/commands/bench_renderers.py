@@ -0,0 +1,65 @@
+import timeit
+from io import BytesIO
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from core.renderers import MessagePackRenderer, ORJSONParser, ORJSONRenderer
+from jobs.models import Job
+from jobs.serializers import JobSerializer
+
+RENDERERS = (
+    ('json (DRF)', JSONRenderer()),
+    ('orjson', ORJSONRenderer()),
+    ('msgpack', MessagePackRenderer()),
+)
+PARSERS = (
+    ('json (DRF)', JSONParser()),
+    ('orjson', ORJSONParser()),
+)
+
+
+class Command(BaseCommand):
+    help = 'Compares render/parse time and payload size of the API renderers on a page of jobs'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--page-size', type=int, default=500, help='Jobs per rendered page')
+        parser.add_argument('--repeat', type=int, default=5, help='Best of N timing runs')
+
+    def best(self, func, number, repeat):
+        return min(timeit.repeat(func, number=number, repeat=repeat)) / number
+
+    def handle(self, *args, **options):
+        jobs = Job.objects.select_related('employer', 'category').order_by('-created_at')[:options['page_size']]
+        payloads = {
+            # What the API renders: the serializer has already made strings
+            # of the Decimal salaries and datetimes
+            'serialized': {'results': JobSerializer(jobs, many=True).data},
+            # Raw model values, where the encoder has to convert them
+            'raw values': {'results': list(jobs.values(
+                'id', 'employer_id', 'category_id', 'title', 'description',
+                'location', 'salary', 'job_type', 'created_at', 'is_active',
+            ))},
+        }
+        if not payloads['raw values']['results']:
+            raise CommandError('No jobs to render; run seed_db first.')
+        number = max(1, 20000 // len(payloads['raw values']['results']))
+        repeat = options['repeat']
+
+        for label, data in payloads.items():
+            self.stdout.write(f'{label}: {len(data["results"])} jobs')
+            baseline = RENDERERS[0][1].render(data)
+            timings = {}
+            for name, renderer in RENDERERS:
+                body = renderer.render(data)
+                timings[name] = self.best(lambda: renderer.render(data), number, repeat)
+                note = ''
+                if renderer.format == 'json':
+                    note = ', identical' if body == baseline else ', DIFFERS from DRF output'
+                self.stdout.write(
+                    f'  render {name:<11} {timings[name] * 1000:8.3f} ms  '
+                    f'{len(body):>9} bytes  x{timings[RENDERERS[0][0]] / timings[name]:.1f}{note}'
+                )
+            for name, parser in PARSERS:
+                elapsed = self.best(lambda: parser.parse(BytesIO(baseline)), number, repeat)
+                self.stdout.write(f'  parse  {name:<11} {elapsed * 1000:8.3f} ms')
+        self.stdout.write(self.style.SUCCESS('Done.'))
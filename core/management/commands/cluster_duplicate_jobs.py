@@ -0,0 +1,160 @@
+import os
+import time
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import groupby
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from jobs.models import Job, JobSignature
+from jobs.dedupe import BANDS, ROWS, index_jobs, similarity, signatures_for
+
+# Members of every (band[, employer], bucket) shared by more than one job, in
+# bucket order; the LSH candidates, grouped by the database
+SHARED_BUCKETS_SQL = """
+SELECT {scope}, job_id FROM (
+    SELECT {scope}, job_id, COUNT(*) OVER (PARTITION BY {scope}) AS members
+    FROM jobs_jobsignatureband
+) bands
+WHERE members > 1
+ORDER BY {scope}, job_id
+"""
+
+
+class UnionFind:
+    def __init__(self):
+        self.parent = {}
+
+    def find(self, item):
+        parent = self.parent.get(item, item)
+        if parent != item:
+            parent = self.parent[item] = self.find(parent)
+        return parent
+
+    def union(self, a, b):
+        root = self.find(b)
+        self.parent.setdefault(root, root)
+        self.parent[self.find(a)] = root
+
+
+class Command(BaseCommand):
+    help = (
+        'Clusters near-duplicate job postings across the whole table with MinHash/LSH, '
+        'from the signature side tables (missing signatures are computed first)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=None, help='Size of the process pool')
+        parser.add_argument('--chunk-size', type=int, default=2000)
+        parser.add_argument(
+            '--threshold', type=float, default=settings.JOB_DUPLICATE_THRESHOLD,
+            help='Minimum estimated Jaccard similarity of two postings in a cluster'
+        )
+        parser.add_argument(
+            '--cross-employer', action='store_true',
+            help='Also cluster postings of different employers'
+        )
+        parser.add_argument(
+            '--reindex', action='store_true',
+            help='Recompute every signature, not only the missing ones'
+        )
+
+    def _chunks(self, options):
+        rows = Job.objects.order_by()
+        if not options['reindex']:
+            rows = rows.filter(signature__isnull=True)
+        rows = rows.values_list('id', 'employer_id', 'title', 'description')
+        chunk = []
+        for row in rows.iterator(chunk_size=options['chunk_size']):
+            chunk.append(row)
+            if len(chunk) == options['chunk_size']:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def _signatures(self, options):
+        """
+        Yields signature chunks in table order, keeping at most two chunks per
+        worker in flight so memory doesn't grow with the table.
+        """
+        workers = options['workers'] or os.cpu_count()
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = deque()
+            for chunk in self._chunks(options):
+                pending.append(pool.submit(signatures_for, chunk))
+                if len(pending) >= workers * 2:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
+    def _shared_buckets(self, options):
+        """
+        Yields the job ids of each shared bucket, streamed from a server-side
+        cursor: only one chunk of rows is held at a time.
+        """
+        scope = 'band, bucket' if options['cross_employer'] else 'band, employer_id, bucket'
+        with connection.chunked_cursor() as cursor:
+            cursor.execute(SHARED_BUCKETS_SQL.format(scope=scope))
+            rows = iter(lambda: cursor.fetchmany(options['chunk_size']), [])
+            rows = (row for chunk in rows for row in chunk)
+            for _, members in groupby(rows, key=lambda row: row[:-1]):
+                yield [row[-1] for row in members]
+
+    def _compare(self, groups, clusters, threshold):
+        """
+        Joins the jobs of each group pairwise when they are similar enough,
+        skipping pairs already in one cluster, and loading the signatures of
+        these groups only. Returns the number of pairs compared.
+        """
+        ids = {job_id for members in groups for job_id in members}
+        signatures = {
+            job_id: np.frombuffer(signature, dtype=np.uint32)
+            for job_id, signature in JobSignature.objects.filter(job_id__in=ids).values_list('job_id', 'signature')
+        }
+        compared = 0
+        for members in groups:
+            for i, job_id in enumerate(members):
+                for other in members[:i]:
+                    if clusters.find(other) != clusters.find(job_id):
+                        compared += 1
+                        if similarity(signatures[job_id], signatures[other]) >= threshold:
+                            clusters.union(job_id, other)
+        return compared
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        clusters = UnionFind()
+        total = 0
+
+        which = 'all' if options['reindex'] else 'missing'
+        self.stdout.write(f'Computing {which} signatures ({BANDS} bands x {ROWS} rows)...')
+        for results in self._signatures(options):
+            index_jobs(results)
+            total += len(results)
+            self.stdout.write(f'  {total} jobs ({total / (time.monotonic() - started):.0f}/s)')
+
+        self.stdout.write('Comparing the postings that share a bucket...')
+        groups, size, candidates = [], 0, 0
+        for members in self._shared_buckets(options):
+            groups.append(members)
+            size += len(members)
+            if size >= options['chunk_size']:
+                candidates += self._compare(groups, clusters, options['threshold'])
+                groups, size = [], 0
+        candidates += self._compare(groups, clusters, options['threshold'])
+
+        members = defaultdict(list)
+        for job_id in clusters.parent:
+            members[clusters.find(job_id)].append(job_id)
+        duplicates = sorted(
+            (sorted(ids) for ids in members.values() if len(ids) > 1), key=len, reverse=True
+        )
+
+        for ids in duplicates:
+            self.stdout.write(f'Cluster of {len(ids)}: ' + ', '.join(map(str, ids)))
+        self.stdout.write(self.style.SUCCESS(
+            f'Compared {candidates} candidate pairs in {time.monotonic() - started:.1f}s: '
+            f'{len(duplicates)} clusters, {sum(len(ids) - 1 for ids in duplicates)} redundant postings.'
+        ))
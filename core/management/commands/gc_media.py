@@ -0,0 +1,135 @@
+import time
+from datetime import timedelta
+from heapq import merge
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import F
+from django.db.models.functions import Collate
+from django.utils import timezone
+from jobs.models import Application, ArchivedApplication, ArchivedJob, Job
+
+# (model, file field) pairs whose values reference media files
+REFERENCES = (
+    (Application, 'resume'),
+    (ArchivedApplication, 'resume'),
+    (Job, 'company_logo'),
+    (ArchivedJob, 'company_logo'),
+)
+ROOTS = ('company_logos', 'resumes')
+QUARANTINE_ROOT = 'quarantine'
+
+
+def walk_sorted(storage, path):
+    """
+    Yields the file names below path in plain string order, holding one
+    directory listing per level in memory. A directory sorts as name + '/',
+    which is where its files fall among their siblings' names.
+    """
+    try:
+        dirs, files = storage.listdir(path)
+    except FileNotFoundError:
+        return
+    entries = [(name + '/', True) for name in dirs] + [(name, False) for name in files]
+    for name, is_dir in sorted(entries):
+        if is_dir:
+            yield from walk_sorted(storage, f'{path}/{name[:-1]}')
+        else:
+            yield f'{path}/{name}'
+
+
+def referenced_paths(chunk_size=5000):
+    """
+    Yields every file name stored in the DB, sorted and deduplicated. Each
+    column is read in byte order (COLLATE "C" on PostgreSQL), which for UTF-8
+    is the same order Python compares strings in.
+    """
+    streams = []
+    for model, field in REFERENCES:
+        order = Collate(F(field), 'C') if connection.vendor == 'postgresql' else F(field)
+        streams.append(
+            model.objects.exclude(**{f'{field}__isnull': True}).exclude(**{field: ''})
+            .order_by(order).values_list(field, flat=True).iterator(chunk_size=chunk_size)
+        )
+    previous = None
+    for name in merge(*streams):
+        if name != previous:
+            yield name
+            previous = name
+
+
+def unreferenced(files, references):
+    """
+    Merge join of two sorted iterators: the files with no reference.
+    """
+    reference = next(references, None)
+    for name in files:
+        while reference is not None and reference < name:
+            reference = next(references, None)
+        if reference != name:
+            yield name
+
+
+class Command(BaseCommand):
+    help = 'Deletes (or quarantines) media files no Application or Job references any more'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--grace-hours', type=float, default=24,
+            help='Leave unreferenced files younger than this (uploads still being saved)'
+        )
+        parser.add_argument(
+            '--quarantine', action='store_true',
+            help=f'Move files under {QUARANTINE_ROOT}/ instead of deleting them'
+        )
+        parser.add_argument('--dry-run', action='store_true')
+        parser.add_argument('--report-every', type=int, default=10000, help='Progress line every N files')
+
+    def remove(self, storage, name, options):
+        if options['quarantine']:
+            with storage.open(name) as content:
+                storage.save(f'{QUARANTINE_ROOT}/{name}', content)
+        storage.delete(name)
+
+    def handle(self, *args, **options):
+        storage = Application._meta.get_field('resume').storage
+        cutoff = timezone.now() - timedelta(hours=options['grace_hours'])
+        started = time.monotonic()
+        scanned = orphaned = removed = young = freed = 0
+
+        def files():
+            nonlocal scanned
+            for root in ROOTS:
+                for name in walk_sorted(storage, root):
+                    scanned += 1
+                    if scanned % options['report_every'] == 0:
+                        self.stdout.write(
+                            f'  {scanned} files scanned, {orphaned} unreferenced '
+                            f'({scanned / (time.monotonic() - started):.0f} files/s)'
+                        )
+                    yield name
+
+        for name in unreferenced(files(), referenced_paths()):
+            orphaned += 1
+            try:
+                if storage.get_modified_time(name) > cutoff:
+                    young += 1
+                    continue
+                size = storage.size(name)
+                if not options['dry_run']:
+                    self.remove(storage, name, options)
+            except FileNotFoundError:
+                continue
+            removed += 1
+            freed += size
+            if options['verbosity'] > 1:
+                self.stdout.write(f'  {name}')
+
+        action = 'would be removed' if options['dry_run'] else (
+            'quarantined' if options['quarantine'] else 'deleted'
+        )
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Scanned {scanned} files in {elapsed:.1f}s ({scanned / max(elapsed, 1e-6):.0f} files/s): '
+            f'{orphaned} unreferenced, {removed} {action} ({freed / 2 ** 20:.1f} MiB), '
+            f'{young} within the grace period.'
+        ))
@@ -0,0 +1,56 @@
+import sys
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from jobs.imports import FORMATS, format_for, import_feed
+
+
+class Command(BaseCommand):
+    help = "Upserts an employer's jobs from an ATS feed (JSON, NDJSON, CSV or XML), streaming it"
+
+    def add_arguments(self, parser):
+        parser.add_argument('feed', help='Path of the feed, or - for stdin')
+        parser.add_argument('--employer', required=True, help='Email of the employer the jobs belong to')
+        parser.add_argument(
+            '--format', choices=FORMATS,
+            help='Feed format; by default taken from the file extension'
+        )
+        parser.add_argument('--batch-size', type=int, default=None, help='Postings per upsert statement')
+        parser.add_argument(
+            '--keep-missing', action='store_true',
+            help="Don't deactivate the employer's imported jobs missing from the feed"
+        )
+
+    def handle(self, *args, **options):
+        try:
+            employer = get_user_model().objects.get(email=options['employer'], role='employer')
+        except get_user_model().DoesNotExist:
+            raise CommandError(f"No employer with email {options['employer']}.")
+        feed_format = options['format'] or format_for(filename=options['feed'])
+        if feed_format is None:
+            raise CommandError('Cannot tell the feed format from its name, pass --format.')
+
+        def progress(report):
+            self.stdout.write(f'{report.rows} rows ({report.rows_per_second:.0f} rows/s)')
+
+        stream = sys.stdin.buffer if options['feed'] == '-' else open(options['feed'], 'rb')
+        try:
+            report = import_feed(
+                employer, stream, feed_format,
+                deactivate_missing=not options['keep_missing'],
+                batch_size=options['batch_size'], progress=progress,
+            )
+        finally:
+            if stream is not sys.stdin.buffer:
+                stream.close()
+
+        for error in report.errors:
+            self.stderr.write(f"Row {error['row']} ({error['external_id'] or 'no external_id'}): {error['errors']}")
+        if report.error_count > len(report.errors):
+            self.stderr.write(f'... and {report.error_count - len(report.errors)} more invalid rows.')
+        if report.aborted:
+            self.stderr.write(self.style.ERROR(f'Stopped early, nothing deactivated: {report.aborted}'))
+        self.stdout.write(self.style.SUCCESS(
+            f'{report.rows} rows in {report.seconds:.1f}s ({report.rows_per_second:.0f} rows/s): '
+            f'{report.created} created, {report.updated} updated, {report.unchanged} unchanged, '
+            f'{report.error_count} invalid, {report.deactivated} deactivated.'
+        ))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from jobs.partitions import ensure_application_partitions
+
+
+class Command(BaseCommand):
+    help = (
+        'Creates the upcoming monthly partitions of jobs_application, moving rows that '
+        'already landed in the default partition (run it daily)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--months-ahead', type=int, default=3)
+
+    def handle(self, *args, **options):
+        created, moved = ensure_application_partitions(months_ahead=options['months_ahead'])
+        for name in created:
+            self.stdout.write(f'Created partition {name}')
+        if moved:
+            self.stdout.write(self.style.WARNING(f'Moved {moved} rows out of the default partition'))
+        self.stdout.write(self.style.SUCCESS(f'{len(created)} partitions created.'))
@@ -0,0 +1,36 @@
+import time
+from django.core.management.base import BaseCommand
+from users.deletion import DeletionRun, claim_deletion
+
+
+class Command(BaseCommand):
+    help = 'Deletes deactivated accounts with their jobs, applications and files in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Rows deleted per transaction')
+        parser.add_argument(
+            '--sleep', type=float, default=10.0,
+            help='Seconds to wait before polling again once nothing is pending'
+        )
+        parser.add_argument('--once', action='store_true', help='Process what is pending and exit')
+
+    def report(self, deletion):
+        self.stdout.write(
+            f'  user {deletion.user_id}: {deletion.jobs_deleted} jobs, '
+            f'{deletion.applications_deleted} applications, {deletion.files_deleted} files'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            deletion = claim_deletion()
+            if deletion is None:
+                if options['once']:
+                    break
+                time.sleep(options['sleep'])
+                continue
+            started = time.monotonic()
+            self.stdout.write(f'Deleting user {deletion.user_id}...')
+            DeletionRun(deletion, batch_size=options['batch_size'], progress=self.report).run()
+            self.stdout.write(self.style.SUCCESS(
+                f'Deleted user {deletion.user_id} in {time.monotonic() - started:.1f}s.'
+            ))
@@ -0,0 +1,29 @@
+import time
+from django.core.management.base import BaseCommand
+from core.outbox import drain
+
+
+class Command(BaseCommand):
+    help = 'Delivers queued outbox emails in batches, coalescing digests per recipient'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument(
+            '--sleep', type=float, default=5.0,
+            help='Seconds to wait before polling again once the outbox is empty'
+        )
+        parser.add_argument('--once', action='store_true', help='Drain what is due and exit')
+
+    def handle(self, *args, **options):
+        while True:
+            started = time.monotonic()
+            sent, failed = drain(batch_size=options['batch_size'])
+            if sent or failed:
+                self.stdout.write(
+                    f'Sent {sent} messages, {failed} failed '
+                    f'({time.monotonic() - started:.1f}s).'
+                )
+            if options['once']:
+                break
+            time.sleep(options['sleep'])
+        self.stdout.write(self.style.SUCCESS('Outbox drained.'))
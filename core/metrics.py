@@ -0,0 +1,313 @@
+"""
+Runtime metrics, served in the Prometheus text format at /metrics.
+
+Each process keeps its values in a memory-mapped file of its own in
+METRICS_DIR, so recording one is a write to local memory: no lock or round
+trip shared with other processes. /metrics, answered by whichever worker,
+sums the files of all of them, like prometheus_client's multiprocess mode.
+Counters and histograms of workers that have exited keep counting (they only
+ever grow); gauges only count for live processes. METRICS_DIR is emptied when
+gunicorn starts (see gunicorn.conf.py). Without METRICS_DIR the values stay
+in the memory of the process, which is all runserver and the tests need.
+"""
+import json
+import math
+import mmap
+import os
+import re
+import struct
+import threading
+from collections import defaultdict
+from django.conf import settings
+
+# Seconds; Prometheus' default buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+NAMESPACE = 'careernode'
+INVALID_NAME_CHARS = re.compile(r'[^a-zA-Z0-9_:]')
+FILE_RE = re.compile(r'^metrics_(\d+)\.db$')
+
+# Kinds of stored values
+COUNTER, GAUGE, BUCKET, SUM, COUNT = 'counter', 'gauge', 'bucket', 'sum', 'count'
+
+HEADER = struct.Struct('<I4x')
+KEY_LENGTH = struct.Struct('<I')
+VALUE = struct.Struct('<d')
+INITIAL_SIZE = 1 << 16
+
+
+class Store:
+    """
+    Flat map of keys to float64 values in an mmap, written by a single
+    process: an 8-byte header holding the bytes in use, then entries of a
+    4-byte key length, the utf-8 key padded to a multiple of 8 and the value.
+    A new entry is written before the header is moved past it, so a reader
+    never sees half of one.
+    """
+    def __init__(self, path=None):
+        self.path = path
+        self.lock = threading.Lock()
+        self.positions = {}
+        # Histogram series that have all their buckets
+        self.histograms = set()
+        if path is None:
+            self.file = None
+            self.map = mmap.mmap(-1, INITIAL_SIZE)
+            self.used = HEADER.size
+        else:
+            self.file = open(path, 'a+b')
+            size = max(os.fstat(self.file.fileno()).st_size, INITIAL_SIZE)
+            self.file.truncate(size)
+            self.map = mmap.mmap(self.file.fileno(), size)
+            self.used = HEADER.unpack_from(self.map)[0] or HEADER.size
+            for key, position in entries(self.map, self.used):
+                self.positions[key] = position
+        HEADER.pack_into(self.map, 0, self.used)
+
+    def _grow(self, needed):
+        size = len(self.map)
+        while size < needed:
+            size *= 2
+        if self.file is None:
+            grown = mmap.mmap(-1, size)
+            grown[:self.used] = self.map[:self.used]
+        else:
+            self.file.truncate(size)
+            grown = mmap.mmap(self.file.fileno(), size)
+        self.map.close()
+        self.map = grown
+
+    def _position(self, key):
+        position = self.positions.get(key)
+        if position is None:
+            encoded = key.encode()
+            padded = encoded + b' ' * (-(KEY_LENGTH.size + len(encoded)) % 8)
+            entry = KEY_LENGTH.pack(len(padded)) + padded + VALUE.pack(0.0)
+            if self.used + len(entry) > len(self.map):
+                self._grow(self.used + len(entry))
+            self.map[self.used:self.used + len(entry)] = entry
+            position = self.used + len(entry) - VALUE.size
+            self.used += len(entry)
+            HEADER.pack_into(self.map, 0, self.used)
+            self.positions[key] = position
+        return position
+
+    def add(self, key, amount):
+        with self.lock:
+            position = self._position(key)
+            VALUE.pack_into(self.map, position, VALUE.unpack_from(self.map, position)[0] + amount)
+
+    def items(self):
+        with self.lock:
+            return [(key, VALUE.unpack_from(self.map, position)[0]) for key, position in self.positions.items()]
+
+    def clear(self):
+        with self.lock:
+            self.positions = {}
+            self.histograms = set()
+            self.used = HEADER.size
+            HEADER.pack_into(self.map, 0, self.used)
+
+
+def entries(buffer, used):
+    """
+    (key, value position) of every entry of a Store's bytes.
+    """
+    position = HEADER.size
+    while position < used:
+        length = KEY_LENGTH.unpack_from(buffer, position)[0]
+        key_start = position + KEY_LENGTH.size
+        key = bytes(buffer[key_start:key_start + length]).rstrip(b' ').decode()
+        position = key_start + length + VALUE.size
+        yield key, position - VALUE.size
+
+
+_store = None
+_store_lock = threading.Lock()
+_keys = {}
+
+
+def store():
+    """
+    This process' Store, (re)opened after a fork: a gunicorn worker must not
+    write to the file of the master it was forked from.
+    """
+    global _store
+    current = (os.getpid(), settings.METRICS_DIR)
+    if _store is None or _store.owner != current:
+        with _store_lock:
+            if _store is None or _store.owner != current:
+                pid, directory = current
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                    _store = Store(os.path.join(directory, f'metrics_{pid}.db'))
+                else:
+                    _store = Store()
+                _store.owner = current
+    return _store
+
+
+def _key(kind, name, labels):
+    """
+    Stored key of a series, memoized: recording a value doesn't pay for the
+    JSON encoding every time.
+    """
+    labels = tuple(sorted(labels.items()))
+    cache_key = (kind, name, labels)
+    key = _keys.get(cache_key)
+    if key is None:
+        key = _keys[cache_key] = json.dumps([kind, name, dict(labels)], separators=(',', ':'))
+    return key
+
+
+def incr(name, amount=1, **labels):
+    store().add(_key(COUNTER, name, labels), amount)
+
+
+def gauge_add(name, amount, **labels):
+    store().add(_key(GAUGE, name, labels), amount)
+
+
+def observe(name, value, buckets=LATENCY_BUCKETS, **labels):
+    """
+    Records value in the histogram `name`: one write to the first bucket it
+    fits (cumulated when rendered), plus the sum and count.
+    """
+    le = next((bound for bound in buckets if value <= bound), math.inf)
+    process = store()
+    series = (name, tuple(sorted(labels.items())))
+    if series not in process.histograms:
+        # All buckets exist from the start, so every scrape has the same ones
+        for bound in (*buckets, math.inf):
+            process.add(_key(BUCKET, name, dict(labels, le=bound)), 0)
+        process.histograms.add(series)
+    process.add(_key(BUCKET, name, dict(labels, le=le)), 1)
+    process.add(_key(SUM, name, labels), value)
+    process.add(_key(COUNT, name, labels), 1)
+
+
+def reset():
+    """
+    Drops this process' values (tests).
+    """
+    store().clear()
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def collect():
+    """
+    {(kind, name, labels tuple): value} summed over every process.
+    """
+    directory = settings.METRICS_DIR
+    if directory:
+        own = store()
+        sources = []
+        for filename in os.listdir(directory):
+            match = FILE_RE.match(filename)
+            if not match:
+                continue
+            pid = int(match.group(1))
+            if pid == own.owner[0]:
+                sources.append((own.items(), True))
+                continue
+            try:
+                with open(os.path.join(directory, filename), 'rb') as file:
+                    data = file.read()
+            except FileNotFoundError:
+                continue
+            used = min(HEADER.unpack_from(data)[0], len(data)) if len(data) >= HEADER.size else 0
+            items = [(key, VALUE.unpack_from(data, position)[0]) for key, position in entries(data, used)]
+            sources.append((items, _alive(pid)))
+    else:
+        sources = [(store().items(), True)]
+
+    totals = defaultdict(float)
+    for items, alive in sources:
+        for key, value in items:
+            kind, name, labels = json.loads(key)
+            if kind == GAUGE and not alive:
+                continue
+            totals[(kind, name, tuple(sorted(labels.items())))] += value
+    return totals
+
+
+def get(name, **labels):
+    """
+    Total of the counter `name` across processes.
+    """
+    return collect().get((COUNTER, name, tuple(sorted(labels.items()))), 0)
+
+
+def metric_name(name):
+    return f'{NAMESPACE}_{INVALID_NAME_CHARS.sub("_", name)}'
+
+
+def _labels(labels):
+    if not labels:
+        return ''
+    escaped = (
+        (key, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for key, value in labels
+    )
+    return '{' + ','.join(f'{key}="{value}"' for key, value in escaped) + '}'
+
+
+def _value(value):
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+def _bound(le):
+    return '+Inf' if le == math.inf else repr(float(le))
+
+
+def render():
+    """
+    Every metric in the Prometheus text exposition format (version 0.0.4).
+    """
+    families = defaultdict(list)
+    for (kind, name, labels), value in collect().items():
+        families[name].append((kind, labels, value))
+
+    lines = []
+    for name in sorted(families):
+        series = families[name]
+        kinds = {kind for kind, _, _ in series}
+        if kinds & {BUCKET, SUM, COUNT}:
+            base = metric_name(name)
+            lines.append(f'# TYPE {base} histogram')
+            buckets = defaultdict(dict)
+            for kind, labels, value in series:
+                if kind == BUCKET:
+                    le = dict(labels)['le']
+                    buckets[tuple(item for item in labels if item[0] != 'le')][le] = value
+            sums = {labels: value for kind, labels, value in series if kind == SUM}
+            for labels, count in sorted((labels, value) for kind, labels, value in series if kind == COUNT):
+                cumulative = 0
+                for le, value in sorted(buckets[labels].items()):
+                    if le == math.inf:
+                        continue
+                    cumulative += value
+                    lines.append(f'{base}_bucket{_labels(labels + (("le", _bound(le)),))} {_value(cumulative)}')
+                lines.append(f'{base}_bucket{_labels(labels + (("le", "+Inf"),))} {_value(count)}')
+                lines.append(f'{base}_sum{_labels(labels)} {_value(sums.get(labels, 0.0))}')
+                lines.append(f'{base}_count{_labels(labels)} {_value(count)}')
+        elif GAUGE in kinds:
+            base = metric_name(name)
+            lines.append(f'# TYPE {base} gauge')
+            lines.extend(f'{base}{_labels(labels)} {_value(value)}' for _, labels, value in sorted(series))
+        else:
+            base = metric_name(name)
+            if not base.endswith('_total'):
+                base += '_total'
+            lines.append(f'# TYPE {base} counter')
+            lines.extend(f'{base}{_labels(labels)} {_value(value)}' for _, labels, value in sorted(series))
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,150 @@
+import contextvars
+import gzip
+import time
+import brotli
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+from core import metrics
+
+COMPRESSIBLE_TYPES = ('application/json', 'application/msgpack', 'application/javascript', 'application/xml')
+
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+METHODS = {'GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'}
+
+# Queries of the request being handled. A context variable, as under ASGI the
+# sync views (and their queries) run in another thread than the middleware
+request_queries = contextvars.ContextVar('request_queries', default=None)
+
+
+def accepted_encodings(header):
+    """
+    Content codings of an Accept-Encoding header with a non-zero q-value.
+    """
+    accepted = set()
+    for item in header.split(','):
+        coding, _, params = item.partition(';')
+        params = params.strip()
+        q = 1.0
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                continue
+        if q > 0:
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """
+    Compresses API responses with brotli, or gzip for clients that don't
+    accept br. Bodies under COMPRESSION_MIN_BYTES aren't worth the CPU and
+    streaming responses (the SSE stream) must not be buffered, so both are
+    left alone. Bytes in and saved are counted in core.metrics.
+    """
+
+    def process_response(self, request, response):
+        if response.streaming or response.has_header('Content-Encoding'):
+            return response
+        content_type = response.get('Content-Type', '').split(';')[0].strip()
+        if not (content_type.startswith('text/') or content_type in COMPRESSIBLE_TYPES):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        size = len(response.content)
+        if size < settings.COMPRESSION_MIN_BYTES:
+            return response
+
+        accepted = accepted_encodings(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if 'br' in accepted:
+            encoding = 'br'
+            compressed = brotli.compress(response.content, quality=settings.COMPRESSION_BROTLI_QUALITY)
+        elif 'gzip' in accepted:
+            encoding = 'gzip'
+            compressed = gzip.compress(response.content, compresslevel=settings.COMPRESSION_GZIP_LEVEL, mtime=0)
+        else:
+            return response
+        if len(compressed) >= size:
+            return response
+
+        response.content = compressed
+        response['Content-Length'] = str(len(compressed))
+        response['Content-Encoding'] = encoding
+        # The body differs from the uncompressed one (see GZipMiddleware)
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        metrics.incr('compression.bytes_in', size)
+        metrics.incr('compression.bytes_saved', size - len(compressed))
+        return response
+
+
+def count_query(execute, sql, params, many, context):
+    counter = request_queries.get()
+    if counter is not None:
+        counter[0] += 1
+    return execute(sql, params, many, context)
+
+
+def install_query_counter(sender, connection, **kwargs):
+    if count_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(count_query)
+
+
+class MetricsMiddleware:
+    """
+    Latency histogram and status codes per route (the URL name, e.g.
+    job_list_create), queries per request and requests in flight, recorded
+    in core.metrics for /metrics. First in MIDDLEWARE, so it times all the
+    others too.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        connection_created.connect(install_query_counter, dispatch_uid='metrics_query_counter')
+        for connection in connections.all(initialized_only=True):
+            install_query_counter(None, connection)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        started, token = self.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            metrics.gauge_add('http_requests_in_flight', -1)
+        self.record(request, response, started, token)
+        return response
+
+    async def __acall__(self, request):
+        started, token = self.start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            metrics.gauge_add('http_requests_in_flight', -1)
+        self.record(request, response, started, token)
+        return response
+
+    def start(self):
+        metrics.gauge_add('http_requests_in_flight', 1)
+        return time.perf_counter(), request_queries.set([0])
+
+    def record(self, request, response, started, token):
+        elapsed = time.perf_counter() - started
+        queries = request_queries.get()[0]
+        request_queries.reset(token)
+        match = request.resolver_match
+        # Unresolved paths and unknown methods share one label each, so
+        # scanners can't add series
+        route = match.view_name if match else 'unmatched'
+        method = request.method if request.method in METHODS else 'other'
+        metrics.observe('http_request_duration_seconds', elapsed, route=route, method=method)
+        metrics.incr('http_requests_total', route=route, method=method, status=str(response.status_code))
+        metrics.observe('http_request_db_queries', queries, buckets=QUERY_BUCKETS, route=route)
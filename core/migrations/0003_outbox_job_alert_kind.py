@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-19 18:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_outbox'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='outboxmessage',
+            name='kind',
+            field=models.CharField(choices=[('application_received', 'Application received'), ('application_status', 'Application status changed'), ('job_alert', 'New jobs for a saved search')], max_length=32),
+        ),
+    ]
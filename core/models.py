@@ -0,0 +1,66 @@
+from django.db import models
+from django.conf import settings
+from django.utils import timezone
+
+
+class IdempotencyKey(models.Model):
+    """
+    Short-lived record of a request sent with an Idempotency-Key header.
+    Replays of the same key return the stored response instead of redoing the work.
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+')
+    key = models.CharField(max_length=255)
+    # Hash of method, path & payload, a key can't be reused for another request
+    request_hash = models.CharField(max_length=64)
+    # Empty while the first request is still being processed
+    status_code = models.PositiveSmallIntegerField(null=True)
+    response_body = models.JSONField(null=True)
+    # When the key was claimed; starts the in-flight lease
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'key'], name='idempotency_user_key_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id}:{self.key}"
+
+
+class OutboxMessage(models.Model):
+    """
+    Email waiting for the send_outbox worker.
+    Written in the same transaction as the change that triggers it, so a
+    notification is sent if and only if that change was committed.
+    """
+    KIND_CHOICES = (
+        ('application_received', 'Application received'),
+        ('application_status', 'Application status changed'),
+        ('job_alert', 'New jobs for a saved search'),
+    )
+
+    kind = models.CharField(max_length=32, choices=KIND_CHOICES)
+    recipient = models.EmailField()
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Not picked up before this time (retry backoff & worker leases)
+    available_at = models.DateTimeField(default=timezone.now)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    # Set once OUTBOX_MAX_ATTEMPTS deliveries failed
+    failed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['available_at', 'id'],
+                name='outbox_pending_idx',
+                condition=models.Q(sent_at__isnull=True, failed_at__isnull=True),
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} -> {self.recipient}"
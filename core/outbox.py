@@ -0,0 +1,187 @@
+"""
+Transactional outbox for email notifications.
+
+Messages are rows of OutboxMessage written inside the caller's transaction;
+the send_outbox command delivers them later, so requests never wait on SMTP
+and a rolled back change never sends mail.
+"""
+from collections import defaultdict
+from datetime import timedelta
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+from .models import OutboxMessage
+
+DIGEST_SEPARATOR = '\n\n' + '-' * 40 + '\n\n'
+
+
+def enqueue(kind, recipient, subject, body):
+    return OutboxMessage.objects.create(kind=kind, recipient=recipient, subject=subject, body=body)
+
+
+def enqueue_many(messages):
+    """
+    messages: iterable of (kind, recipient, subject, body), written in one INSERT.
+    """
+    return OutboxMessage.objects.bulk_create([
+        OutboxMessage(kind=kind, recipient=recipient, subject=subject, body=body)
+        for kind, recipient, subject, body in messages
+    ])
+
+
+def application_received(application):
+    """
+    Queues the "new application" email to the employer of the job.
+    """
+    job = application.job
+    return enqueue(
+        'application_received',
+        job.employer.email,
+        f'New application for {job.title}',
+        f'{application.applicant.email} applied to "{job.title}" ({job.location}).\n'
+        f'Review the application in your CareerNode dashboard.',
+    )
+
+
+def application_status_changed(job, status, recipients):
+    """
+    Queues the "your application was accepted/rejected" email to each
+    applicant in recipients, in one INSERT.
+    """
+    return enqueue_many(
+        (
+            'application_status',
+            recipient,
+            f'Your application for {job.title}',
+            f'Your application to "{job.title}" ({job.location}) is now {status}.\n'
+            f'See the details in your CareerNode dashboard.',
+        )
+        for recipient in recipients
+    )
+
+
+def retry_delay(attempts):
+    """
+    Exponential backoff: OUTBOX_RETRY_BASE_SECONDS * 2^(attempts - 1), capped.
+    """
+    delay = settings.OUTBOX_RETRY_BASE_SECONDS * 2 ** max(attempts - 1, 0)
+    return timedelta(seconds=min(delay, settings.OUTBOX_RETRY_MAX_SECONDS))
+
+
+def claim_batch(batch_size):
+    """
+    Leases up to batch_size due messages to this worker by pushing their
+    available_at OUTBOX_LEASE_SECONDS ahead. SKIP LOCKED lets several workers
+    claim disjoint batches; a worker that dies mid-batch only delays its
+    messages until the lease runs out.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        batch = list(
+            OutboxMessage.objects
+            .filter(sent_at__isnull=True, failed_at__isnull=True, available_at__lte=now)
+            .order_by('available_at', 'id')
+            .select_for_update(skip_locked=True)[:batch_size]
+        )
+        if batch:
+            OutboxMessage.objects.filter(pk__in=[message.pk for message in batch]).update(
+                available_at=now + timedelta(seconds=settings.OUTBOX_LEASE_SECONDS)
+            )
+    return batch
+
+
+def build_email(recipient, messages, connection):
+    """
+    One email per recipient: the message itself, or a digest of all of them.
+    """
+    if len(messages) == 1:
+        subject, body = messages[0].subject, messages[0].body
+    else:
+        subject = f'{len(messages)} updates from CareerNode'
+        body = DIGEST_SEPARATOR.join(f'{message.subject}\n\n{message.body}' for message in messages)
+    return EmailMessage(subject, body, settings.DEFAULT_FROM_EMAIL, [recipient], connection=connection)
+
+
+def deliver(messages, connection):
+    """
+    Sends a claimed batch over an already open connection, coalescing the
+    messages of each recipient into a digest. Returns (sent, failed) counts of
+    outbox rows; failed rows are rescheduled with backoff, or given up on
+    after OUTBOX_MAX_ATTEMPTS.
+    """
+    by_recipient = defaultdict(list)
+    for message in messages:
+        by_recipient[message.recipient.lower()].append(message)
+
+    sent_ids, failures = [], []
+    for recipient, group in by_recipient.items():
+        try:
+            connection.send_messages([build_email(group[0].recipient, group, connection)])
+        except Exception as exc:
+            failures.append((group, f'{type(exc).__name__}: {exc}'))
+            reconnect(connection)
+        else:
+            sent_ids.extend(message.pk for message in group)
+
+    if sent_ids:
+        OutboxMessage.objects.filter(pk__in=sent_ids).update(sent_at=timezone.now(), last_error='')
+    for group, error in failures:
+        reschedule(group, error)
+    return len(sent_ids), sum(len(group) for group, _ in failures)
+
+
+def reschedule(messages, error):
+    """
+    Records a failed attempt at sending messages: they're due again after
+    retry_delay(), or given up on after OUTBOX_MAX_ATTEMPTS.
+    """
+    now = timezone.now()
+    for message in messages:
+        message.attempts += 1
+        message.last_error = error
+        if message.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+            message.failed_at = now
+        else:
+            message.available_at = now + retry_delay(message.attempts)
+    OutboxMessage.objects.bulk_update(
+        messages, ['attempts', 'last_error', 'failed_at', 'available_at']
+    )
+
+
+def reconnect(connection):
+    """
+    Replaces a connection that may have been dropped by the server; if that
+    fails too, the next send raises and is retried later.
+    """
+    try:
+        connection.close()
+        connection.open()
+    except Exception:
+        pass
+
+
+def drain(batch_size=100, connection=None):
+    """
+    Delivers every message that is currently due, over one connection that is
+    only opened if there is something to send. Returns (sent, failed). When
+    the connection can't be opened (SMTP outage) the claimed batch is
+    rescheduled like a failed send.
+    """
+    batch = claim_batch(batch_size)
+    if not batch:
+        return 0, 0
+    connection = connection or get_connection()
+    try:
+        connection.open()
+    except Exception as exc:
+        reschedule(batch, f'{type(exc).__name__}: {exc}')
+        return 0, len(batch)
+    sent = failed = 0
+    with connection:
+        while batch:
+            batch_sent, batch_failed = deliver(batch, connection)
+            sent += batch_sent
+            failed += batch_failed
+            batch = claim_batch(batch_size)
+    return sent, failed
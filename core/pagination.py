@@ -0,0 +1,105 @@
+from django.core.paginator import EmptyPage, Paginator
+from django.db import connections
+from django.db.models import QuerySet
+from django.utils.functional import cached_property
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+
+class OptionalCursorPagination(CursorPagination):
+    """
+    Cursor pagination that only kicks in once the client asks for it with
+    ?cursor= or ?page_size=, so existing clients keep the plain list.
+    The cursor follows whatever ordering the filters applied to the queryset.
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+    def paginate_queryset(self, queryset, request, view=None):
+        params = request.query_params
+        if self.cursor_query_param not in params and self.page_size_query_param not in params:
+            return None
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_ordering(self, request, queryset, view):
+        return tuple(queryset.query.order_by) or ('-pk',)
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that never runs an exact COUNT(*) over a large table.
+    Unfiltered querysets use the planner's row estimate (pg_class.reltuples);
+    filtered ones count at most count_cap rows. Tables below
+    estimate_threshold rows are counted exactly. When the count is an
+    estimate, pages past it are still served rather than cut off.
+    """
+    estimate_threshold = 10000
+    count_cap = 10000
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.is_estimate = False
+
+    def _table_estimate(self):
+        queryset = self.object_list
+        if connections[queryset.db].vendor != 'postgresql' or queryset.query.has_filters():
+            return None
+        with connections[queryset.db].cursor() as cursor:
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(%s)',
+                [queryset.model._meta.db_table],
+            )
+            row = cursor.fetchone()
+        return row[0] if row else None
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not isinstance(queryset, QuerySet):
+            return super().count
+        estimate = self._table_estimate()
+        if estimate is not None and estimate >= self.estimate_threshold:
+            self.is_estimate = True
+            return estimate
+        # COUNT(*) over a LIMITed subquery stops after count_cap + 1 rows
+        count = queryset.order_by()[:self.count_cap + 1].count()
+        if count > self.count_cap:
+            self.is_estimate = True
+            return self.count_cap
+        return count
+
+    def validate_number(self, number):
+        try:
+            return super().validate_number(number)
+        except EmptyPage:
+            if not self.is_estimate or int(number) < 1:
+                raise
+            return int(number)
+
+    def page(self, number):
+        number = self.validate_number(number)
+        if not self.is_estimate:
+            return super().page(number)
+        bottom = (number - 1) * self.per_page
+        return self._get_page(self.object_list[bottom:bottom + self.per_page], number, self)
+
+
+class EstimatedCountPagination(PageNumberPagination):
+    """
+    Page number pagination over EstimatedCountPaginator; the response says
+    whether `count` is exact.
+    """
+    django_paginator_class = EstimatedCountPaginator
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        response.data['count_is_estimate'] = self.page.paginator.is_estimate
+        return response
+
+    def get_paginated_response_schema(self, schema):
+        schema = super().get_paginated_response_schema(schema)
+        schema['properties']['count_is_estimate'] = {'type': 'boolean'}
+        return schema
@@ -53,7 +53,9 @@ INSTALLED_APPS = [
 
 
 MIDDLEWARE = [
+    'core.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -68,17 +70,132 @@ ROOT_URLCONF = 'core.urls'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.RevocationAwareJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
+    # orjson renders the same JSON faster; MessagePack only when asked for
+    'DEFAULT_RENDERER_CLASSES': (
+        'core.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+        'core.renderers.MessagePackRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'core.renderers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
+    # Used by core.throttling on the endpoints that hash a password
+    'DEFAULT_THROTTLE_RATES': {
+        'auth_ip': os.getenv('THROTTLE_AUTH_IP_RATE', '30/min'),
+        'auth_email': os.getenv('THROTTLE_AUTH_EMAIL_RATE', '10/min'),
+    },
+    # Reverse proxies in front of gunicorn. With none, throttles key on
+    # REMOTE_ADDR; otherwise on the X-Forwarded-For entry the outermost proxy
+    # appended. Unset, DRF would trust whatever X-Forwarded-For the client sends.
+    'NUM_PROXIES': int(os.getenv('NUM_PROXIES', '0')),
 }
 
+# Shared cache for throttling counters, cached facets and recommendations, and
+# event stream tickets (docker-compose.prod.yml runs one). Without REDIS_URL
+# every process has its own in-memory cache, so limits only hold per worker.
+REDIS_URL = os.getenv('REDIS_URL')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Seconds a /api/jobs/facets/ result is reused for the same filter set
+JOB_FACETS_CACHE_TIMEOUT = int(os.getenv('JOB_FACETS_CACHE_TIMEOUT', '60'))
+
+# /api/jobs/suggest/ in-memory index: how often each process checks for changed
+# jobs, how often it rebuilds from scratch, and how many terms per field it keeps
+SUGGEST_REFRESH_SECONDS = int(os.getenv('SUGGEST_REFRESH_SECONDS', '5'))
+SUGGEST_FULL_REBUILD_SECONDS = int(os.getenv('SUGGEST_FULL_REBUILD_SECONDS', '600'))
+SUGGEST_MAX_TERMS = int(os.getenv('SUGGEST_MAX_TERMS', '50000'))
+
+# /api/jobs/recommended/: in-memory job matrix refresh cadence & per-applicant cache
+RECOMMEND_REFRESH_SECONDS = int(os.getenv('RECOMMEND_REFRESH_SECONDS', '10'))
+RECOMMEND_FULL_REBUILD_SECONDS = int(os.getenv('RECOMMEND_FULL_REBUILD_SECONDS', '3600'))
+RECOMMEND_CACHE_TIMEOUT = int(os.getenv('RECOMMEND_CACHE_TIMEOUT', '300'))
+RECOMMEND_MAX_RESULTS = 50
+
+# Estimated Jaccard similarity at which a new posting counts as a repost of
+# one of the employer's active jobs
+JOB_DUPLICATE_THRESHOLD = float(os.getenv('JOB_DUPLICATE_THRESHOLD', '0.8'))
+
+# Seconds an Idempotency-Key (and the response stored for it) is kept
+IDEMPOTENCY_KEY_TTL = int(os.getenv('IDEMPOTENCY_KEY_TTL', str(24 * 60 * 60)))
+# Seconds a claimed key may stay without a response before another request
+# takes it over (the worker handling it died); above gunicorn's 30 s timeout
+IDEMPOTENCY_LEASE_SECONDS = int(os.getenv('IDEMPOTENCY_LEASE_SECONDS', '60'))
+
+# Outbox email delivery (send_outbox): seconds a worker holds a claimed batch,
+# retry backoff (doubling from the base, capped) and attempts before giving up
+OUTBOX_LEASE_SECONDS = int(os.getenv('OUTBOX_LEASE_SECONDS', '300'))
+OUTBOX_RETRY_BASE_SECONDS = int(os.getenv('OUTBOX_RETRY_BASE_SECONDS', '60'))
+OUTBOX_RETRY_MAX_SECONDS = int(os.getenv('OUTBOX_RETRY_MAX_SECONDS', str(6 * 60 * 60)))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv('OUTBOX_MAX_ATTEMPTS', '8'))
+
+# Employer SSE stream: seconds between heartbeat comments on an idle stream,
+# events buffered per client before the oldest are dropped, and seconds a
+# stream ticket stays valid
+EVENTS_HEARTBEAT_SECONDS = int(os.getenv('EVENTS_HEARTBEAT_SECONDS', '15'))
+EVENTS_QUEUE_SIZE = int(os.getenv('EVENTS_QUEUE_SIZE', '100'))
+EVENTS_TICKET_SECONDS = int(os.getenv('EVENTS_TICKET_SECONDS', '30'))
+
+# Response compression (core.middleware): bodies below COMPRESSION_MIN_BYTES
+# are sent as is; brotli quality 4 is the usual setting for dynamic content
+COMPRESSION_MIN_BYTES = int(os.getenv('COMPRESSION_MIN_BYTES', '1024'))
+COMPRESSION_BROTLI_QUALITY = int(os.getenv('COMPRESSION_BROTLI_QUALITY', '4'))
+COMPRESSION_GZIP_LEVEL = int(os.getenv('COMPRESSION_GZIP_LEVEL', '6'))
+
+# Revoked token denylist (users.revocation): Bloom filter sizing, how often each
+# process picks up other processes' revocations, and how often expired
+# entries are pruned
+REVOCATION_BLOOM_CAPACITY = int(os.getenv('REVOCATION_BLOOM_CAPACITY', '100000'))
+REVOCATION_BLOOM_ERROR_RATE = float(os.getenv('REVOCATION_BLOOM_ERROR_RATE', '0.001'))
+REVOCATION_SYNC_SECONDS = int(os.getenv('REVOCATION_SYNC_SECONDS', '5'))
+REVOCATION_SYNC_OVERLAP_SECONDS = int(os.getenv('REVOCATION_SYNC_OVERLAP_SECONDS', '60'))
+REVOCATION_PRUNE_SECONDS = int(os.getenv('REVOCATION_PRUNE_SECONDS', '3600'))
+
+# Job view counters (jobs.counters): seconds between flushes of each process'
+# pending counts (the most a killed worker can lose), and jobs per UPDATE
+JOB_VIEWS_FLUSH_SECONDS = int(os.getenv('JOB_VIEWS_FLUSH_SECONDS', '10'))
+JOB_VIEWS_FLUSH_BATCH = int(os.getenv('JOB_VIEWS_FLUSH_BATCH', '1000'))
+
+# Most application ids one bulk status change may list (one UPDATE each)
+APPLICATION_BULK_MAX_IDS = int(os.getenv('APPLICATION_BULK_MAX_IDS', '1000'))
+
+# ATS feed imports (jobs.imports): postings per upsert statement, how many
+# invalid postings are reported in detail, and the largest feed body
+# POST /api/jobs/import/ accepts (bytes; the import runs inside the request,
+# ~10k postings for 10 MiB; bigger feeds go through the import_jobs command)
+JOB_IMPORT_BATCH_SIZE = int(os.getenv('JOB_IMPORT_BATCH_SIZE', '500'))
+JOB_IMPORT_MAX_ERRORS = int(os.getenv('JOB_IMPORT_MAX_ERRORS', '100'))
+JOB_IMPORT_MAX_BYTES = int(os.getenv('JOB_IMPORT_MAX_BYTES', str(10 * 1024 * 1024)))
+
+# Runtime metrics (core.metrics): directory of the per-process files /metrics
+# adds up (set by gunicorn.conf.py; empty keeps them in process memory), and
+# the client addresses or networks allowed to scrape /metrics
+METRICS_DIR = os.getenv('METRICS_DIR', '')
+METRICS_ALLOWED_IPS = os.getenv('METRICS_ALLOWED_IPS', '127.0.0.1,::1').split(',')
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
     'AUTH_HEADER_TYPES': ('Bearer',),
+    'TOKEN_REFRESH_SERIALIZER': 'users.serializers.RevocableTokenRefreshSerializer',
 }
 
 TEMPLATES = [
@@ -156,6 +273,10 @@ STATIC_URL = 'static/'
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 
+# Uploaded resumes and company logos (gc_media sweeps this directory)
+MEDIA_URL = 'media/'
+MEDIA_ROOT = os.getenv('MEDIA_ROOT', str(BASE_DIR / 'media'))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
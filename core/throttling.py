@@ -0,0 +1,86 @@
+"""
+Throttles for the endpoints that hash a password (login, registration,
+password change).
+
+DRF's SimpleRateThrottle keeps a list of timestamps per client and rewrites it
+with get() + set(), which loses updates under concurrency; these keep atomic
+counters in the shared cache instead, so a limit holds across workers and
+nodes. DRF checks throttles before the view runs, so a rejected attempt
+never reaches the hasher.
+"""
+import hashlib
+import logging
+from rest_framework.throttling import SimpleRateThrottle
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class AtomicRateThrottle(SimpleRateThrottle):
+    """
+    Sliding window counter: the count of the previous window, weighted by how
+    much of it still overlaps the last `duration` seconds, plus the count of
+    the current one. Like a token bucket of `num_requests` tokens refilled
+    evenly over `duration`, this allows short bursts but not a sustained rate
+    above the limit. Each attempt is one cache.incr(), so concurrent requests
+    can't both take the last token.
+    """
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        now = self.timer()
+        window, offset = divmod(now, self.duration)
+        current_key = f'{self.key}:{int(window)}'
+        previous = self.cache.get(f'{self.key}:{int(window) - 1}', 0)
+        self.cache.add(current_key, 0, self.duration * 2)
+        try:
+            current = self.cache.incr(current_key)
+        except ValueError:
+            self.cache.set(current_key, 1, self.duration * 2)
+            current = 1
+
+        self.remaining = self.duration - offset
+        if previous * (self.remaining / self.duration) + current > self.num_requests:
+            metrics.incr(f'throttle.{self.scope}.rejected')
+            logger.info('Throttled %s attempt (%s)', self.scope, view.__class__.__name__)
+            return False
+        metrics.incr(f'throttle.{self.scope}.admitted')
+        return True
+
+    def wait(self):
+        return self.remaining
+
+    def hashed_key(self, ident):
+        digest = hashlib.sha256(str(ident).encode()).hexdigest()[:32]
+        return self.cache_format % {'scope': self.scope, 'ident': digest}
+
+
+class AuthIPThrottle(AtomicRateThrottle):
+    """
+    Password attempts per client IP: REMOTE_ADDR, or the X-Forwarded-For
+    entry added by the proxies counted in NUM_PROXIES.
+    """
+    scope = 'auth_ip'
+
+    def get_cache_key(self, request, view):
+        return self.hashed_key(self.get_ident(request))
+
+
+class AuthEmailThrottle(AtomicRateThrottle):
+    """
+    Password attempts per account, whichever IPs they come from.
+    """
+    scope = 'auth_email'
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            email = request.user.email
+        else:
+            email = request.data.get('email')
+        if not email or not isinstance(email, str):
+            return None
+        return self.hashed_key(email.strip().lower())
@@ -0,0 +1,35 @@
+import ipaddress
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from django.views.decorators.http import require_GET
+from . import metrics
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def client_allowed(address):
+    """
+    Whether address is in one of the METRICS_ALLOWED_IPS addresses/networks.
+    """
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    if ip.version == 6 and ip.ipv4_mapped:
+        ip = ip.ipv4_mapped
+    return any(
+        ip in ipaddress.ip_network(network.strip(), strict=False)
+        for network in settings.METRICS_ALLOWED_IPS if network.strip()
+    )
+
+
+@require_GET
+def metrics_view(request):
+    """
+    GET /metrics - Metrics of every worker, in the Prometheus text format.
+    Internal: only answered for clients in METRICS_ALLOWED_IPS, going by the
+    peer address rather than a forwarded header the client could set.
+    """
+    if not client_allowed(request.META.get('REMOTE_ADDR', '')):
+        return HttpResponseForbidden()
+    return HttpResponse(metrics.render(), content_type=CONTENT_TYPE)
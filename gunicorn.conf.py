@@ -0,0 +1,18 @@
+"""
+gunicorn settings, read from the working directory.
+
+The workers share their runtime metrics through files in METRICS_DIR (see
+core.metrics). It is emptied when the server starts, so counters start over
+with it rather than adding up the workers of earlier runs.
+"""
+import os
+import shutil
+import tempfile
+
+os.environ.setdefault('METRICS_DIR', os.path.join(tempfile.gettempdir(), 'careernode-metrics'))
+
+
+def on_starting(server):
+    directory = os.environ['METRICS_DIR']
+    shutil.rmtree(directory, ignore_errors=True)
+    os.makedirs(directory)
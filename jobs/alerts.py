@@ -0,0 +1,200 @@
+"""
+Job alerts: new jobs are matched against the applicants' saved searches
+percolator style, the job being run against the stored queries.
+
+Each SavedSearch is indexed under one anchor term, the criterion the fewest
+active jobs have when it's saved: one of its title or location keywords,
+its category, its job type, its salary band, or the conjunction of job type
+and salary band. A job has a term for each criterion it could satisfy, so
+only the searches anchored on one of them (one indexed IN lookup, shared by
+a batch of imported jobs) can match and are checked in full. A job type
+anchor (`type:XX`) is picked like any other when it's the rarest criterion,
+so those searches are checked in full too; only the searches without any
+criterion, anchored on `*`, match every job they are loaded for.
+
+Salaries are indexed by band (SALARY_BANDS): a job has the term of every
+band up to its salary, a search the one its minimum falls in, so only the
+searches of the job's own band can be loaded and fail the full check.
+Matching runs on a small thread pool once the job is committed; a match
+queues a job_alert email in the outbox, which sends one digest per
+recipient.
+
+This misses the 100 ms per job target at the high end: with 1M generated
+searches over 50k jobs (bench_alerts), the median job is matched in ~11 ms
+but the p95 takes ~145 ms. Those jobs load ~35k searches, a third of them
+true matches, and reading the rows is most of the time; as matching is off
+the request path, it delays alerts, not responses.
+"""
+import bisect
+import logging
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from django.contrib.auth import get_user_model
+from django.db import close_old_connections, transaction
+from django.db.models import Q
+from core import outbox
+from .models import Job, SavedSearch
+from .recommendations import TOKEN_RE
+
+logger = logging.getLogger(__name__)
+
+MATCH_ALL = '*'
+WORKERS = 2
+CANDIDATE_COLUMNS = ('id', 'user_id', 'category_id', 'job_type', 'location', 'keywords', 'salary_min')
+
+SALARY_BANDS = (0, 20000, 30000, 40000, 50000, 60000, 70000, 80000, 90000, 100000, 120000, 150000, 200000, 300000)
+# Counting the jobs a term would load stops here: past it, a term is common
+# whatever its exact count
+FREQUENCY_CAP = 10000
+
+
+def tokens(text):
+    return set(TOKEN_RE.findall((text or '').lower()))
+
+
+def salary_band(salary):
+    return SALARY_BANDS[bisect.bisect_right(SALARY_BANDS, salary) - 1]
+
+
+def search_terms(keywords='', location='', category_id=None, job_type='', salary_min=None):
+    """
+    (term, condition on Job) for each criterion of a saved search: the
+    active jobs meeting the condition are the ones that load a search
+    anchored on the term.
+    """
+    terms = [(f'kw:{word}', Q(title__icontains=word)) for word in sorted(tokens(keywords))]
+    terms += [(f'loc:{word}', Q(location__icontains=word)) for word in sorted(tokens(location))]
+    if category_id:
+        terms.append((f'cat:{category_id}', Q(category_id=category_id)))
+    if job_type:
+        terms.append((f'type:{job_type}', Q(job_type=job_type)))
+    if salary_min is not None:
+        band = salary_band(salary_min)
+        terms.append((f'sal:{band}', Q(salary__gte=band)))
+        if job_type:
+            terms.append((f'{job_type}:sal:{band}', Q(job_type=job_type, salary__gte=band)))
+    return terms
+
+
+def term_frequency(condition):
+    """
+    Active jobs meeting condition, counted up to FREQUENCY_CAP.
+    """
+    return Job.objects.filter(condition, is_active=True)[:FREQUENCY_CAP].count()
+
+
+def anchor_for(keywords='', location='', category_id=None, job_type='', salary_min=None, frequency=term_frequency):
+    """
+    The term a saved search with these criteria is indexed under: the one
+    the fewest active jobs have, counted by frequency(condition).
+    """
+    terms = search_terms(keywords, location, category_id, job_type, salary_min)
+    if not terms:
+        return MATCH_ALL
+    return min(terms, key=lambda item: (frequency(item[1]), -len(item[0]), item[0]))[0]
+
+
+def job_terms(job, title, location):
+    terms = {
+        MATCH_ALL, f'type:{job.job_type}',
+        *(f'kw:{word}' for word in title), *(f'loc:{word}' for word in location),
+    }
+    if job.category_id:
+        terms.add(f'cat:{job.category_id}')
+    if job.salary is not None:
+        for band in SALARY_BANDS[:bisect.bisect_right(SALARY_BANDS, job.salary)]:
+            terms.update((f'sal:{band}', f'{job.job_type}:sal:{band}'))
+    return terms
+
+
+def match_jobs(jobs):
+    """
+    Yields (job, saved search id, user id) for every saved search one of the
+    jobs matches, with a single candidate query for all of them.
+    """
+    by_term = defaultdict(list)
+    for job in jobs:
+        title, location = tokens(job.title), tokens(job.location)
+        # The fields the checks below read, out of the model instance once
+        fields = (job, job.employer_id, job.category_id, job.job_type, job.salary, title, location)
+        for term in job_terms(job, title, location):
+            by_term[term].append(fields)
+    if not by_term:
+        return
+
+    # Searches repeat the same keywords & locations: each is tokenized once
+    tokenized = {}
+    candidates = SavedSearch.objects.filter(anchor__in=list(by_term)).values_list('anchor', *CANDIDATE_COLUMNS)
+    for anchor, pk, user_id, category_id, job_type, search_location, keywords, salary_min in candidates.iterator(chunk_size=5000):
+        required_title = tokenized.get(keywords)
+        if required_title is None:
+            required_title = tokenized[keywords] = tokens(keywords)
+        required_location = tokenized.get(search_location)
+        if required_location is None:
+            required_location = tokenized[search_location] = tokens(search_location)
+        for job, employer_id, job_category_id, job_job_type, salary, title, location in by_term[anchor]:
+            if user_id == employer_id:
+                continue
+            if category_id and category_id != job_category_id:
+                continue
+            if job_type and job_type != job_job_type:
+                continue
+            if salary_min is not None and (salary is None or salary < salary_min):
+                continue
+            if required_title <= title and required_location <= location:
+                yield job, pk, user_id
+
+
+def queue_alerts(*jobs):
+    """
+    Queues one job_alert message per job and user with a matching saved
+    search, in one INSERT.
+    """
+    recipients = defaultdict(set)
+    for job, _, user_id in match_jobs(jobs):
+        recipients[job].add(user_id)
+    if not recipients:
+        return 0
+    emails = dict(
+        get_user_model().objects
+        .filter(pk__in=set().union(*recipients.values()), is_active=True)
+        .values_list('pk', 'email')
+    )
+    messages = outbox.enqueue_many(
+        (
+            'job_alert',
+            emails[user_id],
+            f'New job: {job.title}',
+            f'"{job.title}" ({job.location}) matches one of your saved searches.\n'
+            f'See the job in your CareerNode dashboard.',
+        )
+        for job, user_ids in recipients.items()
+        for user_id in user_ids if user_id in emails
+    )
+    return len(messages)
+
+
+executor = ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix='job-alerts')
+
+
+def percolate_jobs(job_ids):
+    # Pool threads keep their own connection between jobs
+    close_old_connections()
+    try:
+        return queue_alerts(*Job.objects.filter(pk__in=job_ids, is_active=True))
+    except Exception:
+        logger.exception('Could not match jobs %s against saved searches', job_ids)
+        return 0
+
+
+def percolate_job(job_id):
+    return percolate_jobs([job_id])
+
+
+def percolate_on_commit(job):
+    """
+    Matches the job in the background once the creating transaction has
+    committed. Jobs pending in the pool when the process dies get no alerts.
+    """
+    job_id = job.pk
+    transaction.on_commit(lambda: executor.submit(percolate_job, job_id))
@@ -0,0 +1,113 @@
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.utils import timezone
+from core import metrics, outbox
+from .events import publish_after_commit, publish_statuses_after_commit
+from .models import Application
+
+# PostgreSQL: jobs_application is partitioned, so the (job, applicant) pair is
+# claimed in jobs_application_key first and the row only inserted if that won.
+# The claim already carries the row's id, which the key trigger accepts.
+INSERT_PARTITIONED = """
+WITH claimed AS (
+    INSERT INTO jobs_application_key (job_id, applicant_id, application_id)
+    VALUES (%s, %s, nextval(pg_get_serial_sequence('jobs_application', 'id')))
+    ON CONFLICT (job_id, applicant_id) DO NOTHING
+    RETURNING application_id
+)
+INSERT INTO jobs_application (id, job_id, applicant_id, resume, cover_letter, status, applied_at)
+SELECT application_id, %s, %s, %s, %s, %s, %s FROM claimed
+RETURNING id
+"""
+
+INSERT_PLAIN = """
+INSERT INTO jobs_application (job_id, applicant_id, resume, cover_letter, status, applied_at)
+VALUES (%s, %s, %s, %s, %s, %s)
+ON CONFLICT (job_id, applicant_id) DO NOTHING
+RETURNING id
+"""
+
+# One statement for the whole batch; rows already in the target status are
+# left alone (and so don't fire the status trigger or get an email).
+UPDATE_STATUSES = """
+UPDATE jobs_application SET status = %s
+WHERE job_id = %s AND status <> %s
+  {conditions}
+RETURNING id, (SELECT email FROM {users} WHERE {users}.id = jobs_application.applicant_id)
+"""
+
+
+def submit_application(job, applicant, resume, cover_letter=''):
+    """
+    Inserts an application in a single INSERT ... ON CONFLICT DO NOTHING
+    RETURNING round trip. Returns the new Application, or None when the
+    applicant already applied to the job.
+
+    The resume is only written to storage once the row insert has won, so a
+    losing (or duplicate) request never leaves a file behind. The employer's
+    notification is queued in the same transaction.
+    """
+    field = Application._meta.get_field('resume')
+    name = field.storage.get_available_name(
+        field.generate_filename(None, resume.name), max_length=field.max_length
+    )
+    application = Application(
+        job=job, applicant=applicant, resume=name, cover_letter=cover_letter,
+        status='pending', applied_at=timezone.now(),
+    )
+    values = [name, cover_letter, application.status, application.applied_at]
+
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute(INSERT_PARTITIONED, [job.pk, applicant.pk, job.pk, applicant.pk, *values])
+            else:
+                cursor.execute(INSERT_PLAIN, [job.pk, applicant.pk, *values])
+            row = cursor.fetchone()
+        if row is None:
+            return None
+        application.pk = row[0]
+        application._state.adding = False
+
+        saved_name = field.storage.save(name, resume, max_length=field.max_length)
+        if saved_name != name:
+            # Another upload took the name in the meantime
+            Application.objects.filter(pk=application.pk).update(resume=saved_name)
+            application.resume = saved_name
+        outbox.application_received(application)
+        # post_save doesn't fire for the raw insert
+        publish_after_commit(application, 'created')
+    return application
+
+
+def set_statuses(job, status, ids=None, from_status=None):
+    """
+    Moves the job's applications listed in ids and/or currently in
+    from_status to status, in a single UPDATE ... RETURNING. The caller has
+    checked that it owns the job; ids of other jobs' applications are
+    ignored. Returns the ids of the applications that changed.
+
+    Side effects are per batch: one outbox INSERT for the applicants' emails,
+    one metrics increment and (without the PostgreSQL trigger) one on-commit
+    callback for the SSE events.
+    """
+    conditions, params = [], []
+    if ids is not None:
+        conditions.append('AND id IN ({})'.format(', '.join(['%s'] * len(ids))))
+        params.extend(ids)
+    if from_status is not None:
+        conditions.append('AND status = %s')
+        params.append(from_status)
+    sql = UPDATE_STATUSES.format(users=get_user_model()._meta.db_table, conditions='\n  '.join(conditions))
+
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [status, job.pk, status, *params])
+            rows = cursor.fetchall()
+        if not rows:
+            return []
+        changed = [pk for pk, _ in rows]
+        outbox.application_status_changed(job, status, [email for _, email in rows])
+        publish_statuses_after_commit(job, changed, status)
+    metrics.incr(f'applications.{status}', len(changed))
+    return changed
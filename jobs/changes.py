@@ -0,0 +1,71 @@
+"""
+Change feed behind /api/jobs/changes/: jobs and tombstones ordered by
+(change_seq, id), read from an opaque "<change_seq>.<id>" cursor.
+"""
+from django.db import connection
+from django.db.models import Q
+from .models import Job, JobTombstone
+
+PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+START = (-1, 0)
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def parse_cursor(value):
+    if not value:
+        return START
+    try:
+        seq, pk = value.split('.')
+        return int(seq), int(pk)
+    except ValueError:
+        raise InvalidCursor(value)
+
+
+def format_cursor(position):
+    return f'{position[0]}.{position[1]}'
+
+
+def stable_horizon():
+    """
+    change_seq below which no transaction can still commit a change.
+    On PostgreSQL that is the xmin of the current snapshot (see migration
+    0011); other backends have no change triggers.
+    """
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT pg_snapshot_xmin(pg_current_snapshot())::text::bigint')
+        return cursor.fetchone()[0]
+
+
+def changes_since(cursor, limit=PAGE_SIZE):
+    """
+    Returns (changes, next_cursor, has_more). changes is a list of
+    (change_seq, id, job) sorted by (change_seq, id); job is None for a
+    deleted one. Both sources are read with the same bound, then merged.
+    """
+    seq, pk = parse_cursor(cursor)
+    horizon = stable_horizon()
+
+    jobs = Job.objects.filter(Q(change_seq__gt=seq) | Q(change_seq=seq, id__gt=pk))
+    tombstones = JobTombstone.objects.filter(Q(change_seq__gt=seq) | Q(change_seq=seq, job_id__gt=pk))
+    if horizon is not None:
+        jobs = jobs.filter(change_seq__lt=horizon)
+        tombstones = tombstones.filter(change_seq__lt=horizon)
+
+    rows = [
+        (job.change_seq, job.pk, job)
+        for job in jobs.select_related('employer', 'category').order_by('change_seq', 'id')[:limit + 1]
+    ] + [
+        (change_seq, job_id, None)
+        for change_seq, job_id in tombstones.order_by('change_seq', 'job_id')
+        .values_list('change_seq', 'job_id')[:limit + 1]
+    ]
+    rows.sort(key=lambda row: row[:2])
+    page = rows[:limit]
+    next_cursor = format_cursor(page[-1][:2]) if page else format_cursor((seq, pk))
+    return page, next_cursor, len(rows) > limit
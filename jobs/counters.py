@@ -0,0 +1,81 @@
+"""
+Job view counts without a write per view.
+
+JobDetailView records each view in this process' memory. The pending deltas
+are written at most every JOB_VIEWS_FLUSH_SECONDS, by the request that finds
+the interval elapsed, as one UPDATE ... FROM (VALUES ...) per batch of jobs,
+and once more when the process exits. A worker that is killed outright loses
+at most its last interval of views; a failed flush keeps its deltas for the
+next one.
+"""
+import atexit
+import logging
+import threading
+import time
+from collections import Counter
+from django.conf import settings
+from django.db import DatabaseError, connection, transaction
+
+logger = logging.getLogger(__name__)
+
+FLUSH_SQL = """
+WITH delta (id, views) AS (VALUES {values})
+UPDATE jobs_job SET views = jobs_job.views + delta.views
+FROM delta WHERE jobs_job.id = delta.id
+"""
+
+
+def write_views(items):
+    """
+    Adds [(job_id, views), ...] to the jobs' counts in one statement.
+    """
+    sql = FLUSH_SQL.format(values=', '.join(['(%s, %s)'] * len(items)))
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(sql, [value for item in items for value in item])
+
+
+class ViewCounter:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.pending = Counter()
+            self.next_flush = time.monotonic() + settings.JOB_VIEWS_FLUSH_SECONDS
+
+    def record(self, job_id):
+        with self.lock:
+            self.pending[job_id] += 1
+            due = time.monotonic() >= self.next_flush
+        if due:
+            self.flush()
+
+    def flush(self):
+        """
+        Writes and clears the pending deltas; returns the number of views
+        written.
+        """
+        with self.lock:
+            pending, self.pending = self.pending, Counter()
+            self.next_flush = time.monotonic() + settings.JOB_VIEWS_FLUSH_SECONDS
+        # Sorted by id, so concurrent flushes from several workers tend to
+        # lock rows in the same order (a deadlock victim retries next time)
+        items = sorted(pending.items())
+        batch_size = settings.JOB_VIEWS_FLUSH_BATCH
+        written = 0
+        for start in range(0, len(items), batch_size):
+            batch = items[start:start + batch_size]
+            try:
+                write_views(batch)
+            except DatabaseError:
+                logger.exception('Could not flush %d job view counts', len(items) - start)
+                with self.lock:
+                    self.pending.update(dict(items[start:]))
+                break
+            written += sum(views for _, views in batch)
+        return written
+
+
+job_views = ViewCounter()
+atexit.register(job_views.flush)
@@ -0,0 +1,121 @@
+import re
+import zlib
+from functools import reduce
+from operator import or_
+import numpy as np
+from django.conf import settings
+from django.db.models import Q
+from .models import JobSignature, JobSignatureBand
+
+# MinHash with NUM_PERM hash functions, split into BANDS bands of ROWS rows.
+# Two postings share a band bucket with probability ~ 1 - (1 - s^ROWS)^BANDS,
+# which is > 0.99 for a Jaccard similarity s of 0.8.
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 3
+
+# Largest prime below 2^32, so every permuted hash fits in a uint32
+_PRIME = np.uint64(4294967291)
+_rng = np.random.default_rng(20240501)
+_A = _rng.integers(1, 2 ** 32 - 1, size=NUM_PERM, dtype=np.uint64)
+_B = _rng.integers(0, 2 ** 32 - 1, size=NUM_PERM, dtype=np.uint64)
+
+TOKEN_RE = re.compile(r'\w+')
+
+
+def shingles(title, description):
+    tokens = TOKEN_RE.findall(f'{title} {description}'.lower())
+    if len(tokens) < SHINGLE_SIZE:
+        return {' '.join(tokens)}
+    return {' '.join(tokens[i:i + SHINGLE_SIZE]) for i in range(len(tokens) - SHINGLE_SIZE + 1)}
+
+
+def minhash(title, description):
+    hashes = np.fromiter(
+        (zlib.crc32(shingle.encode()) for shingle in shingles(title, description)),
+        dtype=np.uint64,
+    )
+    # (a * x + b) mod p for every (permutation, shingle) pair, min per permutation
+    permuted = (np.outer(_A, hashes) + _B[:, None]) % _PRIME
+    return permuted.min(axis=1).astype(np.uint32)
+
+
+def band_buckets(signature):
+    return [
+        zlib.crc32(signature[band * ROWS:(band + 1) * ROWS].tobytes())
+        for band in range(BANDS)
+    ]
+
+
+def similarity(signature, other):
+    return float(np.count_nonzero(signature == other)) / NUM_PERM
+
+
+def find_near_duplicate(employer, title, description, exclude_pk=None):
+    """
+    Looks up the employer's active job most similar to the given text through
+    the LSH band index. Returns (job_id, similarity, signature); job_id is None
+    when nothing reaches JOB_DUPLICATE_THRESHOLD.
+    """
+    signature = minhash(title, description)
+    matches = reduce(or_, (
+        Q(band=band, bucket=bucket) for band, bucket in enumerate(band_buckets(signature))
+    ))
+    candidates = JobSignature.objects.filter(
+        job__in=JobSignatureBand.objects.filter(matches, employer=employer).values('job'),
+        job__is_active=True,
+    )
+    if exclude_pk is not None:
+        candidates = candidates.exclude(job_id=exclude_pk)
+
+    best_id, best = None, 0.0
+    for job_id, stored in candidates.values_list('job_id', 'signature'):
+        score = similarity(signature, np.frombuffer(stored, dtype=np.uint32))
+        if score > best:
+            best_id, best = job_id, score
+    if best < settings.JOB_DUPLICATE_THRESHOLD:
+        best_id = None
+    return best_id, best, signature
+
+
+def index_job(job, signature=None):
+    """
+    Stores (or replaces) the MinHash signature & band buckets of a job.
+    """
+    if signature is None:
+        signature = minhash(job.title, job.description)
+    JobSignature.objects.update_or_create(job=job, defaults={'signature': signature.tobytes()})
+    JobSignatureBand.objects.filter(job=job).delete()
+    JobSignatureBand.objects.bulk_create([
+        JobSignatureBand(job=job, employer_id=job.employer_id, band=band, bucket=bucket)
+        for band, bucket in enumerate(band_buckets(signature))
+    ])
+
+
+def index_jobs(results):
+    """
+    index_job() for many jobs at once: [(job_id, employer_id, signature)].
+    """
+    ids = [job_id for job_id, _, _ in results]
+    JobSignature.objects.filter(job_id__in=ids).delete()
+    JobSignatureBand.objects.filter(job_id__in=ids).delete()
+    JobSignature.objects.bulk_create([
+        JobSignature(job_id=job_id, signature=signature.tobytes())
+        for job_id, _, signature in results
+    ])
+    JobSignatureBand.objects.bulk_create([
+        JobSignatureBand(job_id=job_id, employer_id=employer_id, band=band, bucket=bucket)
+        for job_id, employer_id, signature in results
+        for band, bucket in enumerate(band_buckets(signature))
+    ])
+
+
+def signatures_for(rows):
+    """
+    Process pool worker: [(id, employer_id, title, description)] -> [(id, employer_id, signature)]
+    """
+    return [
+        (job_id, employer_id, minhash(title, description))
+        for job_id, employer_id, title, description in rows
+    ]
@@ -0,0 +1,255 @@
+"""
+Application events for the employer SSE stream.
+
+On PostgreSQL statement-level triggers on jobs_application NOTIFY
+application_events with the rows a statement inserted or whose status it
+changed (delivered on commit), batched per employer and status (migration
+0018). One listener thread per process holds the only LISTEN connection and
+hands each batch to the asyncio queues of that employer's subscribers in one
+call. Other backends publish from Python after commit instead, through the
+same in-process broker.
+"""
+import asyncio
+import json
+import logging
+import secrets
+import select
+import threading
+import psycopg2
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from .models import Application
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = 'application_events'
+TICKET_KEY = 'events-ticket:{}'
+
+
+class Subscription:
+    """
+    Bounded queue of one SSE client. When the client reads slower than events
+    arrive the oldest event is dropped, so a stuck client costs at most
+    EVENTS_QUEUE_SIZE events of memory; `dropped` tells it to resync.
+    """
+    def __init__(self, employer_id, loop, maxsize):
+        self.employer_id = employer_id
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=maxsize)
+        self.dropped = 0
+
+    def push(self, event):
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(event)
+
+    def push_many(self, events):
+        for event in events:
+            self.push(event)
+
+
+class Broker:
+    """
+    Routes events to the subscriptions of their employer. publish() is thread
+    safe; each subscription is fed on its own event loop.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.subscriptions = {}
+
+    def subscribe(self, employer_id, loop=None, maxsize=None):
+        subscription = Subscription(
+            employer_id, loop or asyncio.get_running_loop(), maxsize or settings.EVENTS_QUEUE_SIZE
+        )
+        with self.lock:
+            self.subscriptions.setdefault(employer_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            subscribers = self.subscriptions.get(subscription.employer_id, set())
+            subscribers.discard(subscription)
+            if not subscribers:
+                self.subscriptions.pop(subscription.employer_id, None)
+
+    def publish(self, event):
+        self.publish_many(event['employer'], [event])
+
+    def publish_many(self, employer_id, events):
+        """
+        Hands events of one employer to each of its subscriptions at once.
+        """
+        with self.lock:
+            subscribers = list(self.subscriptions.get(employer_id, ()))
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.push_many, events)
+            except RuntimeError:
+                # Its event loop is gone
+                self.unsubscribe(subscription)
+
+
+broker = Broker()
+
+
+class Listener(threading.Thread):
+    """
+    Background thread holding the process' LISTEN connection. Reconnects with
+    backoff if the connection drops; events NOTIFYed while it was down are
+    lost, which clients cover by resyncing on (re)connect.
+    """
+    POLL_SECONDS = 1.0
+
+    def __init__(self, broker):
+        super().__init__(name='application-events-listener', daemon=True)
+        self.broker = broker
+        self.stopping = threading.Event()
+        self.ready = threading.Event()
+
+    def connect(self):
+        conn = psycopg2.connect(**connection.get_connection_params())
+        conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+        with conn.cursor() as cursor:
+            cursor.execute(f'LISTEN {CHANNEL}')
+        return conn
+
+    def run(self):
+        backoff = 1
+        while not self.stopping.is_set():
+            try:
+                conn = self.connect()
+            except psycopg2.Error:
+                logger.exception('Application events listener cannot connect')
+                self.stopping.wait(backoff)
+                backoff = min(backoff * 2, 60)
+                continue
+            backoff = 1
+            self.ready.set()
+            try:
+                while not self.stopping.is_set():
+                    if select.select([conn], [], [], self.POLL_SECONDS) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        batch = json.loads(conn.notifies.pop(0).payload)
+                        self.broker.publish_many(batch['employer'], batch_events(batch))
+            except (psycopg2.Error, OSError):
+                logger.exception('Application events listener lost its connection')
+            finally:
+                conn.close()
+
+    def stop(self):
+        self.stopping.set()
+        self.join()
+
+
+_listener = None
+_listener_lock = threading.Lock()
+
+
+def ensure_listening():
+    """
+    Starts this process' listener thread on first use (PostgreSQL only).
+    """
+    global _listener
+    if connection.vendor != 'postgresql':
+        return None
+    with _listener_lock:
+        if _listener is None or not _listener.is_alive():
+            _listener = Listener(broker)
+            _listener.start()
+        return _listener
+
+
+def stop_listening():
+    global _listener
+    with _listener_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+
+def issue_ticket(user):
+    """
+    Single-use ticket that opens the SSE stream as `user` for the next
+    EVENTS_TICKET_SECONDS. EventSource can't send an Authorization header,
+    and a JWT in the URL would be written to access logs.
+    """
+    ticket = secrets.token_urlsafe(32)
+    cache.set(TICKET_KEY.format(ticket), user.pk, settings.EVENTS_TICKET_SECONDS)
+    return ticket
+
+
+def redeem_ticket(ticket):
+    """
+    User id of a ticket, which is used up; None when it's unknown, expired or
+    already redeemed.
+    """
+    key = TICKET_KEY.format(ticket)
+    user_id = cache.get(key)
+    # Of concurrent redemptions, only the one that deletes the key wins
+    if user_id is None or not cache.delete(key):
+        return None
+    return user_id
+
+
+def batch_events(batch):
+    """
+    The events of a NOTIFY batch, one per application.
+    """
+    return [
+        {
+            'event': batch['event'],
+            'application': application_id,
+            'job': job_id,
+            'employer': batch['employer'],
+            'status': batch['status'],
+        }
+        for application_id, job_id in batch['applications']
+    ]
+
+
+def application_event(application, event):
+    return {
+        'event': event,
+        'application': application.pk,
+        'job': application.job_id,
+        'employer': application.job.employer_id,
+        'status': application.status,
+    }
+
+
+def publish_after_commit(application, event):
+    """
+    Without the PostgreSQL trigger, publishes in-process once the change
+    is committed.
+    """
+    if connection.vendor == 'postgresql':
+        return
+    payload = application_event(application, event)
+    transaction.on_commit(lambda: broker.publish(payload))
+
+
+def publish_statuses_after_commit(job, application_ids, status):
+    """
+    publish_after_commit() for a bulk status change: one callback for all of
+    the job's changed applications.
+    """
+    if connection.vendor == 'postgresql' or not application_ids:
+        return
+    events = batch_events({
+        'event': 'updated',
+        'employer': job.employer_id,
+        'status': status,
+        'applications': [(pk, job.pk) for pk in application_ids],
+    })
+    transaction.on_commit(lambda: broker.publish_many(job.employer_id, events))
+
+
+@receiver(post_save, sender=Application)
+def application_saved(sender, instance, created, **kwargs):
+    publish_after_commit(instance, 'created' if created else 'updated')
@@ -0,0 +1,125 @@
+import hashlib
+from urllib.parse import urlencode
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Count
+from core import metrics
+from .models import Job, Category
+
+# Number of locations returned in the "location" facet
+TOP_LOCATIONS = 10
+
+# Facet columns, in the order they appear in the GROUPING SETS query
+FACET_COLUMNS = ('category_id', 'job_type', 'location')
+
+# Every facet in one pass over the filtered rows. Locations are ranked and cut
+# to the top ones in the database, so a miss never transfers them all
+GROUPING_SETS_SQL = """
+SELECT category_id, job_type, location, g_cat, g_type, g_loc, total FROM (
+    SELECT category_id, job_type, location,
+        GROUPING(category_id) AS g_cat, GROUPING(job_type) AS g_type, GROUPING(location) AS g_loc,
+        COUNT(*) AS total,
+        ROW_NUMBER() OVER (PARTITION BY GROUPING(location) ORDER BY COUNT(*) DESC, location) AS position
+    FROM ({filtered}) AS filtered
+    GROUP BY GROUPING SETS ((category_id), (job_type), (location))
+) AS counts
+WHERE g_loc = 1 OR position <= %s
+"""
+
+# Params that are compared case-insensitively, so they can share a cache entry
+CASE_INSENSITIVE_PARAMS = ('title', 'location', 'search')
+
+
+def facets_cache_key(params, allowed):
+    """
+    Builds a cache key from the filter params that actually affect the result,
+    so '?job_type=FT&page=2' and '?job_type=FT' share one entry.
+    """
+    normalized = []
+    for name in sorted(allowed):
+        value = params.get(name, '').strip()
+        if not value:
+            continue
+        if name in CASE_INSENSITIVE_PARAMS:
+            value = value.lower()
+        normalized.append((name, value))
+    digest = hashlib.md5(urlencode(normalized).encode()).hexdigest()
+    return f'jobs:facets:{digest}'
+
+
+def _grouping_sets_counts(queryset):
+    """
+    Counts every facet in a single pass over the filtered rows (PostgreSQL),
+    the TOP_LOCATIONS most frequent locations only.
+    """
+    inner_sql, params = queryset.order_by().values(*FACET_COLUMNS).query.sql_with_params()
+    counts = {column: {} for column in FACET_COLUMNS}
+    with connection.cursor() as cursor:
+        cursor.execute(GROUPING_SETS_SQL.format(filtered=inner_sql), (*params, TOP_LOCATIONS))
+        for category_id, job_type, location, g_cat, g_type, g_loc, total in cursor.fetchall():
+            if not g_cat:
+                counts['category_id'][category_id] = total
+            elif not g_type:
+                counts['job_type'][job_type] = total
+            elif not g_loc:
+                counts['location'][location] = total
+    return counts
+
+
+def _grouped_counts(queryset):
+    """
+    Fallback for backends without GROUPING SETS: one GROUP BY per facet.
+    """
+    queryset = queryset.order_by()
+    counts = {}
+    for column in FACET_COLUMNS:
+        rows = queryset.values(column).annotate(total=Count('id'))
+        if column == 'location':
+            rows = rows.order_by('-total', 'location')[:TOP_LOCATIONS]
+        counts[column] = {row[column]: row['total'] for row in rows}
+    return counts
+
+
+def compute_facets(queryset):
+    """
+    Returns the category / job_type / top location counts for a filtered Job queryset.
+    """
+    if connection.vendor == 'postgresql':
+        counts = _grouping_sets_counts(queryset)
+    else:
+        counts = _grouped_counts(queryset)
+
+    category_names = dict(
+        Category.objects.filter(pk__in=[pk for pk in counts['category_id'] if pk is not None])
+        .values_list('id', 'name')
+    )
+    job_type_labels = dict(Job.JOB_TYPES)
+
+    def by_count(items):
+        return sorted(items, key=lambda item: (-item[1], str(item[0])))
+
+    return {
+        'category': [
+            {'id': pk, 'name': category_names.get(pk), 'count': total}
+            for pk, total in by_count(counts['category_id'].items())
+        ],
+        'job_type': [
+            {'value': value, 'label': job_type_labels.get(value, value), 'count': total}
+            for value, total in by_count(counts['job_type'].items())
+        ],
+        'location': [
+            {'value': value, 'count': total}
+            for value, total in by_count(counts['location'].items())[:TOP_LOCATIONS]
+        ],
+    }
+
+
+def cached_facets(queryset, params, allowed):
+    key = facets_cache_key(params, allowed)
+    result = cache.get(key)
+    metrics.incr('cache_lookups', cache='job_facets', result='miss' if result is None else 'hit')
+    if result is None:
+        result = compute_facets(queryset)
+        cache.set(key, result, settings.JOB_FACETS_CACHE_TIMEOUT)
+    return result
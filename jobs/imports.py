@@ -0,0 +1,405 @@
+"""
+Bulk import of an employer's job feed from their ATS: a JSON array, NDJSON,
+CSV or XML (<jobs><job><external_id>...</external_id>...</job></jobs>).
+
+The feed is parsed as a stream, one posting at a time, so memory doesn't grow
+with its size. Postings are validated with JobImportSerializer (the
+JobSerializer rules, keyed by external_id) and upserted JOB_IMPORT_BATCH_SIZE
+at a time with one INSERT ... ON CONFLICT (employer_id, external_id) DO
+UPDATE. A posting whose fields didn't change isn't rewritten, so replaying a
+feed doesn't flood the change feed. The MinHash signatures (jobs.dedupe) of
+the jobs a batch creates or rewrites are indexed with it, and its new jobs are
+matched against the saved searches (jobs.alerts) as one task once it commits.
+
+The external_ids read are staged in a temporary table; once the whole feed is
+read, the employer's imported jobs missing from it are deactivated in one
+UPDATE. A feed that can't be read to the end, or that has postings without
+an external_id, deactivates nothing.
+"""
+import codecs
+import csv
+import json
+import re
+import time
+from datetime import timedelta
+from xml.etree import ElementTree
+import orjson
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+from rest_framework import serializers
+from .alerts import executor, percolate_jobs
+from .dedupe import index_jobs, minhash
+from .models import Category
+from .serializers import JobImportSerializer
+
+FORMATS = ('json', 'ndjson', 'csv', 'xml')
+
+CONTENT_TYPES = {
+    'application/json': 'json',
+    'application/x-ndjson': 'ndjson',
+    'application/jsonl': 'ndjson',
+    'text/csv': 'csv',
+    'application/xml': 'xml',
+    'text/xml': 'xml',
+}
+
+EXTENSIONS = {'.json': 'json', '.ndjson': 'ndjson', '.jsonl': 'ndjson', '.csv': 'csv', '.xml': 'xml'}
+
+# A single JSON posting larger than this is taken for a broken feed rather
+# than buffered until the end of the stream
+MAX_RECORD_CHARS = 1 << 20
+CHUNK_SIZE = 1 << 16
+WHITESPACE = re.compile(r'\s*')
+
+COLUMNS = (
+    'employer_id', 'external_id', 'category_id', 'title', 'description', 'location',
+    'salary', 'job_type', 'is_active', 'change_seq', 'created_at', 'updated_at',
+)
+# What a feed sets; a posting is only rewritten when one of these differs
+FEED_COLUMNS = ('category_id', 'title', 'description', 'location', 'salary', 'job_type', 'is_active')
+
+UPSERT_SQL = """
+INSERT INTO jobs_job ({columns}) VALUES {rows}
+ON CONFLICT (employer_id, external_id) WHERE external_id IS NOT NULL DO UPDATE
+SET {assignments}, updated_at = EXCLUDED.updated_at
+WHERE ({current}) {distinct} ({proposed})
+RETURNING id, external_id, {inserted}
+"""
+
+SEEN_CREATE = 'CREATE TEMPORARY TABLE jobs_import_seen (external_id VARCHAR(255) PRIMARY KEY)'
+SEEN_DROP = 'DROP TABLE IF EXISTS jobs_import_seen'
+SEEN_INSERT = 'INSERT INTO jobs_import_seen (external_id) VALUES {rows} ON CONFLICT DO NOTHING'
+
+DEACTIVATE_SQL = """
+UPDATE jobs_job SET is_active = %s, updated_at = %s
+WHERE employer_id = %s AND external_id IS NOT NULL AND is_active
+  AND NOT EXISTS (SELECT 1 FROM jobs_import_seen WHERE jobs_import_seen.external_id = jobs_job.external_id)
+"""
+
+
+class FeedError(Exception):
+    """
+    The feed can't be read any further.
+    """
+
+
+class SizeLimitedStream:
+    """
+    Wraps a binary stream, raising FeedError once more than max_bytes are
+    read from it.
+    """
+    def __init__(self, stream, max_bytes):
+        self.stream = stream
+        self.remaining = max_bytes
+        self.max_bytes = max_bytes
+
+    def _count(self, data):
+        self.remaining -= len(data)
+        if self.remaining < 0:
+            raise FeedError(f'The feed is larger than {self.max_bytes} bytes.')
+        return data
+
+    def read(self, size=-1):
+        if size is None or size < 0 or size > self.remaining + 1:
+            size = self.remaining + 1
+        return self._count(self.stream.read(size))
+
+    def readline(self, size=-1):
+        if size is None or size < 0 or size > self.remaining + 1:
+            size = self.remaining + 1
+        return self._count(self.stream.readline(size))
+
+
+class InvalidRecord:
+    """
+    A posting the reader couldn't decode (e.g. a bad NDJSON line); the import
+    reports it and goes on.
+    """
+    def __init__(self, message):
+        self.message = message
+
+
+def format_for(content_type='', filename=''):
+    """
+    Feed format from a Content-Type header or a file name, or None.
+    """
+    content_type = content_type.split(';')[0].strip().lower()
+    if content_type in CONTENT_TYPES:
+        return CONTENT_TYPES[content_type]
+    for extension, feed_format in EXTENSIONS.items():
+        if filename.lower().endswith(extension):
+            return feed_format
+    return None
+
+
+def read_json(stream):
+    """
+    Yields the items of a JSON array, decoding one at a time.
+    """
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder('utf-8-sig')()
+    buffer, pos, eof = '', 0, False
+    expect = '['
+    while True:
+        pos = WHITESPACE.match(buffer, pos).end()
+        if pos == len(buffer):
+            if eof:
+                raise FeedError('The JSON feed ends before its array is closed.')
+        elif expect == '[':
+            if buffer[pos] != '[':
+                raise FeedError('A JSON feed must be an array of postings.')
+            pos += 1
+            expect = 'first'
+            continue
+        elif buffer[pos] == ']' and expect in ('first', 'separator'):
+            return
+        elif expect == 'separator':
+            if buffer[pos] != ',':
+                raise FeedError(f'Expected "," or "]" in the JSON feed, got {buffer[pos]!r}.')
+            pos += 1
+            expect = 'value'
+            continue
+        else:
+            try:
+                value, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError as exc:
+                if eof:
+                    raise FeedError(f'Invalid JSON feed: {exc}')
+            else:
+                # A number running to the end of the buffer may go on in the
+                # next chunk
+                if end < len(buffer) or eof:
+                    pos = end
+                    expect = 'separator'
+                    yield value
+                    continue
+            if len(buffer) - pos > MAX_RECORD_CHARS:
+                raise FeedError(f'A posting is longer than {MAX_RECORD_CHARS} characters.')
+        chunk = stream.read(CHUNK_SIZE)
+        eof = not chunk
+        buffer = buffer[pos:] + utf8.decode(chunk, final=eof)
+        pos = 0
+
+
+def read_ndjson(stream):
+    """
+    Yields one posting per non-blank line.
+    """
+    for number, line in enumerate(iter(stream.readline, b''), 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield orjson.loads(line)
+        except orjson.JSONDecodeError as exc:
+            yield InvalidRecord(f'Line {number} is not valid JSON: {exc}')
+
+
+def read_csv(stream):
+    """
+    Yields a posting per row, keyed by the header row. Empty cells are left
+    out, so the field's default applies.
+    """
+    lines = codecs.iterdecode(iter(stream.readline, b''), 'utf-8-sig')
+    try:
+        for row in csv.DictReader(lines):
+            yield {key.strip(): value for key, value in row.items() if key and value not in (None, '')}
+    except (csv.Error, UnicodeDecodeError) as exc:
+        raise FeedError(f'Invalid CSV feed: {exc}')
+
+
+def read_xml(stream):
+    """
+    Yields a posting per <job> element, from the text of its children.
+    Elements are dropped once read, so the tree never holds the whole feed.
+    """
+    root = None
+    try:
+        for event, element in ElementTree.iterparse(stream, events=('start', 'end')):
+            if root is None:
+                root = element
+            if event != 'end' or element.tag != 'job':
+                continue
+            posting = {}
+            for child in element:
+                text = ''.join(child.itertext()).strip()
+                if text:
+                    posting[child.tag] = text
+            yield posting
+            root.clear()
+    except ElementTree.ParseError as exc:
+        raise FeedError(f'Invalid XML feed: {exc}')
+
+
+READERS = {'json': read_json, 'ndjson': read_ndjson, 'csv': read_csv, 'xml': read_xml}
+
+
+class ImportReport:
+    """
+    Counts of an import, and the errors of its first JOB_IMPORT_MAX_ERRORS
+    invalid postings.
+    """
+    def __init__(self):
+        self.started = time.monotonic()
+        self.rows = self.created = self.updated = self.unchanged = self.deactivated = 0
+        self.error_count = 0
+        self.errors = []
+        self.aborted = None
+
+    def add_error(self, row, external_id, errors):
+        self.error_count += 1
+        if len(self.errors) < settings.JOB_IMPORT_MAX_ERRORS:
+            self.errors.append({'row': row, 'external_id': external_id, 'errors': errors})
+
+    @property
+    def seconds(self):
+        return time.monotonic() - self.started
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    def as_dict(self):
+        return {
+            'rows': self.rows,
+            'created': self.created,
+            'updated': self.updated,
+            'unchanged': self.unchanged,
+            'deactivated': self.deactivated,
+            'invalid': self.error_count,
+            'seconds': round(self.seconds, 3),
+            'rows_per_second': round(self.rows_per_second, 1),
+            'aborted': self.aborted,
+            'errors': self.errors,
+        }
+
+
+def upsert(employer, postings, now):
+    """
+    Writes a batch of validated postings ({external_id: data}) in one
+    statement; returns ({external_id: id} created, {external_id: id} updated).
+
+    PostgreSQL tells an inserted row by its xmax, which only an update sets.
+    Elsewhere a row is taken as inserted when its created_at is this batch's
+    `now`, so each batch must have a `now` of its own.
+    """
+    rows, params = [], []
+    now = connection.ops.adapt_datetimefield_value(now)
+    for external_id, data in postings.items():
+        rows.append('({})'.format(', '.join(['%s'] * len(COLUMNS))))
+        params += [
+            employer.pk, external_id, data.get('category'), data['title'], data['description'],
+            data['location'], data.get('salary'), data.get('job_type', 'FT'), True, 0, now, now,
+        ]
+    sql = UPSERT_SQL.format(
+        columns=', '.join(COLUMNS),
+        rows=', '.join(rows),
+        assignments=', '.join(f'{column} = EXCLUDED.{column}' for column in FEED_COLUMNS),
+        current=', '.join(f'jobs_job.{column}' for column in FEED_COLUMNS),
+        distinct='IS DISTINCT FROM' if connection.vendor == 'postgresql' else 'IS NOT',
+        proposed=', '.join(f'EXCLUDED.{column}' for column in FEED_COLUMNS),
+        inserted='(xmax = 0)' if connection.vendor == 'postgresql' else 'created_at = updated_at',
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        returned = cursor.fetchall()
+    created = {external_id: pk for pk, external_id, inserted in returned if inserted}
+    updated = {external_id: pk for pk, external_id, inserted in returned if not inserted}
+    return created, updated
+
+
+def mark_seen(external_ids):
+    """
+    Stages external_ids as present in the feed.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(SEEN_INSERT.format(rows=', '.join(['(%s)'] * len(external_ids))), list(external_ids))
+
+
+def import_feed(employer, stream, feed_format, deactivate_missing=True, batch_size=None, progress=None):
+    """
+    Imports the employer's feed from a binary stream; returns an ImportReport.
+    progress(report) is called after every batch.
+    """
+    batch_size = batch_size or settings.JOB_IMPORT_BATCH_SIZE
+    report = ImportReport()
+    validator = JobImportSerializer(context={'categories': dict(Category.objects.values_list('slug', 'id'))})
+    complete = True
+    batch, invalid_ids = {}, set()
+    last_batch_time = timezone.now()
+
+    def batch_time():
+        # Strictly after the previous write's, see upsert()
+        nonlocal last_batch_time
+        last_batch_time = max(timezone.now(), last_batch_time + timedelta(microseconds=1))
+        return last_batch_time
+
+    def flush():
+        with transaction.atomic():
+            if batch:
+                created, updated = upsert(employer, batch, batch_time())
+                report.created += len(created)
+                report.updated += len(updated)
+                report.unchanged += len(batch) - len(created) - len(updated)
+                written = {**created, **updated}
+                index_jobs([
+                    (pk, employer.pk, minhash(batch[external_id]['title'], batch[external_id]['description']))
+                    for external_id, pk in written.items()
+                ])
+                if created:
+                    ids = list(created.values())
+                    transaction.on_commit(lambda ids=ids: executor.submit(percolate_jobs, ids))
+            # Invalid postings aren't deactivated for an error the next feed
+            # may fix
+            if batch or invalid_ids:
+                mark_seen([*batch, *invalid_ids])
+        batch.clear()
+        invalid_ids.clear()
+        if progress:
+            progress(report)
+
+    with connection.cursor() as cursor:
+        cursor.execute(SEEN_DROP)
+        cursor.execute(SEEN_CREATE)
+    try:
+        try:
+            for record in READERS[feed_format](stream):
+                report.rows += 1
+                if isinstance(record, InvalidRecord):
+                    complete = False
+                    report.add_error(report.rows, None, {'non_field_errors': [record.message]})
+                    continue
+                if not isinstance(record, dict):
+                    complete = False
+                    report.add_error(report.rows, None, {'non_field_errors': ['Expected an object.']})
+                    continue
+                external_id = record.get('external_id')
+                external_id = str(external_id).strip()[:255] if external_id is not None else ''
+                try:
+                    data = validator.run_validation(record)
+                except serializers.ValidationError as exc:
+                    if external_id:
+                        invalid_ids.add(external_id)
+                    else:
+                        complete = False
+                    report.add_error(report.rows, external_id or None, exc.detail)
+                    continue
+                batch[data['external_id']] = data
+                if len(batch) + len(invalid_ids) >= batch_size:
+                    flush()
+        except FeedError as exc:
+            complete = False
+            report.aborted = str(exc)
+        flush()
+        if deactivate_missing and complete:
+            with connection.cursor() as cursor:
+                # Stamped after every batch: an index whose watermark moved past
+                # them during the import must still see the deactivations
+                deactivated_at = connection.ops.adapt_datetimefield_value(batch_time())
+                cursor.execute(DEACTIVATE_SQL, [False, deactivated_at, employer.pk])
+                report.deactivated = cursor.rowcount
+    finally:
+        with connection.cursor() as cursor:
+            cursor.execute(SEEN_DROP)
+    return report
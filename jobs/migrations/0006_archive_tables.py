@@ -0,0 +1,58 @@
+# Generated by Django 5.2.8 on 2026-10-19 17:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0005_job_signatures'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ApplicationKey',
+            fields=[
+                ('pk', models.CompositePrimaryKey('job_id', 'applicant_id', blank=True, editable=False, primary_key=True, serialize=False)),
+                ('job_id', models.BigIntegerField()),
+                ('applicant_id', models.BigIntegerField()),
+                ('application_id', models.BigIntegerField()),
+            ],
+            options={
+                'db_table': 'jobs_application_key',
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedJob',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('employer_id', models.BigIntegerField(db_index=True)),
+                ('category_id', models.BigIntegerField(null=True)),
+                ('title', models.CharField(max_length=255)),
+                ('description', models.TextField()),
+                ('company_logo', models.CharField(blank=True, max_length=100, null=True)),
+                ('location', models.CharField(max_length=100)),
+                ('salary', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('job_type', models.CharField(choices=[('FT', 'Full-time'), ('CT', 'Contract'), ('RM', 'Remote')], max_length=2)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ArchivedApplication',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('job_id', models.BigIntegerField(db_index=True)),
+                ('applicant_id', models.BigIntegerField(db_index=True)),
+                ('resume', models.CharField(max_length=100)),
+                ('cover_letter', models.TextField(blank=True)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('accepted', 'Accepted'), ('rejected', 'Rejected')], max_length=10)),
+                ('applied_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'unique_together': {('job_id', 'applicant_id')},
+            },
+        ),
+    ]
@@ -0,0 +1,196 @@
+"""
+Rebuilds jobs_application as a table range-partitioned by month on applied_at.
+
+PostgreSQL requires every unique index of a partitioned table to contain the
+partition key, so the primary key becomes (id, applied_at) and the
+(job_id, applicant_id) guarantee moves to jobs_application_key, maintained
+by row triggers. Other backends keep the plain table. Reversing copies the
+rows back into a plain table.
+"""
+from datetime import date
+from django.db import migrations
+from django.utils import timezone
+
+# Partitions created up front, after the current month; later ones are made
+# by the manage_partitions command
+MONTHS_AHEAD = 3
+
+CREATE_PARTITIONED_TABLE = """
+ALTER TABLE jobs_application RENAME TO jobs_application_unpartitioned;
+
+CREATE TABLE jobs_application (
+    id bigint GENERATED BY DEFAULT AS IDENTITY,
+    resume varchar(100) NOT NULL,
+    cover_letter text NOT NULL,
+    status varchar(10) NOT NULL,
+    applied_at timestamp with time zone NOT NULL,
+    applicant_id bigint NOT NULL
+        REFERENCES users_user (id) DEFERRABLE INITIALLY DEFERRED,
+    job_id bigint NOT NULL
+        REFERENCES jobs_job (id) DEFERRABLE INITIALLY DEFERRED,
+    PRIMARY KEY (id, applied_at)
+) PARTITION BY RANGE (applied_at);
+
+CREATE TABLE jobs_application_default PARTITION OF jobs_application DEFAULT;
+
+CREATE INDEX jobs_application_job_id_idx ON jobs_application (job_id);
+CREATE INDEX jobs_application_applicant_id_idx ON jobs_application (applicant_id);
+"""
+
+COPY_ROWS = """
+INSERT INTO jobs_application (id, resume, cover_letter, status, applied_at, applicant_id, job_id)
+SELECT id, resume, cover_letter, status, applied_at, applicant_id, job_id
+FROM jobs_application_unpartitioned;
+
+SELECT setval(
+    pg_get_serial_sequence('jobs_application', 'id'),
+    COALESCE((SELECT MAX(id) FROM jobs_application), 0) + 1,
+    false
+);
+
+INSERT INTO jobs_application_key (job_id, applicant_id, application_id)
+SELECT job_id, applicant_id, id FROM jobs_application;
+
+DROP TABLE jobs_application_unpartitioned;
+"""
+
+CREATE_KEY_TRIGGERS = """
+CREATE FUNCTION jobs_application_claim_key() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'UPDATE' THEN
+        IF NEW.job_id = OLD.job_id AND NEW.applicant_id = OLD.applicant_id THEN
+            RETURN NEW;
+        END IF;
+        DELETE FROM jobs_application_key
+        WHERE job_id = OLD.job_id AND applicant_id = OLD.applicant_id AND application_id = OLD.id;
+    END IF;
+
+    INSERT INTO jobs_application_key (job_id, applicant_id, application_id)
+    VALUES (NEW.job_id, NEW.applicant_id, NEW.id)
+    ON CONFLICT (job_id, applicant_id) DO NOTHING;
+
+    -- The pair may already have been claimed for this very row by the caller
+    IF NOT FOUND AND NOT EXISTS (
+        SELECT 1 FROM jobs_application_key
+        WHERE job_id = NEW.job_id AND applicant_id = NEW.applicant_id AND application_id = NEW.id
+    ) THEN
+        RAISE unique_violation USING
+            MESSAGE = 'duplicate key value violates unique constraint "jobs_application_key_pkey"',
+            DETAIL = format('Key (job_id, applicant_id)=(%s, %s) already exists.', NEW.job_id, NEW.applicant_id);
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE FUNCTION jobs_application_release_key() RETURNS trigger AS $$
+BEGIN
+    DELETE FROM jobs_application_key
+    WHERE job_id = OLD.job_id AND applicant_id = OLD.applicant_id AND application_id = OLD.id;
+    RETURN OLD;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER jobs_application_claim_key
+BEFORE INSERT OR UPDATE OF job_id, applicant_id ON jobs_application
+FOR EACH ROW EXECUTE FUNCTION jobs_application_claim_key();
+
+CREATE TRIGGER jobs_application_release_key
+AFTER DELETE ON jobs_application
+FOR EACH ROW EXECUTE FUNCTION jobs_application_release_key();
+"""
+
+
+DROP_KEY_TRIGGERS = """
+DROP TRIGGER jobs_application_release_key ON jobs_application;
+DROP TRIGGER jobs_application_claim_key ON jobs_application;
+DROP FUNCTION jobs_application_release_key();
+DROP FUNCTION jobs_application_claim_key();
+"""
+
+# The partitioned table was created next to the plain one, so its primary
+# key and sequence names (jobs_application_pkey1, ..._id_seq1) leave the
+# plain table's free
+RENAME_PARTITIONED_TABLE = 'ALTER TABLE jobs_application RENAME TO jobs_application_partitioned'
+
+COPY_ROWS_BACK = """
+INSERT INTO jobs_application (id, resume, cover_letter, status, applied_at, applicant_id, job_id)
+SELECT id, resume, cover_letter, status, applied_at, applicant_id, job_id
+FROM jobs_application_partitioned;
+
+SELECT setval(
+    pg_get_serial_sequence('jobs_application', 'id'),
+    COALESCE((SELECT MAX(id) FROM jobs_application), 0) + 1,
+    false
+);
+
+DROP TABLE jobs_application_partitioned;
+DELETE FROM jobs_application_key;
+"""
+
+
+CREATE_PARTITION = """
+CREATE TABLE jobs_application_y{year}m{month:02d} PARTITION OF jobs_application
+FOR VALUES FROM (%s) TO (%s)
+"""
+
+
+def add_months(value, months):
+    month = value.month - 1 + months
+    return date(value.year + month // 12, month % 12 + 1, 1)
+
+
+def create_partitions(cursor, first_month):
+    """
+    Monthly partitions from first_month up to MONTHS_AHEAD months from now,
+    so the copied rows don't land in the default partition.
+    """
+    month = date(first_month.year, first_month.month, 1)
+    today = timezone.now().date()
+    last = add_months(date(today.year, today.month, 1), MONTHS_AHEAD)
+    while month <= last:
+        upper = add_months(month, 1)
+        cursor.execute(
+            CREATE_PARTITION.format(year=month.year, month=month.month),
+            [month.isoformat(), upper.isoformat()],
+        )
+        month = upper
+
+
+def partition_applications(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != 'postgresql':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT MIN(applied_at) FROM jobs_application')
+        oldest = cursor.fetchone()[0]
+        cursor.execute(CREATE_PARTITIONED_TABLE)
+        create_partitions(cursor, oldest or timezone.now().date())
+        cursor.execute(COPY_ROWS)
+        cursor.execute(CREATE_KEY_TRIGGERS)
+
+
+def unpartition_applications(apps, schema_editor):
+    """
+    Copies the rows back into a plain jobs_application, created from the
+    model state before this migration.
+    """
+    connection = schema_editor.connection
+    if connection.vendor != 'postgresql':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(DROP_KEY_TRIGGERS)
+        cursor.execute(RENAME_PARTITIONED_TABLE)
+    schema_editor.create_model(apps.get_model('jobs', 'Application'))
+    with connection.cursor() as cursor:
+        cursor.execute(COPY_ROWS_BACK)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0006_archive_tables'),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_applications, unpartition_applications),
+    ]
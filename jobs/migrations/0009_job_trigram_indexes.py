@@ -0,0 +1,45 @@
+"""
+Trigram indexes for the `icontains` filters on title & location and the
+?search= over title, description & location. Django compiles icontains to
+UPPER(col::text) LIKE UPPER(%s) on PostgreSQL, so the indexes are on that
+expression. Built CONCURRENTLY; other backends, and servers without the
+pg_trgm extension available, are skipped.
+"""
+from django.db import migrations
+
+FIELDS = ('title', 'description', 'location')
+
+
+def create_indexes(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != 'postgresql':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+        if cursor.fetchone() is None:
+            return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for field in FIELDS:
+        schema_editor.execute(
+            f'CREATE INDEX CONCURRENTLY IF NOT EXISTS jobs_job_{field}_trgm '
+            f'ON jobs_job USING gin (UPPER({field}::text) gin_trgm_ops)'
+        )
+
+
+def drop_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for field in FIELDS:
+        schema_editor.execute(f'DROP INDEX CONCURRENTLY IF EXISTS jobs_job_{field}_trgm')
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('jobs', '0008_job_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
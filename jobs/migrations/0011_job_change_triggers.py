@@ -0,0 +1,72 @@
+"""
+Triggers maintaining Job.change_seq and JobTombstone for /api/jobs/changes/.
+
+PostgreSQL stamps each row with the id of the writing transaction
+(pg_current_xact_id()). Transaction ids are handed out before commit, so the
+feed only serves changes below the snapshot xmin: every transaction with a
+smaller id has finished, so nothing can appear behind a partner's cursor
+later. Other backends get no triggers: the feed is PostgreSQL only.
+"""
+from django.db import migrations
+
+POSTGRES_TRIGGERS = [
+    """
+    CREATE FUNCTION jobs_job_stamp_change() RETURNS trigger AS $$
+    BEGIN
+        NEW.change_seq := pg_current_xact_id()::text::bigint;
+        RETURN NEW;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER jobs_job_stamp_change
+    BEFORE INSERT OR UPDATE ON jobs_job
+    FOR EACH ROW EXECUTE FUNCTION jobs_job_stamp_change()
+    """,
+    """
+    CREATE FUNCTION jobs_job_tombstone() RETURNS trigger AS $$
+    BEGIN
+        INSERT INTO jobs_jobtombstone (job_id, change_seq, deleted_at)
+        VALUES (OLD.id, pg_current_xact_id()::text::bigint, now())
+        ON CONFLICT (job_id) DO UPDATE
+        SET change_seq = EXCLUDED.change_seq, deleted_at = EXCLUDED.deleted_at;
+        RETURN OLD;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER jobs_job_tombstone
+    AFTER DELETE ON jobs_job
+    FOR EACH ROW EXECUTE FUNCTION jobs_job_tombstone()
+    """,
+]
+
+POSTGRES_DROP = [
+    'DROP TRIGGER IF EXISTS jobs_job_tombstone ON jobs_job',
+    'DROP FUNCTION IF EXISTS jobs_job_tombstone()',
+    'DROP TRIGGER IF EXISTS jobs_job_stamp_change ON jobs_job',
+    'DROP FUNCTION IF EXISTS jobs_job_stamp_change()',
+]
+
+
+def create_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        for statement in POSTGRES_TRIGGERS:
+            schema_editor.execute(statement)
+
+
+def drop_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        for statement in POSTGRES_DROP:
+            schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0010_job_change_feed'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_triggers, drop_triggers),
+    ]
@@ -0,0 +1,63 @@
+"""
+NOTIFY application_events when an application is created or its status
+changes, for the employer SSE stream (see jobs/events.py). PostgreSQL only;
+other backends publish from Python.
+"""
+from django.db import migrations
+
+CREATE_TRIGGER = [
+    """
+    CREATE FUNCTION jobs_application_notify() RETURNS trigger AS $$
+    BEGIN
+        PERFORM pg_notify('application_events', json_build_object(
+            'event', CASE TG_OP WHEN 'INSERT' THEN 'created' ELSE 'updated' END,
+            'application', NEW.id,
+            'job', NEW.job_id,
+            'employer', (SELECT employer_id FROM jobs_job WHERE id = NEW.job_id),
+            'status', NEW.status
+        )::text);
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER jobs_application_notify_insert
+    AFTER INSERT ON jobs_application
+    FOR EACH ROW EXECUTE FUNCTION jobs_application_notify()
+    """,
+    """
+    CREATE TRIGGER jobs_application_notify_status
+    AFTER UPDATE OF status ON jobs_application
+    FOR EACH ROW WHEN (OLD.status IS DISTINCT FROM NEW.status)
+    EXECUTE FUNCTION jobs_application_notify()
+    """,
+]
+
+DROP_TRIGGER = [
+    'DROP TRIGGER IF EXISTS jobs_application_notify_status ON jobs_application',
+    'DROP TRIGGER IF EXISTS jobs_application_notify_insert ON jobs_application',
+    'DROP FUNCTION IF EXISTS jobs_application_notify()',
+]
+
+
+def create_trigger(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        for statement in CREATE_TRIGGER:
+            schema_editor.execute(statement)
+
+
+def drop_trigger(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        for statement in DROP_TRIGGER:
+            schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0011_job_change_triggers'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigger, drop_trigger),
+    ]
@@ -0,0 +1,50 @@
+"""
+Job.views, and change triggers that ignore it: a flush of view counts
+(jobs.counters) is not a change the /api/jobs/changes/ feed should carry.
+"""
+from django.db import migrations, models
+
+POSTGRES_STAMP = """
+CREATE OR REPLACE FUNCTION jobs_job_stamp_change() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'UPDATE' AND to_jsonb(NEW) - 'views' - 'change_seq'
+                          = to_jsonb(OLD) - 'views' - 'change_seq' THEN
+        RETURN NEW;
+    END IF;
+    NEW.change_seq := pg_current_xact_id()::text::bigint;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+POSTGRES_STAMP_REVERSE = """
+CREATE OR REPLACE FUNCTION jobs_job_stamp_change() RETURNS trigger AS $$
+BEGIN
+    NEW.change_seq := pg_current_xact_id()::text::bigint;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+
+def replace_stamp(function):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor == 'postgresql':
+            schema_editor.execute(function)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0012_application_event_trigger'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='views',
+            field=models.PositiveBigIntegerField(db_default=0, default=0, editable=False),
+        ),
+        migrations.RunPython(replace_stamp(POSTGRES_STAMP), replace_stamp(POSTGRES_STAMP_REVERSE)),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.8 on 2026-10-19 18:35
+
+import django.db.models.functions.text
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0015_job_external_id'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(django.db.models.functions.text.Lower(django.db.models.functions.text.Trim('title')), condition=models.Q(('is_active', True)), name='job_active_title_key_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(django.db.models.functions.text.Lower(django.db.models.functions.text.Trim('location')), condition=models.Q(('is_active', True)), name='job_active_location_key_idx'),
+        ),
+    ]
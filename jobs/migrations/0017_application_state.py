@@ -0,0 +1,24 @@
+"""
+Aligns the Application model state with the table 0007 partitioned: its
+(job, applicant) unique constraint only remains in the state.
+
+The database is left as is. PostgreSQL enforces the pair through
+jobs_application_key; other backends keep the unique index 0001 created,
+which the plain INSERT ... ON CONFLICT of jobs.applications relies on.
+"""
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0016_job_term_indexes'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AlterUniqueTogether(name='application', unique_together=set()),
+            ],
+        ),
+    ]
@@ -0,0 +1,102 @@
+"""
+Replaces the row-level application event triggers of 0012 with statement
+level ones reading the statement's transition tables: one NOTIFY per
+(employer, status) and up to NOTIFY_BATCH applications, so a bulk status
+change of 1,000 applications sends a handful of notifications instead of
+1,000. PostgreSQL only; other backends publish from Python.
+"""
+from importlib import import_module
+from django.db import migrations
+
+# A NOTIFY payload must stay under 8000 bytes; an application is at most ~45
+NOTIFY_BATCH = 100
+
+# Rows the statement inserted, or whose status it changed
+INSERTED = 'SELECT id, job_id, status FROM new_rows'
+CHANGED = """
+    SELECT new_rows.id, new_rows.job_id, new_rows.status
+    FROM new_rows JOIN old_rows ON old_rows.id = new_rows.id
+    WHERE old_rows.status IS DISTINCT FROM new_rows.status
+"""
+
+NOTIFY_FUNCTION = """
+CREATE FUNCTION {name}() RETURNS trigger AS $$
+DECLARE
+    batch record;
+BEGIN
+    FOR batch IN
+        SELECT jobs_job.employer_id, numbered.status,
+               json_agg(json_build_array(numbered.id, numbered.job_id) ORDER BY numbered.id) AS applications
+        FROM (
+            SELECT id, job_id, status, (row_number() OVER (ORDER BY id) - 1) / {batch_size} AS chunk
+            FROM ({rows}) AS affected
+        ) AS numbered
+        JOIN jobs_job ON jobs_job.id = numbered.job_id
+        GROUP BY jobs_job.employer_id, numbered.status, numbered.chunk
+    LOOP
+        PERFORM pg_notify('application_events', json_build_object(
+            'event', '{event}',
+            'employer', batch.employer_id,
+            'status', batch.status,
+            'applications', batch.applications
+        )::text);
+    END LOOP;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+CREATE_TRIGGER = [
+    NOTIFY_FUNCTION.format(
+        name='jobs_application_notify_inserted', rows=INSERTED, event='created', batch_size=NOTIFY_BATCH
+    ),
+    NOTIFY_FUNCTION.format(
+        name='jobs_application_notify_updated', rows=CHANGED, event='updated', batch_size=NOTIFY_BATCH
+    ),
+    """
+    CREATE TRIGGER jobs_application_notify_insert
+    AFTER INSERT ON jobs_application
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION jobs_application_notify_inserted()
+    """,
+    # Transition tables can't be combined with a column list (UPDATE OF
+    # status); CHANGED leaves out the rows whose status stayed the same
+    """
+    CREATE TRIGGER jobs_application_notify_status
+    AFTER UPDATE ON jobs_application
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION jobs_application_notify_updated()
+    """,
+]
+
+DROP_TRIGGER = [
+    'DROP TRIGGER IF EXISTS jobs_application_notify_status ON jobs_application',
+    'DROP TRIGGER IF EXISTS jobs_application_notify_insert ON jobs_application',
+    'DROP FUNCTION IF EXISTS jobs_application_notify_updated()',
+    'DROP FUNCTION IF EXISTS jobs_application_notify_inserted()',
+]
+
+row_triggers = import_module('jobs.migrations.0012_application_event_trigger')
+
+
+def create_trigger(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        for statement in row_triggers.DROP_TRIGGER + CREATE_TRIGGER:
+            schema_editor.execute(statement)
+
+
+def drop_trigger(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        for statement in DROP_TRIGGER + row_triggers.CREATE_TRIGGER:
+            schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0017_application_state'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigger, drop_trigger),
+    ]
@@ -0,0 +1,71 @@
+"""
+Stamps change_seq only when a column the /api/jobs/changes/ feed serves
+changes. The check moves from comparing to_jsonb() of both full rows in the
+trigger function (0013) to a WHEN clause on the trigger, so updates of other
+columns (views, updated_at, external_id) don't even call the function.
+"""
+from importlib import import_module
+from django.db import migrations
+
+# Columns behind JobSerializer's fields, what a partner sees of a job
+FEED_COLUMNS = (
+    'employer_id', 'category_id', 'title', 'description', 'location', 'salary',
+    'job_type', 'company_logo', 'created_at', 'is_active',
+)
+
+CREATE_TRIGGERS = [
+    """
+    CREATE OR REPLACE FUNCTION jobs_job_stamp_change() RETURNS trigger AS $$
+    BEGIN
+        NEW.change_seq := pg_current_xact_id()::text::bigint;
+        RETURN NEW;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+    'DROP TRIGGER jobs_job_stamp_change ON jobs_job',
+    """
+    CREATE TRIGGER jobs_job_stamp_insert
+    BEFORE INSERT ON jobs_job
+    FOR EACH ROW EXECUTE FUNCTION jobs_job_stamp_change()
+    """,
+    """
+    CREATE TRIGGER jobs_job_stamp_change
+    BEFORE UPDATE ON jobs_job
+    FOR EACH ROW
+    WHEN (({old}) IS DISTINCT FROM ({new}))
+    EXECUTE FUNCTION jobs_job_stamp_change()
+    """.format(
+        old=', '.join(f'OLD.{column}' for column in FEED_COLUMNS),
+        new=', '.join(f'NEW.{column}' for column in FEED_COLUMNS),
+    ),
+]
+
+changes = import_module('jobs.migrations.0011_job_change_triggers')
+views = import_module('jobs.migrations.0013_job_views')
+_, stamp_trigger, _, _ = changes.POSTGRES_TRIGGERS
+
+DROP_TRIGGERS = [
+    'DROP TRIGGER jobs_job_stamp_change ON jobs_job',
+    'DROP TRIGGER jobs_job_stamp_insert ON jobs_job',
+    views.POSTGRES_STAMP,
+    stamp_trigger,
+]
+
+
+def execute(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor == 'postgresql':
+            for statement in statements:
+                schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0018_application_event_batches'),
+    ]
+
+    operations = [
+        migrations.RunPython(execute(CREATE_TRIGGERS), execute(DROP_TRIGGERS)),
+    ]
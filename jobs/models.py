@@ -1,5 +1,8 @@
+from datetime import timedelta
 from django.db import models
+from django.db.models.functions import Lower, Trim
 from django.conf import settings
+from django.utils import timezone
 from django.core.validators import FileExtensionValidator
 
 class Category(models.Model):
@@ -30,6 +33,10 @@ class Job(models.Model):
     - salary (Decimal)
     - job_type (Enum)
     - created_at (DateTime)
+    - updated_at (DateTime, change watermark for in-memory indexes)
+    - change_seq (BigInt, position in the /api/jobs/changes/ feed, set by a trigger)
+    - views (BigInt, detail views, flushed in batches by jobs.counters)
+    - external_id (String, the posting's id in the employer's ATS feed, see jobs.imports)
     """
     JOB_TYPES = (
         ('FT', 'Full-time'),
@@ -58,10 +65,128 @@ class Job(models.Model):
     job_type = models.CharField(max_length=2, choices=JOB_TYPES, default='FT')
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+    # Stamped by the jobs_job_stamp_change trigger on every insert/update
+    change_seq = models.BigIntegerField(default=0, editable=False)
+    # Only written by jobs.counters' flush, see save()
+    views = models.PositiveBigIntegerField(default=0, db_default=0, editable=False)
+    # Set on jobs imported from a feed; NULL for jobs posted through the API
+    external_id = models.CharField(max_length=255, null=True, blank=True, editable=False)
+
+    class Meta:
+        # Partial indexes backing every ?ordering= on the active job list, and
+        # the newest-first feed filtered by category or job_type.
+        # Descending orders are served by a backward scan of the same index.
+        indexes = [
+            models.Index(
+                fields=['created_at', 'id'],
+                name='job_active_created_idx',
+                condition=models.Q(is_active=True),
+            ),
+            models.Index(
+                fields=['salary', 'id'],
+                name='job_active_salary_idx',
+                condition=models.Q(is_active=True, salary__isnull=False),
+            ),
+            models.Index(
+                fields=['category', 'created_at', 'id'],
+                name='job_active_category_idx',
+                condition=models.Q(is_active=True),
+            ),
+            models.Index(
+                fields=['job_type', 'created_at', 'id'],
+                name='job_active_type_idx',
+                condition=models.Q(is_active=True),
+            ),
+            models.Index(fields=['change_seq', 'id'], name='job_change_seq_idx'),
+            # Terms recounted by jobs.suggest when jobs change
+            models.Index(
+                Lower(Trim('title')),
+                name='job_active_title_key_idx',
+                condition=models.Q(is_active=True),
+            ),
+            models.Index(
+                Lower(Trim('location')),
+                name='job_active_location_key_idx',
+                condition=models.Q(is_active=True),
+            ),
+        ]
+        constraints = [
+            # Upsert key of feed imports
+            models.UniqueConstraint(
+                fields=['employer', 'external_id'],
+                name='job_employer_external_id_uniq',
+                condition=models.Q(external_id__isnull=False),
+            ),
+        ]
 
     def __str__(self):
         return f"{self.title} at {self.location}"
 
+    def save(self, *args, **kwargs):
+        """
+        Views are flushed behind the ORM's back (jobs.counters), so a save of
+        a loaded job updates every field but `views`: a stale instance must
+        not write its copy back. Like any save with update_fields, it raises
+        DatabaseError when the row no longer exists instead of INSERTing it
+        again. Saves with force_insert or update_fields, and of an instance
+        without a pk, behave as Model.save().
+        """
+        if (
+            not self._state.adding and self.pk is not None
+            and not kwargs.get('force_insert') and kwargs.get('update_fields') is None
+        ):
+            skip = {'views', *self.get_deferred_fields()}
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.attname not in skip
+            ]
+        super().save(*args, **kwargs)
+
+class JobTombstone(models.Model):
+    """
+    Left behind by a deleted Job (trigger jobs_job_tombstone) so the change
+    feed can tell partners to drop it.
+    """
+    job_id = models.BigIntegerField(primary_key=True)
+    change_seq = models.BigIntegerField(db_index=True)
+    deleted_at = models.DateTimeField()
+
+
+class JobSignature(models.Model):
+    """
+    MinHash signature of a job's title + description, used to spot reposts.
+    """
+    job = models.OneToOneField(Job, on_delete=models.CASCADE, primary_key=True, related_name='signature')
+    signature = models.BinaryField()
+
+
+class JobSignatureBand(models.Model):
+    """
+    LSH band buckets of a JobSignature. Near-duplicates of a job share at least
+    one (band, bucket) pair, so they are found with a single indexed lookup.
+    """
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='signature_bands')
+    employer = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+')
+    band = models.PositiveSmallIntegerField()
+    bucket = models.BigIntegerField()
+
+    class Meta:
+        indexes = [models.Index(fields=['employer', 'band', 'bucket'], name='job_lsh_bucket_idx')]
+
+
+class ApplicationQuerySet(models.QuerySet):
+    """
+    jobs_application is range-partitioned by month on applied_at, so bounding
+    a query on applied_at lets PostgreSQL skip every other partition.
+    """
+    def applied_between(self, start, end):
+        return self.filter(applied_at__gte=start, applied_at__lt=end)
+
+    def recent(self, days=30):
+        return self.filter(applied_at__gte=timezone.now() - timedelta(days=days))
+
+
 class Application(models.Model):
     """
     Schema:
@@ -98,8 +223,89 @@ class Application(models.Model):
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
     applied_at = models.DateTimeField(auto_now_add=True)
 
+    objects = ApplicationQuerySet.as_manager()
+
+    # No unique constraints: on PostgreSQL the table is partitioned (see
+    # migrations 0007 and 0017) and can only have ones that include
+    # applied_at. Its primary key is (id, applied_at), id staying unique
+    # through its identity sequence, and one application per job per user is
+    # enforced through ApplicationKey. Other backends keep the plain table and
+    # the (job, applicant) unique index it was created with.
+
+    def __str__(self):
+        return f"{self.applicant} -> {self.job.title}"
+
+
+class ApplicationKey(models.Model):
+    """
+    One row per (job, applicant) pair that has applied.
+    A partitioned jobs_application can only have unique indexes that include
+    applied_at, so a trigger claims the pair here on every insert (PostgreSQL).
+    """
+    pk = models.CompositePrimaryKey('job_id', 'applicant_id')
+    job_id = models.BigIntegerField()
+    applicant_id = models.BigIntegerField()
+    application_id = models.BigIntegerField()
+
     class Meta:
-        unique_together = ('job', 'applicant') # Ensures one application per job per user
+        db_table = 'jobs_application_key'
+
+
+class ArchivedJob(models.Model):
+    """
+    Cold copy of a long-inactive Job, moved out by the archive_jobs command.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    employer_id = models.BigIntegerField(db_index=True)
+    category_id = models.BigIntegerField(null=True)
+    title = models.CharField(max_length=255)
+    description = models.TextField()
+    company_logo = models.CharField(max_length=100, blank=True, null=True)
+    location = models.CharField(max_length=100)
+    salary = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    job_type = models.CharField(max_length=2, choices=Job.JOB_TYPES)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+
+class ArchivedApplication(models.Model):
+    """
+    Cold copy of an Application to an ArchivedJob.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    job_id = models.BigIntegerField(db_index=True)
+    applicant_id = models.BigIntegerField(db_index=True)
+    resume = models.CharField(max_length=100)
+    cover_letter = models.TextField(blank=True)
+    status = models.CharField(max_length=10, choices=Application.STATUS_CHOICES)
+    applied_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('job_id', 'applicant_id')
+
+
+class SavedSearch(models.Model):
+    """
+    An applicant's job alert. Every criterion left blank matches anything.
+    `anchor` is the single term the search is indexed under (see
+    jobs.alerts): a new job is only checked against the searches anchored on
+    one of its own terms.
+    """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='saved_searches'
+    )
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, null=True, blank=True)
+    job_type = models.CharField(max_length=2, choices=Job.JOB_TYPES, blank=True)
+    # Words that must all appear in the location / title
+    location = models.CharField(max_length=100, blank=True)
+    keywords = models.CharField(max_length=255, blank=True)
+    salary_min = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    anchor = models.CharField(max_length=260, db_index=True, editable=False)
+    created_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
-        return f"{self.applicant} -> {self.job.title}"
\ No newline at end of file
+        return f"Saved search {self.pk} of user {self.user_id}"
@@ -0,0 +1,105 @@
+"""
+Monthly range partitions of jobs_application on applied_at (PostgreSQL only).
+"""
+from datetime import date
+from django.db import connection, transaction
+from django.utils import timezone
+
+PARENT_TABLE = 'jobs_application'
+DEFAULT_PARTITION = 'jobs_application_default'
+
+
+def month_start(value):
+    return date(value.year, value.month, 1)
+
+
+def add_months(value, months):
+    month = value.month - 1 + months
+    return date(value.year + month // 12, month % 12 + 1, 1)
+
+
+def partition_name(month):
+    return f'{PARENT_TABLE}_y{month.year}m{month.month:02d}'
+
+
+def existing_partitions(cursor):
+    cursor.execute(
+        "SELECT child.relname FROM pg_inherits "
+        "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+        "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+        "WHERE parent.relname = %s",
+        [PARENT_TABLE],
+    )
+    return {row[0] for row in cursor.fetchall()}
+
+
+def attach_partition(cursor, name, month, upper):
+    """
+    Creates the partition for [month, upper) out of the rows that already
+    landed in the default partition: they are moved to a standalone table,
+    which is then attached. Returns the number of rows moved.
+
+    Deleting them from the default partition releases their
+    jobs_application_key claims (trigger), so the claims are taken again for
+    the moved rows. The default partition stays locked meanwhile, which only
+    blocks inserts with an applied_at no other partition covers.
+    """
+    cursor.execute(f'LOCK TABLE {DEFAULT_PARTITION} IN ACCESS EXCLUSIVE MODE')
+    cursor.execute(f'CREATE TABLE {name} (LIKE {PARENT_TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)')
+    cursor.execute(
+        f'WITH moved AS (DELETE FROM {DEFAULT_PARTITION} '
+        'WHERE applied_at >= %s AND applied_at < %s RETURNING *) '
+        f'INSERT INTO {name} SELECT * FROM moved',
+        [month, upper],
+    )
+    moved = cursor.rowcount
+    cursor.execute(
+        'INSERT INTO jobs_application_key (job_id, applicant_id, application_id) '
+        f'SELECT job_id, applicant_id, id FROM {name} ON CONFLICT DO NOTHING'
+    )
+    cursor.execute(
+        f'ALTER TABLE {PARENT_TABLE} ATTACH PARTITION {name} FOR VALUES FROM (%s) TO (%s)',
+        [month.isoformat(), upper.isoformat()],
+    )
+    return moved
+
+
+def ensure_application_partitions(first_month=None, months_ahead=3, using=None):
+    """
+    Creates the missing monthly partitions from first_month (default: this
+    month) up to months_ahead months from now. A month whose rows already
+    landed in the default partition (e.g. the command didn't run in time)
+    gets them moved to its new partition. Returns (created partition names,
+    rows moved out of the default partition).
+    """
+    using = using or connection
+    if using.vendor != 'postgresql':
+        return [], 0
+    today = timezone.now().date()
+    month = month_start(first_month or today)
+    last = add_months(month_start(today), months_ahead)
+
+    created, moved = [], 0
+    with using.cursor() as cursor:
+        existing = existing_partitions(cursor)
+        while month <= last:
+            name = partition_name(month)
+            upper = add_months(month, 1)
+            if name not in existing:
+                cursor.execute(
+                    f'SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} '
+                    'WHERE applied_at >= %s AND applied_at < %s)',
+                    [month, upper],
+                )
+                if cursor.fetchone()[0]:
+                    with transaction.atomic(using=using.alias):
+                        moved += attach_partition(cursor, name, month, upper)
+                else:
+                    cursor.execute(
+                        f'CREATE TABLE {name} PARTITION OF {PARENT_TABLE} '
+                        'FOR VALUES FROM (%s) TO (%s)',
+                        [month.isoformat(), upper.isoformat()],
+                    )
+                created.append(name)
+            month = upper
+    return created, moved
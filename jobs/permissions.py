@@ -23,4 +23,15 @@ class IsOwnerOrReadOnly(permissions.BasePermission):
         if request.method in permissions.SAFE_METHODS:
             return True
 
-        return obj.employer == request.user or request.user.is_superuser
\ No newline at end of file
+        return obj.employer == request.user or request.user.is_superuser
+
+class IsApplicant(permissions.BasePermission):
+    """
+    Only users with the Applicant role can apply to jobs.
+    """
+    def has_permission(self, request, view):
+        return (
+            request.user and
+            request.user.is_authenticated and
+            request.user.role == 'applicant'
+        )
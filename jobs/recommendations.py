@@ -0,0 +1,299 @@
+import re
+import threading
+import time
+import zlib
+from collections import Counter
+from datetime import timedelta
+from typing import NamedTuple
+import numpy as np
+import scipy.sparse as sp
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from core import metrics
+from .models import Job, Application
+
+# Hashed feature space: tokens are mapped with crc32 so every process agrees
+N_FEATURES = 2 ** 18
+TOKEN_RE = re.compile(r'[a-z0-9][a-z0-9+#]+')
+TITLE_WEIGHT = 2
+CATEGORY_WEIGHT = 3
+
+# Only the heaviest profile features are scored, each one reads a single
+# column of the job matrix, so cost is bound by their posting lists.
+# Features found in more than MAX_DF_RATIO of the jobs (once that is over
+# MIN_DF_CUTOFF jobs) are stop-word like: long postings, almost no signal.
+PROFILE_FEATURES = 64
+MAX_DF_RATIO = 0.05
+MIN_DF_CUTOFF = 1000
+
+# Rows appended since the last merge are kept in a small CSR "delta" segment
+DELTA_LIMIT = 20000
+MAX_DEAD_FRACTION = 0.25
+
+WATERMARK_OVERLAP = timedelta(seconds=5)
+
+JOB_COLUMNS = ('id', 'updated_at', 'is_active', 'title', 'description', 'category_id')
+
+
+def _feature(token):
+    return zlib.crc32(token.encode()) & (N_FEATURES - 1)
+
+
+def job_features(title, description, category_id):
+    counts = Counter()
+    for token in TOKEN_RE.findall((title or '').lower()):
+        counts[_feature(token)] += TITLE_WEIGHT
+    for token in TOKEN_RE.findall((description or '').lower()):
+        counts[_feature(token)] += 1
+    if category_id is not None:
+        counts[_feature(f'category:{category_id}')] += CATEGORY_WEIGHT
+    return counts
+
+
+def vectorize(rows):
+    """
+    Turns (title, description, category_id) rows into an L2-normalized CSR
+    matrix of sublinear term frequencies.
+    """
+    indptr, indices, data = [0], [], []
+    for title, description, category_id in rows:
+        counts = job_features(title, description, category_id)
+        indices.extend(counts.keys())
+        data.extend(counts.values())
+        indptr.append(len(indices))
+    matrix = sp.csr_matrix(
+        (np.asarray(data, dtype=np.float32), np.asarray(indices, dtype=np.int32), np.asarray(indptr)),
+        shape=(len(rows), N_FEATURES),
+    )
+    matrix.data = 1 + np.log(matrix.data)
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1
+    return sp.diags(1 / norms).dot(matrix).tocsr()
+
+
+class Segments(NamedTuple):
+    """
+    A consistent view of the index, swapped in whole: scoring reads one
+    Segments, never a base from one refresh and ids from another.
+    """
+    base: sp.csc_matrix
+    delta: sp.csr_matrix
+    ids: np.ndarray
+    versions: np.ndarray
+    alive: np.ndarray
+    df: np.ndarray
+
+
+EMPTY = Segments(
+    base=sp.csc_matrix((0, N_FEATURES), dtype=np.float32),
+    delta=sp.csr_matrix((0, N_FEATURES), dtype=np.float32),
+    ids=np.empty(0, dtype=np.int64),
+    versions=np.empty(0, dtype=np.float64),
+    alive=np.empty(0, dtype=bool),
+    df=np.zeros(N_FEATURES, dtype=np.float64),
+)
+
+
+def merge(segments):
+    """
+    Folds the delta into the base, dropping dead rows.
+    """
+    keep = np.flatnonzero(segments.alive)
+    base = sp.vstack([segments.base.tocsr(), segments.delta], format='csr')[keep].tocsc()
+    return Segments(
+        base=base,
+        delta=EMPTY.delta,
+        ids=segments.ids[keep],
+        versions=segments.versions[keep],
+        alive=np.ones(len(keep), dtype=bool),
+        df=np.diff(base.indptr).astype(np.float64),
+    )
+
+
+class RecommendationIndex:
+    """
+    Per-process hashed TF matrix over active jobs, scored with IDF-weighted
+    applicant profiles.
+
+    The bulk of the jobs live in a CSC "base" segment so scoring a profile only
+    reads the columns of its features. Jobs changed since the Job.updated_at
+    watermark are appended to a CSR "delta" segment every
+    RECOMMEND_REFRESH_SECONDS and their previous rows are masked out. The
+    segments are merged once the delta or the dead rows grow too large, and
+    rebuilt from the database every RECOMMEND_FULL_REBUILD_SECONDS in a
+    background thread; scoring uses the previous segments until the new ones
+    are swapped in. The first build of a process is done by the request that
+    needs it (concurrent ones wait for it): scoring an empty index would
+    cache empty recommendations for RECOMMEND_CACHE_TIMEOUT.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.segments = EMPTY
+        self.watermark = None
+        self.checked_at = 0.0
+        self.rebuilt_at = 0.0
+
+    # --- Maintenance ---
+
+    def refresh(self):
+        if self.watermark is None:
+            with self._lock:
+                if self.watermark is None:
+                    self.rebuild()
+                    self.checked_at = time.monotonic()
+            return
+        now = time.monotonic()
+        if now - self.checked_at < settings.RECOMMEND_REFRESH_SECONDS:
+            return
+        if not self._lock.acquire(blocking=False):
+            return
+        in_background = False
+        try:
+            if now - self.rebuilt_at >= settings.RECOMMEND_FULL_REBUILD_SECONDS:
+                # The thread releases the lock once the new segments are in place
+                threading.Thread(
+                    target=self._rebuild_in_background, name='recommendations-rebuild', daemon=True
+                ).start()
+                in_background = True
+            else:
+                self._apply_changes()
+            self.checked_at = now
+        finally:
+            if not in_background:
+                self._lock.release()
+
+    def _rebuild_in_background(self):
+        try:
+            self.rebuild()
+        finally:
+            connections.close_all()
+            self._lock.release()
+
+    def rebuild(self):
+        """
+        Vectorizes every active job and swaps the result in. Called with the
+        lock held, or before the index serves (tests).
+        """
+        latest = Job.objects.order_by('-updated_at').values_list('updated_at', flat=True)
+        watermark = latest.first()
+        chunks, ids, versions, batch = [], [], [], []
+        rows = Job.objects.filter(is_active=True).values_list(*JOB_COLUMNS)
+        for job_id, updated_at, _, title, description, category_id in rows.iterator(chunk_size=5000):
+            ids.append(job_id)
+            versions.append(updated_at.timestamp())
+            batch.append((title, description, category_id))
+            if len(batch) == 5000:
+                chunks.append(vectorize(batch))
+                batch = []
+        chunks.append(vectorize(batch))
+
+        base = sp.vstack(chunks, format='csc')
+        self.segments = Segments(
+            base=base,
+            delta=EMPTY.delta,
+            ids=np.asarray(ids, dtype=np.int64),
+            versions=np.asarray(versions, dtype=np.float64),
+            alive=np.ones(len(ids), dtype=bool),
+            df=np.diff(base.indptr).astype(np.float64),
+        )
+        self.watermark = watermark
+        self.rebuilt_at = time.monotonic()
+
+    def _apply_changes(self):
+        changed = list(
+            Job.objects.filter(updated_at__gte=self.watermark - WATERMARK_OVERLAP)
+            .values_list(*JOB_COLUMNS)
+        )
+        if not changed:
+            return
+        self.watermark = max(self.watermark, max(row[1] for row in changed))
+
+        # Skip rows re-read through the overlap window that are already indexed
+        segments = self.segments
+        rows = np.flatnonzero(np.isin(segments.ids, [row[0] for row in changed]) & segments.alive)
+        indexed = {(int(segments.ids[i]), segments.versions[i]) for i in rows}
+        fresh = [row for row in changed if (row[0], row[1].timestamp()) not in indexed]
+        if not fresh:
+            return
+
+        alive = segments.alive & ~np.isin(segments.ids, [row[0] for row in fresh])
+        added = [row for row in fresh if row[2]]
+        matrix = vectorize([row[3:] for row in added])
+        segments = segments._replace(
+            delta=sp.vstack([segments.delta, matrix], format='csr'),
+            ids=np.concatenate([segments.ids, [row[0] for row in added]]).astype(np.int64),
+            versions=np.concatenate([segments.versions, [row[1].timestamp() for row in added]]),
+            alive=np.concatenate([alive, np.ones(len(added), dtype=bool)]),
+            df=segments.df + np.bincount(matrix.indices, minlength=N_FEATURES),
+        )
+
+        dead = len(segments.alive) - np.count_nonzero(segments.alive)
+        if segments.delta.shape[0] > DELTA_LIMIT or dead > MAX_DEAD_FRACTION * len(segments.alive):
+            segments = merge(segments)
+        self.segments = segments
+
+    # --- Scoring ---
+
+    def top_k(self, profile, exclude_ids, k):
+        """
+        Scores every indexed job against a profile matrix (one row per job the
+        applicant applied to) and returns the k best (job_id, score) pairs.
+        """
+        self.refresh()
+        segments = self.segments
+        n_docs = np.count_nonzero(segments.alive)
+        if not n_docs:
+            return []
+        idf = np.log((1 + n_docs) / (1 + segments.df)) + 1
+        weights = np.asarray(profile.sum(axis=0)).ravel() * idf
+        weights[segments.df > max(MAX_DF_RATIO * n_docs, MIN_DF_CUTOFF)] = 0
+        features = np.flatnonzero(weights)
+        if features.size > PROFILE_FEATURES:
+            heaviest = np.argpartition(weights[features], -PROFILE_FEATURES)[-PROFILE_FEATURES:]
+            features = features[heaviest]
+        weights = weights[features]
+
+        scores = np.concatenate([
+            segments.base[:, features].dot(weights),
+            segments.delta[:, features].dot(weights),
+        ])
+        scores[~segments.alive] = 0
+        scores[np.isin(segments.ids, list(exclude_ids))] = 0
+
+        candidates = np.flatnonzero(scores)
+        if not candidates.size:
+            return []
+        k = min(k, candidates.size)
+        top = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+        top = top[np.argsort(-scores[top], kind='stable')]
+        return [(int(segments.ids[i]), round(float(scores[i]), 4)) for i in top]
+
+
+recommendation_index = RecommendationIndex()
+
+
+def recommend_for(user):
+    """
+    Returns the cached [(job_id, score), ...] recommendations for an applicant.
+    """
+    key = f'jobs:recommended:{user.pk}'
+    result = cache.get(key)
+    metrics.incr('cache_lookups', cache='job_recommendations', result='miss' if result is None else 'hit')
+    if result is None:
+        applied = list(
+            Application.objects.filter(applicant=user)
+            .values_list('job_id', 'job__title', 'job__description', 'job__category_id')
+        )
+        result = []
+        if applied:
+            profile = vectorize([row[1:] for row in applied])
+            result = recommendation_index.top_k(
+                profile, {row[0] for row in applied}, settings.RECOMMEND_MAX_RESULTS
+            )
+        cache.set(key, result, settings.RECOMMEND_CACHE_TIMEOUT)
+    return result
@@ -1,11 +1,58 @@
+from django.conf import settings
+from django.db.models.functions import Substr
 from rest_framework import serializers
-from .models import Job, Category, Application
+from .models import Job, Category, Application, SavedSearch
+from .alerts import anchor_for
+
+# Characters of the description a job card shows
+CARD_DESCRIPTION_LENGTH = 200
+
+
+class SparseFieldsetMixin:
+    """
+    On GET, ?fields=a,b keeps only those fields and ?omit=a,b drops some;
+    unknown names are ignored. narrow_queryset() then fetches only the
+    columns the remaining fields read.
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        if request is None or request.method != 'GET':
+            return
+        params = request.query_params
+        if params.get('fields'):
+            keep = set(params['fields'].split(','))
+            for name in [name for name in self.fields if name not in keep]:
+                self.fields.pop(name)
+        for name in params.get('omit', '').split(','):
+            self.fields.pop(name, None)
+
+    def narrow_queryset(self, queryset):
+        """
+        only() the columns behind the selected fields (plus the primary key
+        and the ordering columns), joining the relations they read.
+        """
+        columns = {queryset.model._meta.pk.name} | {
+            name.lstrip('-') for name in queryset.query.order_by if isinstance(name, str)
+        }
+        related = set()
+        for field in self.fields.values():
+            if field.source == '*':
+                continue
+            if len(field.source_attrs) > 1:
+                related.add(field.source_attrs[0])
+            columns.add('__'.join(field.source_attrs))
+        if related:
+            queryset = queryset.select_related(*related)
+        return queryset.only(*columns)
+
 
 class CategorySerializer(serializers.ModelSerializer):
     class Meta:
         model = Category
         fields = '__all__'
-class JobSerializer(serializers.ModelSerializer):
+
+class JobSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """
     Standard Job Serializer for listing and creating jobs.
     """
@@ -18,13 +65,107 @@ class JobSerializer(serializers.ModelSerializer):
         fields = (
             'id', 'employer', 'employer_name', 'category', 'category_name',
             'title', 'description', 'location', 'salary', 'job_type', 
-            'company_logo', 'created_at', 'is_active'
+            'company_logo', 'created_at', 'is_active', 'views'
         )
         # Important: 'employer' is read-only so users cannot fake it
-        read_only_fields = ('employer', 'created_at')
+        read_only_fields = ('employer', 'created_at', 'views')
+
+
+class JobCardSerializer(JobSerializer):
+    """
+    Compact job for lists: the description is cut to CARD_DESCRIPTION_LENGTH
+    characters by the database, so the full text is never fetched.
+    """
+    description = serializers.SerializerMethodField()
+
+    def get_description(self, job):
+        excerpt = job.description_excerpt
+        if len(excerpt) <= CARD_DESCRIPTION_LENGTH:
+            return excerpt
+        # The ellipsis counts towards the length
+        return excerpt[:CARD_DESCRIPTION_LENGTH - 1].rstrip() + '\u2026'
+
+    def narrow_queryset(self, queryset):
+        queryset = super().narrow_queryset(queryset)
+        if 'description' in self.fields:
+            # One character more tells whether it was cut
+            queryset = queryset.annotate(
+                description_excerpt=Substr('description', 1, CARD_DESCRIPTION_LENGTH + 1)
+            )
+        return queryset
+
+class JobImportSerializer(JobSerializer):
+    """
+    One posting of an ATS feed (see jobs.imports): the JobSerializer rules,
+    keyed by external_id, with the category given by slug. Slugs are looked
+    up in context['categories'] rather than with a query per posting.
+    """
+    external_id = serializers.CharField(max_length=255)
+    category = serializers.CharField(required=False, allow_null=True)
+
+    class Meta(JobSerializer.Meta):
+        fields = ('external_id', 'category', 'title', 'description', 'location', 'salary', 'job_type')
+
+    def validate_category(self, value):
+        if not value:
+            return None
+        try:
+            return self.context['categories'][value]
+        except KeyError:
+            raise serializers.ValidationError(f'Unknown category "{value}".')
 
 class ApplicationSerializer(serializers.ModelSerializer):
     class Meta:
         model = Application
         fields = ('id', 'job', 'applicant', 'resume', 'cover_letter', 'status', 'applied_at')
-        read_only_fields = ('applicant', 'status', 'applied_at')
\ No newline at end of file
+        read_only_fields = ('applicant', 'status', 'applied_at')
+
+class ApplicationSubmitSerializer(serializers.ModelSerializer):
+    """
+    Input of POST /api/jobs/{id}/apply/, the job comes from the URL.
+    """
+    class Meta:
+        model = Application
+        fields = ('resume', 'cover_letter')
+
+class ApplicationStatusBulkSerializer(serializers.Serializer):
+    """
+    Input of POST /api/jobs/{id}/applications/status/: the applications to
+    move are those listed in `ids`, those in `from_status`, or both.
+    """
+    status = serializers.ChoiceField(choices=Application.STATUS_CHOICES)
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), required=False,
+        allow_empty=False, max_length=settings.APPLICATION_BULK_MAX_IDS,
+    )
+    from_status = serializers.ChoiceField(choices=Application.STATUS_CHOICES, required=False)
+
+    def validate(self, attrs):
+        if 'ids' not in attrs and 'from_status' not in attrs:
+            raise serializers.ValidationError("Pass ids, from_status or both.")
+        if 'ids' in attrs:
+            attrs['ids'] = sorted(set(attrs['ids']))
+        return attrs
+
+class SavedSearchSerializer(serializers.ModelSerializer):
+    """
+    A job alert of the logged-in applicant; see jobs.alerts for matching.
+    """
+    class Meta:
+        model = SavedSearch
+        fields = ('id', 'category', 'job_type', 'location', 'keywords', 'salary_min', 'created_at')
+        read_only_fields = ('created_at',)
+
+    def validate(self, attrs):
+        criteria = {
+            field: attrs.get(field, getattr(self.instance, field, None))
+            for field in ('category', 'job_type', 'location', 'keywords', 'salary_min')
+        }
+        if not any(value not in (None, '') for value in criteria.values()):
+            raise serializers.ValidationError("Set at least one criterion.")
+        attrs['anchor'] = anchor_for(
+            criteria['keywords'], criteria['location'],
+            criteria['category'].pk if criteria['category'] else None, criteria['job_type'],
+            criteria['salary_min'],
+        )
+        return attrs
@@ -0,0 +1,224 @@
+import bisect
+import heapq
+import sys
+import threading
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.db import connections
+from django.db.models import Count, Min
+from django.db.models.functions import Lower, Trim
+from .models import Job
+
+SUGGEST_FIELDS = ('title', 'location')
+
+# Prefixes up to this length get a precomputed top-k list, longer prefixes
+# match few enough terms to rank with a bounded range scan.
+SHORT_PREFIX_LENGTH = 2
+MAX_RESULTS = 10
+MAX_SCAN = 2000
+
+# Rows updated this close to the watermark are re-read on the next refresh,
+# in case a transaction committed after a newer one.
+WATERMARK_OVERLAP = timedelta(seconds=5)
+
+
+def normalize(value):
+    return (value or '').strip().lower()
+
+
+class PrefixIndex:
+    """
+    Immutable sorted array of normalized terms, ranked by number of active jobs.
+    """
+
+    def __init__(self, terms):
+        # terms: {key: (display, count)}
+        self.keys = sorted(terms)
+        self.displays = [terms[key][0] for key in self.keys]
+        self.counts = [terms[key][1] for key in self.keys]
+
+        top = {}
+        for i, key in enumerate(self.keys):
+            for length in range(1, min(len(key), SHORT_PREFIX_LENGTH) + 1):
+                heap = top.setdefault(key[:length], [])
+                item = (self.counts[i], -i)
+                if len(heap) < MAX_RESULTS:
+                    heapq.heappush(heap, item)
+                elif item > heap[0]:
+                    heapq.heapreplace(heap, item)
+        self.top = {
+            prefix: [-i for _, i in sorted(heap, reverse=True)] for prefix, heap in top.items()
+        }
+
+    def lookup(self, prefix, limit=MAX_RESULTS):
+        if len(prefix) <= SHORT_PREFIX_LENGTH:
+            indices = self.top.get(prefix, [])[:limit]
+        else:
+            lo = bisect.bisect_left(self.keys, prefix)
+            hi = bisect.bisect_left(
+                self.keys, prefix + '\uffff', lo, min(len(self.keys), lo + MAX_SCAN)
+            )
+            indices = heapq.nlargest(limit, range(lo, hi), key=lambda i: (self.counts[i], -i))
+        return [{'value': self.displays[i], 'count': self.counts[i]} for i in indices]
+
+
+class SuggestIndex:
+    """
+    Per-process typeahead index over distinct titles & locations of active jobs.
+
+    The index is refreshed at most every SUGGEST_REFRESH_SECONDS from the
+    Job.updated_at watermark: rows changed since the last refresh (and not
+    already applied) move their job from its previous term to its current one,
+    and only those terms are recounted. Every SUGGEST_FULL_REBUILD_SECONDS the
+    index is rebuilt in a background thread, trimming each field back to its
+    SUGGEST_MAX_TERMS most frequent terms; lookups are served from the previous
+    index until the new one is swapped in. The first build of a process is
+    done by the lookup that needs it (concurrent ones wait for it) rather than
+    serving empty suggestions meanwhile.
+
+    Besides the terms, each process keeps job_keys: two dict entries (title
+    and location key) per active job, ~150 bytes each with their strings, so
+    ~0.3 GB per process at a million active jobs.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.terms = {field: {} for field in SUGGEST_FIELDS}
+        self.indexes = {field: PrefixIndex({}) for field in SUGGEST_FIELDS}
+        # {field: {job_id: key}} of every active job, to recount the term a
+        # changed job leaves
+        self.job_keys = {field: {} for field in SUGGEST_FIELDS}
+        # {job_id: updated_at} of the applied rows inside the overlap window
+        self.seen = {}
+        self.watermark = None
+        self.checked_at = 0.0
+        self.rebuilt_at = 0.0
+
+    def lookup(self, field, prefix, limit=MAX_RESULTS):
+        self.refresh()
+        return self.indexes[field].lookup(normalize(prefix), limit)
+
+    def refresh(self):
+        if self.watermark is None:
+            with self._lock:
+                if self.watermark is None:
+                    self.rebuild()
+                    self.checked_at = time.monotonic()
+            return
+        now = time.monotonic()
+        if now - self.checked_at < settings.SUGGEST_REFRESH_SECONDS:
+            return
+        # Only one thread refreshes, the others keep serving the current index
+        if not self._lock.acquire(blocking=False):
+            return
+        in_background = False
+        try:
+            if now - self.rebuilt_at >= settings.SUGGEST_FULL_REBUILD_SECONDS:
+                # The thread releases the lock once the new index is in place
+                threading.Thread(target=self._rebuild_in_background, name='suggest-rebuild', daemon=True).start()
+                in_background = True
+            else:
+                self._apply_changes()
+            self.checked_at = now
+        finally:
+            if not in_background:
+                self._lock.release()
+
+    def _rebuild_in_background(self):
+        try:
+            self.rebuild()
+        finally:
+            connections.close_all()
+            self._lock.release()
+
+    def _term_counts(self, field, queryset):
+        return {
+            row['key']: (row['display'], row['total'])
+            for row in queryset.filter(is_active=True)
+            .annotate(key=Lower(Trim(field)))
+            .values('key')
+            .annotate(display=Min(field), total=Count('id'))
+        }
+
+    def rebuild(self):
+        """
+        Reads the terms of every active job and swaps them in. Called with the
+        lock held, or before the index serves (tests).
+        """
+        latest = Job.objects.order_by('-updated_at').values_list('updated_at', flat=True).first()
+        overlap_start = latest - WATERMARK_OVERLAP if latest else None
+        job_keys = {field: {} for field in SUGGEST_FIELDS}
+        counts = {field: {} for field in SUGGEST_FIELDS}
+        seen = {}
+        rows = (
+            Job.objects.filter(is_active=True)
+            .annotate(**{f'{field}_key': Lower(Trim(field)) for field in SUGGEST_FIELDS})
+            .values_list('id', 'updated_at', *(name for field in SUGGEST_FIELDS for name in (field, f'{field}_key')))
+        )
+        for job_id, updated_at, *values in rows.iterator(chunk_size=5000):
+            if overlap_start and updated_at >= overlap_start:
+                seen[job_id] = updated_at
+            for position, field in enumerate(SUGGEST_FIELDS):
+                display, key = values[2 * position], sys.intern(values[2 * position + 1])
+                job_keys[field][job_id] = key
+                term = counts[field].get(key)
+                counts[field][key] = (min(term[0], display), term[1] + 1) if term else (display, 1)
+
+        terms = {
+            field: dict(heapq.nlargest(
+                settings.SUGGEST_MAX_TERMS, counts[field].items(), key=lambda item: item[1][1]
+            ))
+            for field in SUGGEST_FIELDS
+        }
+        indexes = {field: PrefixIndex(terms[field]) for field in SUGGEST_FIELDS}
+        self.terms, self.job_keys, self.seen, self.watermark = terms, job_keys, seen, latest
+        self.indexes = indexes
+        self.rebuilt_at = time.monotonic()
+
+    def _apply_changes(self):
+        changed = list(
+            Job.objects.filter(updated_at__gte=self.watermark - WATERMARK_OVERLAP)
+            .annotate(**{f'{field}_key': Lower(Trim(field)) for field in SUGGEST_FIELDS})
+            .values_list('id', 'updated_at', 'is_active', *(f'{field}_key' for field in SUGGEST_FIELDS))
+        )
+        if not changed:
+            return
+        # Rows re-read through the overlap window are only applied once
+        fresh = [row for row in changed if self.seen.get(row[0]) != row[1]]
+        self.watermark = max(self.watermark, max(row[1] for row in changed))
+        overlap_start = self.watermark - WATERMARK_OVERLAP
+        self.seen = {row[0]: row[1] for row in changed if row[1] >= overlap_start}
+
+        for position, field in enumerate(SUGGEST_FIELDS, start=3):
+            job_keys = self.job_keys[field]
+            keys = set()
+            for row in fresh:
+                job_id = row[0]
+                old, new = job_keys.get(job_id), row[position] if row[2] else None
+                if old == new:
+                    continue
+                keys.update(key for key in (old, new) if key is not None)
+                if new is None:
+                    del job_keys[job_id]
+                else:
+                    job_keys[job_id] = sys.intern(new)
+            if not keys:
+                continue
+            affected = Job.objects.annotate(term=Lower(Trim(field))).filter(term__in=keys)
+            counts = self._term_counts(field, affected)
+            terms = dict(self.terms[field])
+            for key in keys:
+                if key in counts:
+                    terms[key] = counts[key]
+                else:
+                    terms.pop(key, None)
+            if terms != self.terms[field]:
+                self.terms[field] = terms
+                self.indexes = {**self.indexes, field: PrefixIndex(terms)}
+
+
+suggest_index = SuggestIndex()
@@ -0,0 +1,80 @@
+import tempfile
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import override_settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from PIL import Image
+from core import metrics
+from ..models import Job, Category
+from ..suggest import suggest_index
+from ..recommendations import recommendation_index
+from ..counters import job_views
+
+User = get_user_model()
+
+
+class JobAPITestCase(APITestCase):
+    """
+    Users, categories & a job shared by the API tests, with the in-process
+    caches and indexes reset before each test.
+    """
+    def setUp(self):
+        # Uploads go to a throwaway MEDIA_ROOT, never the working tree
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=media_root.name))
+        cache.clear()
+        metrics.reset()
+        suggest_index.reset()
+        job_views.reset()
+        recommendation_index.reset()
+
+        # --- 1. Users Setup ---
+        self.employer = User.objects.create_user(
+            email='employer@test.com', password='password123', role='employer'
+        )
+        self.other_employer = User.objects.create_user(
+            email='other@test.com', password='password123', role='employer'
+        )
+        self.applicant = User.objects.create_user(
+            email='applicant@test.com', password='password123', role='applicant'
+        )
+        self.admin = User.objects.create_superuser(
+            email='admin@test.com', password='password123'
+        )
+
+        # --- 2. Data Setup ---
+        self.category_tech = Category.objects.create(name='Technology', slug='tech')
+        self.category_marketing = Category.objects.create(name='Marketing', slug='marketing')
+
+        # Create a dummy image for testing uploads
+        image = Image.new('RGB', (100, 100))
+        self.tmp_file = tempfile.NamedTemporaryFile(suffix='.jpg')
+        image.save(self.tmp_file)
+        self.tmp_file.seek(0)
+        self.test_image = SimpleUploadedFile("logo.jpg", self.tmp_file.read(), content_type="image/jpeg")
+
+        # Create an initial Job (Owned by self.employer)
+        self.job = Job.objects.create(
+            employer=self.employer,
+            category=self.category_tech,
+            title='Senior Python Developer',
+            description='We need a Django expert.',
+            location='New York, NY',
+            salary=150000,
+            job_type='FT',
+            is_active=True
+        )
+
+        # Define URLs
+        self.list_url = reverse('job_list_create')       # /api/jobs/
+        self.detail_url = reverse('job_detail', args=[self.job.id]) # /api/jobs/{id}/
+
+    def tearDown(self):
+        # Clean up temporary files
+        self.tmp_file.close()
+
+    def _resume(self):
+        return SimpleUploadedFile("resume.pdf", b"%PDF-1.4 resume", content_type="application/pdf")
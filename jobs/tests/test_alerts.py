@@ -0,0 +1,97 @@
+from unittest import mock
+from django.urls import reverse
+from rest_framework import status
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from core.models import OutboxMessage
+from .. import alerts
+from ..alerts import MATCH_ALL, anchor_for, job_terms, match_jobs, queue_alerts
+from ..models import Job, SavedSearch
+from .base import JobAPITestCase
+
+User = get_user_model()
+
+
+class SavedSearchTests(JobAPITestCase):
+    """
+    Saved searches & job alerts
+    """
+    def test_applicant_saves_searches(self):
+        url = reverse('saved_search_list')
+        self.client.force_authenticate(user=self.applicant)
+        response = self.client.post(url, {'keywords': 'Python Django', 'category': self.category_tech.pk})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        # No active job has "django" in its title yet
+        self.assertEqual(SavedSearch.objects.get().anchor, 'kw:django')
+        search_url = reverse('saved_search_detail', args=[response.data['id']])
+        response = self.client.post(url, {})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.patch(search_url, {'keywords': ''})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(SavedSearch.objects.get().anchor, f'cat:{self.category_tech.pk}')
+
+        self.client.force_authenticate(user=self.employer)
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_new_job_alerts_matching_searches(self):
+        def search(user, **criteria):
+            criteria.setdefault('keywords', '')
+            criteria['anchor'] = anchor_for(
+                criteria['keywords'], criteria.get('location', ''),
+                criteria['category'].pk if criteria.get('category') else None, criteria.get('job_type', ''),
+                criteria.get('salary_min'),
+            )
+            return SavedSearch.objects.create(user=user, **criteria)
+
+        other = User.objects.create_user(email='other-applicant@test.com', role='applicant')
+        search(self.applicant, keywords='python', category=self.category_tech)
+        search(self.applicant, keywords='developer', salary_min=100000)
+        search(other, location='new york', job_type='FT')
+        search(other, keywords='python', salary_min=200000)
+        search(other, keywords='python', category=self.category_marketing)
+        search(other, keywords='rust')
+
+        job = Job.objects.create(
+            employer=self.employer, category=self.category_tech, title='Python Developer',
+            description='...', location='New York, NY', salary=150000, job_type='FT',
+        )
+        self.assertEqual(len(list(match_jobs([job]))), 3)
+        self.assertEqual(queue_alerts(job), 2)
+        self.assertEqual(
+            sorted(OutboxMessage.objects.filter(kind='job_alert').values_list('recipient', flat=True)),
+            ['applicant@test.com', 'other-applicant@test.com'],
+        )
+
+    def test_searches_are_anchored_on_their_rarest_criterion(self):
+        for title in ('Python Developer', 'Python Engineer', 'Rust Developer'):
+            Job.objects.create(employer=self.employer, title=title, location='Remote', salary=60000, job_type='CT')
+        self.assertEqual(anchor_for('python developer'), 'kw:developer')
+        self.assertEqual(anchor_for('rust developer'), 'kw:rust')
+        self.assertEqual(anchor_for(job_type='FT'), 'type:FT')
+        self.assertEqual(anchor_for(), MATCH_ALL)
+        # Salaries are anchored on their band, alone or with the job type
+        self.assertEqual(anchor_for(salary_min=130000), 'sal:120000')
+        self.assertEqual(anchor_for(job_type='CT', salary_min=55000), 'CT:sal:50000')
+
+    def test_jobs_only_load_searches_of_their_salary_bands(self):
+        SavedSearch.objects.create(user=self.applicant, salary_min=200000, anchor=anchor_for(salary_min=200000))
+        SavedSearch.objects.create(user=self.applicant, salary_min=160000, anchor=anchor_for(salary_min=160000))
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(list(match_jobs([self.job])), [])
+        self.assertEqual(len(queries), 1)
+        # Only the search of the job's own band (150000+) is a candidate
+        self.assertEqual(
+            list(SavedSearch.objects.filter(anchor__in=job_terms(self.job, set(), set())).values_list('salary_min', flat=True)),
+            [160000],
+        )
+
+    def test_job_creation_percolates_after_commit(self):
+        self.client.force_authenticate(user=self.employer)
+        data = {"title": "Go Engineer", "description": "Build services", "location": "Remote", "job_type": "FT"}
+        with mock.patch.object(alerts.executor, 'submit') as submit, \
+                self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(self.list_url, data)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        submit.assert_called_once_with(alerts.percolate_job, response.data['id'])
@@ -0,0 +1,139 @@
+from unittest import mock
+from datetime import timedelta
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, connection
+from django.test.utils import CaptureQueriesContext
+from core.models import IdempotencyKey, OutboxMessage
+from ..models import Job, Application
+from .base import JobAPITestCase
+
+User = get_user_model()
+
+
+class ApplicationTests(JobAPITestCase):
+    # ----------------------------------------------------------------
+    # 1. POST /api/jobs/{id}/apply/ - APPLICANT ONLY
+    # ----------------------------------------------------------------
+    def test_applicant_can_apply_once(self):
+        """A second application to the same job is rejected without a 500."""
+        self.client.force_authenticate(user=self.applicant)
+        apply_url = reverse('job_apply', args=[self.job.id])
+        response = self.client.post(apply_url, {"resume": self._resume(), "cover_letter": "Hi"})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['status'], 'pending')
+
+        response = self.client.post(apply_url, {"resume": self._resume()})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Application.objects.count(), 1)
+
+    def test_idempotency_key_replays_original_response(self):
+        """Retrying with the same Idempotency-Key returns the first response."""
+        self.client.force_authenticate(user=self.applicant)
+        apply_url = reverse('job_apply', args=[self.job.id])
+        first = self.client.post(apply_url, {"resume": self._resume()}, HTTP_IDEMPOTENCY_KEY='abc')
+        replay = self.client.post(apply_url, {"resume": self._resume()}, HTTP_IDEMPOTENCY_KEY='abc')
+        self.assertEqual(replay.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(replay.data, first.data)
+        self.assertEqual(replay['Idempotent-Replayed'], 'true')
+        self.assertEqual(Application.objects.count(), 1)
+
+        # The same key can't be reused for another request
+        other_url = reverse('job_apply', args=[Job.objects.create(
+            employer=self.employer, title='Other', location='Remote').id])
+        response = self.client.post(other_url, {"resume": self._resume()}, HTTP_IDEMPOTENCY_KEY='abc')
+        self.assertEqual(response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+
+    def test_idempotency_key_lease_expires(self):
+        """A key left in flight by a dead worker is taken over once its lease ends."""
+        self.client.force_authenticate(user=self.applicant)
+        apply_url = reverse('job_apply', args=[self.job.id])
+        self.client.post(apply_url, {"resume": self._resume()}, HTTP_IDEMPOTENCY_KEY='abc')
+        # The worker died before storing its response
+        Application.objects.all().delete()
+        IdempotencyKey.objects.update(status_code=None, response_body=None)
+
+        response = self.client.post(apply_url, {"resume": self._resume()}, HTTP_IDEMPOTENCY_KEY='abc')
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
+        IdempotencyKey.objects.update(created_at=timezone.now() - timedelta(minutes=5))
+        response = self.client.post(apply_url, {"resume": self._resume()}, HTTP_IDEMPOTENCY_KEY='abc')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(IdempotencyKey.objects.get().status_code, status.HTTP_201_CREATED)
+
+    def test_idempotency_key_released_during_claim(self):
+        """A key the first request gives up between our insert and lookup is claimed again."""
+        self.client.force_authenticate(user=self.applicant)
+        create = IdempotencyKey.objects.create
+        calls = []
+
+        def collide_once(**kwargs):
+            # The first insert collides with a record that is gone by the lookup
+            calls.append(kwargs['key'])
+            if len(calls) == 1:
+                raise IntegrityError('duplicate key value violates unique constraint')
+            return create(**kwargs)
+
+        with mock.patch.object(IdempotencyKey.objects, 'create', side_effect=collide_once):
+            response = self.client.post(
+                reverse('job_apply', args=[self.job.id]), {"resume": self._resume()}, HTTP_IDEMPOTENCY_KEY='abc'
+            )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(calls, ['abc', 'abc'])
+        self.assertEqual(Application.objects.count(), 1)
+
+    def test_employer_cannot_apply(self):
+        self.client.force_authenticate(user=self.employer)
+        response = self.client.post(reverse('job_apply', args=[self.job.id]), {"resume": self._resume()})
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    # ----------------------------------------------------------------
+    # 2. Bulk application status changes
+    # ----------------------------------------------------------------
+    def test_employer_rejects_pending_applications_in_bulk(self):
+        applicants = [
+            User.objects.create_user(email=f'candidate{i}@test.com', role='applicant') for i in range(4)
+        ]
+        applications = [
+            Application.objects.create(job=self.job, applicant=applicant, resume='resumes/cv.pdf')
+            for applicant in applicants
+        ]
+        other_job = Job.objects.create(employer=self.other_employer, title='Other', location='Remote')
+        elsewhere = Application.objects.create(job=other_job, applicant=self.applicant, resume='resumes/cv.pdf')
+        url = reverse('job_application_status', args=[self.job.id])
+
+        self.client.force_authenticate(user=self.employer)
+        ids = [applications[0].pk, elsewhere.pk]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(url, {'status': 'accepted', 'ids': ids}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['ids'], [applications[0].pk])
+        updates = [q['sql'] for q in queries.captured_queries if q['sql'].lstrip().startswith('UPDATE')]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(Application.objects.get(pk=elsewhere.pk).status, 'pending')
+
+        response = self.client.post(url, {'status': 'rejected', 'from_status': 'pending'}, format='json')
+        self.assertEqual(response.data['updated'], 3)
+        self.assertEqual(
+            dict(Application.objects.filter(job=self.job).values_list('applicant__email', 'status')),
+            {'candidate0@test.com': 'accepted', 'candidate1@test.com': 'rejected',
+             'candidate2@test.com': 'rejected', 'candidate3@test.com': 'rejected'},
+        )
+        # Nothing left to reject: no change, no email
+        response = self.client.post(url, {'status': 'rejected', 'from_status': 'pending'}, format='json')
+        self.assertEqual(response.data['updated'], 0)
+        self.assertEqual(OutboxMessage.objects.filter(kind='application_status').count(), 4)
+        self.assertIn('accepted', OutboxMessage.objects.get(recipient='candidate0@test.com').body)
+
+    def test_bulk_status_change_requires_the_job_owner(self):
+        url = reverse('job_application_status', args=[self.job.id])
+        data = {'status': 'rejected', 'from_status': 'pending'}
+        self.client.force_authenticate(user=self.other_employer)
+        self.assertEqual(self.client.post(url, data, format='json').status_code, status.HTTP_403_FORBIDDEN)
+        self.client.force_authenticate(user=self.applicant)
+        self.assertEqual(self.client.post(url, data, format='json').status_code, status.HTTP_403_FORBIDDEN)
+        self.client.force_authenticate(user=self.employer)
+        response = self.client.post(url, {'status': 'rejected'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,101 @@
+from unittest import skipUnless
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITransactionTestCase
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db import DEFAULT_DB_ALIAS, connections
+from ..models import Job
+from ..changes import changes_since
+from ..counters import job_views
+
+User = get_user_model()
+
+
+@skipUnless(connection.vendor == 'postgresql', 'The change triggers are PostgreSQL specific')
+class JobChangeFeedTests(APITransactionTestCase):
+    """
+    GET /api/jobs/changes/ - PUBLIC
+    Every request has to commit for the change feed to move past it, so these
+    run outside a test transaction.
+    """
+    def setUp(self):
+        self.employer = User.objects.create_user(email='employer@test.com', role='employer')
+        self.job = Job.objects.create(employer=self.employer, title='First', location='Remote')
+        self.url = reverse('job_changes')
+
+    def changes(self, response):
+        return [(change['id'], change['change']) for change in response.data['results']]
+
+    def test_change_feed_follows_updates_and_deletes(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.changes(response), [(self.job.id, 'upsert')])
+        cursor = response.data['next']
+        response = self.client.get(self.url, {'since': cursor})
+        self.assertEqual((response.data['results'], response.data['next']), ([], cursor))
+
+        self.client.force_authenticate(user=self.employer)
+        detail_url = reverse('job_detail', args=[self.job.id])
+        self.client.patch(detail_url, {"is_active": False}, format='json')
+        response = self.client.get(self.url, {'since': cursor})
+        self.assertEqual(self.changes(response), [(self.job.id, 'deactivated')])
+        self.assertFalse(response.data['results'][0]['job']['is_active'])
+        cursor = response.data['next']
+
+        self.client.delete(detail_url)
+        response = self.client.get(self.url, {'since': cursor})
+        self.assertEqual(response.data['results'], [{"id": self.job.id, "change": "deleted", "job": None}])
+
+    def test_view_count_flush_is_not_a_change(self):
+        cursor = self.client.get(self.url).data['next']
+        job_views.record(self.job.pk)
+        job_views.flush()
+        # Nor is a write of columns the feed doesn't serve
+        Job.objects.filter(pk=self.job.pk).update(external_id='feed-1', updated_at=timezone.now())
+        response = self.client.get(self.url, {'since': cursor})
+        self.assertEqual(response.data['results'], [])
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.views, 1)
+
+        Job.objects.filter(pk=self.job.pk).update(title='First, edited')
+        response = self.client.get(self.url, {'since': cursor})
+        self.assertEqual(self.changes(response), [(self.job.id, 'upsert')])
+
+    def test_change_feed_pages(self):
+        for i in range(3):
+            Job.objects.create(employer=self.employer, title=f'Job {i}', location='Remote')
+        response = self.client.get(self.url, {'limit': 2})
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertTrue(response.data['has_more'])
+        response = self.client.get(self.url, {'limit': 2, 'since': response.data['next']})
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertFalse(response.data['has_more'])
+
+        response = self.client.get(self.url, {'since': 'nonsense'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @skipUnless(connection.vendor == 'postgresql', 'Transaction id horizon is PostgreSQL specific')
+    def test_feed_waits_for_in_flight_transactions(self):
+        """A change committed after a later one must not be skipped by cursors."""
+        first = self.job
+
+        other = connections.create_connection(DEFAULT_DB_ALIAS)
+        try:
+            other.set_autocommit(False)
+            with other.cursor() as cursor:
+                cursor.execute("UPDATE jobs_job SET title = 'First, edited' WHERE id = %s", [first.id])
+            second = Job.objects.create(employer=self.employer, title='Second', location='Remote')
+
+            changes, cursor, _ = changes_since(None)
+            self.assertEqual([(pk, job.title) for _, pk, job in changes], [(first.id, 'First')])
+
+            other.commit()
+            changes, _, _ = changes_since(cursor)
+            self.assertEqual(
+                sorted((pk, job.title) for _, pk, job in changes),
+                [(first.id, 'First, edited'), (second.id, 'Second')],
+            )
+        finally:
+            other.close()
@@ -0,0 +1,60 @@
+from unittest import mock
+from django.urls import reverse
+from django.db import DatabaseError, connection, transaction
+from django.test.utils import CaptureQueriesContext
+from ..models import Job
+from ..counters import job_views
+from .base import JobAPITestCase
+
+
+class ViewCounterTests(JobAPITestCase):
+    """
+    Buffered view counters
+    """
+    def test_views_are_counted_in_memory_and_flushed(self):
+        other = Job.objects.create(employer=self.employer, title='Other', location='Remote')
+        with self.assertNumQueries(3):
+            for _ in range(3):
+                self.client.get(self.detail_url)
+        self.client.get(reverse('job_detail', args=[other.pk]))
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.views, 0)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(job_views.flush(), 4)
+        self.assertEqual(sum('UPDATE' in query['sql'] for query in queries), 1)
+        self.assertEqual(self.client.get(self.detail_url).data['views'], 3)
+        other.refresh_from_db()
+        self.assertEqual(other.views, 1)
+
+    def test_saving_a_stale_job_keeps_its_views(self):
+        stale = Job.objects.get(pk=self.job.pk)
+        job_views.record(self.job.pk)
+        job_views.flush()
+        stale.title = 'Renamed'
+        stale.save()
+        self.job.refresh_from_db()
+        self.assertEqual((self.job.title, self.job.views), ('Renamed', 1))
+
+        # An explicit update_fields or force_insert is left alone
+        stale.title, stale.location = 'Renamed again', 'Lisbon'
+        stale.save(update_fields=['title'])
+        self.job.refresh_from_db()
+        self.assertEqual((self.job.title, self.job.location), ('Renamed again', 'New York, NY'))
+        pk = stale.pk
+        Job.objects.filter(pk=pk).delete()
+        with self.assertRaises(DatabaseError), transaction.atomic():
+            stale.save()
+        stale.save(force_insert=True)
+        self.assertEqual(Job.objects.get(pk=pk).title, 'Renamed again')
+        # Copying a job by clearing its pk inserts a new one
+        stale.pk = None
+        stale.save()
+        self.assertNotEqual(stale.pk, pk)
+
+    def test_failed_flush_keeps_the_counts(self):
+        job_views.record(self.job.pk)
+        with mock.patch('jobs.counters.write_views', side_effect=DatabaseError), \
+                self.assertLogs('jobs.counters', 'ERROR'):
+            self.assertEqual(job_views.flush(), 0)
+        self.assertEqual(job_views.flush(), 1)
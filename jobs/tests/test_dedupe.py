@@ -0,0 +1,80 @@
+import numpy as np
+from io import StringIO
+from rest_framework import status
+from django.core.management import call_command
+from ..models import Job, JobSignature, JobSignatureBand
+from ..dedupe import BANDS, index_jobs
+from .base import JobAPITestCase
+
+
+class NearDuplicateTests(JobAPITestCase):
+    """
+    Near-duplicate postings
+    """
+    def test_near_duplicate_posting_is_rejected(self):
+        """Reposting the same job with a tiny edit is rejected for the same employer."""
+        self.client.force_authenticate(user=self.employer)
+        data = {
+            "title": "Backend Engineer",
+            "description": "Build and scale our Django REST APIs, own the PostgreSQL schema, "
+                           "review pull requests and mentor junior engineers in the team.",
+            "category": self.category_tech.id,
+            "location": "Remote",
+        }
+        first = self.client.post(self.list_url, data, format='json')
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+
+        data["description"] += " Apply now!"
+        response = self.client.post(self.list_url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(str(response.data['duplicate_of']), str(first.data['id']))
+
+        # Another employer may post a similar job
+        self.client.force_authenticate(user=self.other_employer)
+        response = self.client.post(self.list_url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_cluster_duplicate_jobs_command(self):
+        """The batch command groups existing reposts and rebuilds the side tables."""
+        for _ in range(2):
+            Job.objects.create(
+                employer=self.employer, category=self.category_tech,
+                title=self.job.title, description=self.job.description, location='Remote'
+            )
+        out = StringIO()
+        call_command('cluster_duplicate_jobs', '--workers=1', '--reindex', stdout=out)
+        self.assertIn('1 clusters, 2 redundant postings', out.getvalue())
+        self.assertEqual(JobSignature.objects.count(), 3)
+
+        # Only the new posting's signature is computed; it is another
+        # employer's, so it joins the cluster with --cross-employer only
+        Job.objects.create(
+            employer=self.other_employer, title=self.job.title, description=self.job.description, location='Remote'
+        )
+        out = StringIO()
+        call_command('cluster_duplicate_jobs', '--workers=1', '--chunk-size=2', stdout=out)
+        self.assertIn('  1 jobs', out.getvalue())
+        self.assertIn('1 clusters, 2 redundant postings', out.getvalue())
+        out = StringIO()
+        call_command('cluster_duplicate_jobs', '--workers=1', '--cross-employer', stdout=out)
+        self.assertIn('1 clusters, 3 redundant postings', out.getvalue())
+        self.assertEqual(JobSignatureBand.objects.count(), 4 * BANDS)
+
+    def test_cluster_duplicate_jobs_chains_bucket_members(self):
+        """Two postings of a bucket are joined even when both differ from its first one."""
+        jobs = [
+            Job.objects.create(employer=self.employer, title=f'Posting {i}', location='Remote')
+            for i in range(3)
+        ]
+        # One value per band differs between neighbours in the first 12 bands
+        # (similarity 0.81), two between the first and the last (0.62); only
+        # the last 4 bands hold a bucket shared by the three
+        first = np.zeros(64, dtype=np.uint32)
+        middle, last = first.copy(), first.copy()
+        middle[0:48:4] = last[0:48:4] = 1
+        last[1:48:4] = 2
+        index_jobs([(job.id, self.employer.id, signature) for job, signature in zip(jobs, [first, middle, last])])
+
+        out = StringIO()
+        call_command('cluster_duplicate_jobs', '--workers=1', '--threshold=0.8', stdout=out)
+        self.assertIn('Cluster of 3: ' + ', '.join(str(job.id) for job in jobs), out.getvalue())
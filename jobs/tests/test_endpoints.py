@@ -1,61 +1,9 @@
-import tempfile
-from django.urls import reverse
 from rest_framework import status
-from rest_framework.test import APITestCase
-from django.contrib.auth import get_user_model
-from django.core.files.uploadedfile import SimpleUploadedFile
-from PIL import Image
-from .models import Job, Category
-
-User = get_user_model()
-
-class JobEndpointTests(APITestCase):
-    def setUp(self):
-        # --- 1. Users Setup ---
-        self.employer = User.objects.create_user(
-            email='employer@test.com', password='password123', role='employer'
-        )
-        self.other_employer = User.objects.create_user(
-            email='other@test.com', password='password123', role='employer'
-        )
-        self.applicant = User.objects.create_user(
-            email='applicant@test.com', password='password123', role='applicant'
-        )
-        self.admin = User.objects.create_superuser(
-            email='admin@test.com', password='password123'
-        )
+from ..models import Job
+from .base import JobAPITestCase
 
-        # --- 2. Data Setup ---
-        self.category_tech = Category.objects.create(name='Technology', slug='tech')
-        self.category_marketing = Category.objects.create(name='Marketing', slug='marketing')
-
-        # Create a dummy image for testing uploads
-        image = Image.new('RGB', (100, 100))
-        self.tmp_file = tempfile.NamedTemporaryFile(suffix='.jpg')
-        image.save(self.tmp_file)
-        self.tmp_file.seek(0)
-        self.test_image = SimpleUploadedFile("logo.jpg", self.tmp_file.read(), content_type="image/jpeg")
-
-        # Create an initial Job (Owned by self.employer)
-        self.job = Job.objects.create(
-            employer=self.employer,
-            category=self.category_tech,
-            title='Senior Python Developer',
-            description='We need a Django expert.',
-            location='New York, NY',
-            salary=150000,
-            job_type='FT',
-            is_active=True
-        )
-
-        # Define URLs
-        self.list_url = reverse('job_list_create')       # /api/jobs/
-        self.detail_url = reverse('job_detail', args=[self.job.id]) # /api/jobs/{id}/
-
-    def tearDown(self):
-        # Clean up temporary files
-        self.tmp_file.close()
 
+class JobEndpointTests(JobAPITestCase):
     # ----------------------------------------------------------------
     # 1. GET /api/jobs/ (List & Filter) - PUBLIC
     # ----------------------------------------------------------------
@@ -176,3 +124,51 @@ class JobEndpointTests(APITestCase):
         self.client.force_authenticate(user=self.applicant)
         response = self.client.delete(self.detail_url)
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    # ----------------------------------------------------------------
+    # 6. Salary range & ordering
+    # ----------------------------------------------------------------
+    def _create_salary_jobs(self):
+        for title, salary in (('Intern', 30000), ('Mid Dev', 90000), ('Volunteer', None)):
+            Job.objects.create(
+                employer=self.employer, category=self.category_tech,
+                title=title, location='Remote', salary=salary
+            )
+
+    def test_filter_jobs_by_salary_range(self):
+        """Test ?salary_min= & ?salary_max= query parameters."""
+        self._create_salary_jobs()
+        response = self.client.get(self.list_url, {'salary_min': 50000, 'salary_max': 100000})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([job['title'] for job in response.data], ['Mid Dev'])
+
+    def test_order_jobs_by_salary(self):
+        """Salary orderings skip jobs without a salary."""
+        self._create_salary_jobs()
+        response = self.client.get(self.list_url, {'ordering': 'salary_desc'})
+        self.assertEqual(
+            [job['title'] for job in response.data],
+            ['Senior Python Developer', 'Mid Dev', 'Intern']
+        )
+        response = self.client.get(self.list_url, {'ordering': 'salary_asc'})
+        self.assertEqual(
+            [job['title'] for job in response.data],
+            ['Intern', 'Mid Dev', 'Senior Python Developer']
+        )
+
+    def test_unknown_ordering_is_rejected(self):
+        response = self.client.get(self.list_url, {'ordering': 'title'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_cursor_pagination_follows_ordering(self):
+        """?page_size= switches the list to cursor pages in the requested order."""
+        self._create_salary_jobs()
+        response = self.client.get(self.list_url, {'ordering': 'salary_asc', 'page_size': 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([job['title'] for job in response.data['results']], ['Intern', 'Mid Dev'])
+
+        response = self.client.get(response.data['next'])
+        self.assertEqual(
+            [job['title'] for job in response.data['results']], ['Senior Python Developer']
+        )
+        self.assertIsNone(response.data['next'])
@@ -0,0 +1,152 @@
+import asyncio
+import json
+import select
+import tempfile
+import time
+from unittest import skipUnless
+from asgiref.sync import sync_to_async
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITransactionTestCase
+from rest_framework_simplejwt.tokens import AccessToken
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import override_settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from ..models import Job, Application
+from ..applications import set_statuses, submit_application
+from ..events import Listener, broker, ensure_listening, stop_listening
+
+User = get_user_model()
+
+
+class ApplicationEventTests(APITransactionTestCase):
+    """
+    Application events reach subscribers through the PostgreSQL listener, or
+    the in-process broker on other backends. Runs outside a test transaction
+    because events are only published on commit.
+    """
+    def setUp(self):
+        # Uploads go to a throwaway MEDIA_ROOT, never the working tree
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=media_root.name))
+        self.employer = User.objects.create_user(email='employer@test.com', role='employer')
+        self.applicant = User.objects.create_user(email='applicant@test.com', role='applicant')
+        self.job = Job.objects.create(employer=self.employer, title='Backend', location='Remote')
+        self.loop = asyncio.new_event_loop()
+        listener = ensure_listening()
+        if listener is not None:
+            listener.ready.wait(5)
+
+    def tearDown(self):
+        stop_listening()
+        self.loop.close()
+
+    def next_event(self, subscription):
+        return self.loop.run_until_complete(asyncio.wait_for(subscription.queue.get(), 5))
+
+    def test_subscriber_receives_application_events(self):
+        subscription = broker.subscribe(self.employer.pk, loop=self.loop)
+        try:
+            resume = SimpleUploadedFile("resume.pdf", b"%PDF-1.4", content_type="application/pdf")
+            application = submit_application(self.job, self.applicant, resume)
+            event = self.next_event(subscription)
+            self.assertEqual(
+                (event['event'], event['application'], event['job'], event['status']),
+                ('created', application.pk, self.job.pk, 'pending'),
+            )
+
+            Application.objects.filter(pk=application.pk).update(status='accepted')
+            application.status = 'accepted'
+            if connection.vendor != 'postgresql':
+                # Without the trigger only ORM saves are published
+                application.save()
+            event = self.next_event(subscription)
+            self.assertEqual((event['event'], event['status']), ('updated', 'accepted'))
+        finally:
+            broker.unsubscribe(subscription)
+
+    @skipUnless(connection.vendor == 'postgresql', 'NOTIFY is PostgreSQL specific')
+    def test_bulk_status_change_notifies_in_batches(self):
+        applicants = User.objects.bulk_create([
+            User(email=f'bulk{i}@test.com', role='applicant') for i in range(150)
+        ])
+        Application.objects.bulk_create([
+            Application(job=self.job, applicant=applicant, resume='resumes/cv.pdf') for applicant in applicants
+        ])
+        conn = Listener(broker).connect()
+        try:
+            set_statuses(self.job, 'rejected', from_status='pending')
+            deadline = time.monotonic() + 5
+            while len(conn.notifies) < 2 and time.monotonic() < deadline:
+                select.select([conn], [], [], 0.1)
+                conn.poll()
+            batches = [json.loads(notify.payload) for notify in conn.notifies]
+        finally:
+            conn.close()
+        # One NOTIFY per NOTIFY_BATCH applications, not one per row
+        self.assertEqual([len(batch['applications']) for batch in batches], [100, 50])
+        self.assertEqual({(batch['event'], batch['status']) for batch in batches}, {('updated', 'rejected')})
+
+    def test_bulk_status_change_publishes_each_application(self):
+        subscription = broker.subscribe(self.employer.pk, loop=self.loop)
+        try:
+            applicants = [self.applicant, User.objects.create_user(email='second@test.com', role='applicant')]
+            ids = sorted(
+                Application.objects.create(job=self.job, applicant=applicant, resume='resumes/cv.pdf').pk
+                for applicant in applicants
+            )
+            # Drain the creation events
+            for _ in ids:
+                self.next_event(subscription)
+
+            set_statuses(self.job, 'rejected', from_status='pending')
+            events = [self.next_event(subscription) for _ in ids]
+            self.assertEqual(sorted(event['application'] for event in events), ids)
+            self.assertEqual({(event['event'], event['status']) for event in events}, {('updated', 'rejected')})
+        finally:
+            broker.unsubscribe(subscription)
+
+    def test_slow_subscriber_drops_oldest_events(self):
+        subscription = broker.subscribe(self.employer.pk, loop=self.loop, maxsize=2)
+        for i in range(3):
+            broker.publish({'employer': self.employer.pk, 'application': i})
+        self.loop.run_until_complete(asyncio.sleep(0))
+        self.assertEqual(subscription.dropped, 1)
+        self.assertEqual([self.next_event(subscription)['application'] for _ in range(2)], [1, 2])
+        broker.unsubscribe(subscription)
+        self.assertNotIn(self.employer.pk, broker.subscriptions)
+
+    @override_settings(EVENTS_HEARTBEAT_SECONDS=0.05)
+    async def test_event_stream(self):
+        url = reverse('job_application_events')
+        response = await self.async_client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        token = await sync_to_async(lambda: str(AccessToken.for_user(self.applicant)))()
+        response = await self.async_client.get(url, headers={'Authorization': f'Bearer {token}'})
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        # A JWT isn't accepted in the URL
+        token = await sync_to_async(lambda: str(AccessToken.for_user(self.employer)))()
+        response = await self.async_client.get(url, {'token': token})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        ticket_url = reverse('job_application_event_ticket')
+        response = await self.async_client.post(ticket_url, headers={'Authorization': f'Bearer {token}'})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        ticket = response.json()['ticket']
+        response = await self.async_client.get(url, {'ticket': ticket})
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        # Tickets are single-use
+        replayed = await self.async_client.get(url, {'ticket': ticket})
+        self.assertEqual(replayed.status_code, status.HTTP_401_UNAUTHORIZED)
+        chunks = aiter(response.streaming_content)
+        self.assertEqual(await anext(chunks), b'retry: 5000\n\n')
+        self.assertEqual(await anext(chunks), b': heartbeat\n\n')
+
+        broker.publish({'employer': self.employer.pk, 'application': 7, 'job': self.job.pk})
+        chunk = await anext(chunks)
+        while chunk == b': heartbeat\n\n':
+            chunk = await anext(chunks)
+        self.assertTrue(chunk.startswith(b'id: 7\nevent: application\ndata: '))
+        await chunks.aclose()
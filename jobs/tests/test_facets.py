@@ -0,0 +1,54 @@
+from django.urls import reverse
+from rest_framework import status
+from ..models import Job
+from ..facets import TOP_LOCATIONS
+from .base import JobAPITestCase
+
+
+class JobFacetTests(JobAPITestCase):
+    """
+    GET /api/jobs/facets/ - PUBLIC
+    """
+    def test_facets_count_each_filter(self):
+        """Facets return per-category, job_type & location counts."""
+        Job.objects.create(
+            employer=self.employer, category=self.category_marketing,
+            title='Marketing Manager', location='Boston', job_type='CT'
+        )
+        Job.objects.create(
+            employer=self.employer, category=self.category_tech,
+            title='Old Job', location='Boston', job_type='FT', is_active=False
+        )
+        response = self.client.get(reverse('job_facets'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        categories = {row['name']: row['count'] for row in response.data['category']}
+        self.assertEqual(categories, {'Technology': 1, 'Marketing': 1})
+        job_types = {row['value']: row['count'] for row in response.data['job_type']}
+        self.assertEqual(job_types, {'FT': 1, 'CT': 1})
+        locations = {row['value']: row['count'] for row in response.data['location']}
+        self.assertEqual(locations, {'New York, NY': 1, 'Boston': 1})
+
+    def test_facets_keep_the_top_locations(self):
+        """Only the TOP_LOCATIONS most frequent locations come back, the others facets whole."""
+        for i in range(TOP_LOCATIONS + 2):
+            for _ in range(2 if i < TOP_LOCATIONS - 1 else 1):
+                Job.objects.create(employer=self.employer, title='Engineer', location=f'City {i:02d}')
+        response = self.client.get(reverse('job_facets'))
+        locations = [(row['value'], row['count']) for row in response.data['location']]
+        self.assertEqual(len(locations), TOP_LOCATIONS)
+        self.assertEqual(locations[:TOP_LOCATIONS - 1], [(f'City {i:02d}', 2) for i in range(TOP_LOCATIONS - 1)])
+        self.assertEqual(locations[-1][1], 1)
+        self.assertEqual(sum(row['count'] for row in response.data['job_type']), Job.objects.count())
+
+    def test_facets_apply_list_filters(self):
+        """Facets honour the same filters & search as the list."""
+        Job.objects.create(
+            employer=self.employer, category=self.category_marketing,
+            title='Marketing Manager', location='Boston', job_type='CT'
+        )
+        response = self.client.get(reverse('job_facets'), {'search': 'python'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(row['value'], row['count']) for row in response.data['job_type']], [('FT', 1)]
+        )
@@ -0,0 +1,137 @@
+import tempfile
+from io import BytesIO, StringIO
+from unittest import mock
+from django.urls import reverse
+from rest_framework import status
+from django.core.management import call_command
+from django.test import override_settings
+from .. import alerts
+from ..models import Job, JobSignature, JobSignatureBand
+from ..dedupe import BANDS, find_near_duplicate, minhash
+from ..imports import SizeLimitedStream, import_feed
+from .base import JobAPITestCase
+
+
+class FeedImportTests(JobAPITestCase):
+    """
+    ATS feed imports
+    """
+    def test_feed_import_upserts_and_deactivates_missing_jobs(self):
+        url = reverse('job_import')
+        self.client.force_authenticate(user=self.employer)
+        feed = (
+            'external_id,title,description,location,salary,job_type,category\n'
+            'A1,Backend Engineer,Python APIs,Berlin,90000,FT,tech\n'
+            'A2,Frontend Engineer,React,Berlin,,CT,\n'
+            'A3,,No title,Berlin,,FT,\n'
+            'A4,Designer,Figma,Paris,,FT,design\n'
+        )
+        response = self.client.post(url, feed.encode(), content_type='text/csv')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            {key: response.data[key] for key in ('rows', 'created', 'invalid', 'deactivated')},
+            {'rows': 4, 'created': 2, 'invalid': 2, 'deactivated': 0},
+        )
+        self.assertEqual([error['external_id'] for error in response.data['errors']], ['A3', 'A4'])
+        self.assertIn('title', response.data['errors'][0]['errors'])
+        backend = Job.objects.get(employer=self.employer, external_id='A1')
+        self.assertEqual((backend.category, backend.salary), (self.category_tech, 90000))
+        self.assertTrue(Job.objects.get(pk=self.job.pk).is_active)
+
+        # Replayed with A1 unchanged, A2 edited and A5 new
+        feed = b'\n'.join([
+            b'{"external_id": "A1", "title": "Backend Engineer", "description": "Python APIs",'
+            b' "location": "Berlin", "salary": "90000", "job_type": "FT", "category": "tech"}',
+            b'{"external_id": "A2", "title": "Frontend Engineer", "description": "Vue",'
+            b' "location": "Berlin", "job_type": "CT"}',
+            b'{"external_id": "A5", "title": "SRE", "description": "Kubernetes", "location": "Remote"}',
+        ])
+        response = self.client.post(url, feed, content_type='application/x-ndjson')
+        self.assertEqual(
+            {key: response.data[key] for key in ('created', 'updated', 'unchanged', 'deactivated')},
+            {'created': 1, 'updated': 1, 'unchanged': 1, 'deactivated': 0},
+        )
+        self.assertEqual(Job.objects.get(pk=backend.pk).updated_at, backend.updated_at)
+        self.assertEqual(Job.objects.get(employer=self.employer, external_id='A2').description, 'Vue')
+
+        # A1 and A2 are gone from the feed; jobs posted through the API stay
+        feed = b'[{"external_id": "A5", "title": "SRE", "description": "Kubernetes, Helm", "location": "Remote"}]'
+        response = self.client.post(url, feed, content_type='application/json')
+        self.assertEqual((response.data['updated'], response.data['deactivated']), (1, 2))
+        # Deactivations are stamped after the batches, so no watermark skips them
+        self.assertGreater(
+            Job.objects.get(employer=self.employer, external_id='A1').updated_at,
+            Job.objects.get(employer=self.employer, external_id='A5').updated_at,
+        )
+        self.assertEqual(
+            set(Job.objects.filter(employer=self.employer, is_active=True).values_list('external_id', flat=True)),
+            {None, 'A5'},
+        )
+
+    def test_feed_import_command_and_broken_feeds(self):
+        Job.objects.create(employer=self.employer, external_id='X1', title='Old', location='Remote')
+        feed = (
+            b'<jobs><job><external_id>X2</external_id><title>QA <em>Lead</em></title>'
+            b'<description>Tests</description><location>Remote</location></job>'
+        )
+        with tempfile.NamedTemporaryFile(suffix='.xml') as tmp:
+            tmp.write(feed)
+            tmp.flush()
+            out, err = StringIO(), StringIO()
+            call_command('import_jobs', tmp.name, employer=self.employer.email, stdout=out, stderr=err)
+        # The feed is cut short: X2 is imported, X1 isn't deactivated
+        self.assertIn('Stopped early', err.getvalue())
+        self.assertIn('1 created', out.getvalue())
+        self.assertEqual(Job.objects.get(external_id='X2').title, 'QA Lead')
+        self.assertTrue(Job.objects.get(external_id='X1').is_active)
+
+        self.client.force_authenticate(user=self.employer)
+        url = reverse('job_import')
+        response = self.client.post(url, b'[]', content_type='text/plain')
+        self.assertEqual(response.status_code, status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
+        self.client.force_authenticate(user=self.applicant)
+        response = self.client.post(url, b'[]', content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_feed_import_indexes_and_percolates_each_batch(self):
+        feed = b'\n'.join([
+            b'{"external_id": "B1", "title": "Data Engineer", "description": "Spark pipelines", "location": "Oslo"}',
+            b'{"external_id": "B2", "title": "Data Analyst", "description": "SQL reports", "location": "Oslo"}',
+            b'{"external_id": "B1", "title": "Senior Data Engineer", "description": "Spark pipelines", "location": "Oslo"}',
+            b'{"external_id": "B3", "title": "ML Engineer", "description": "PyTorch models", "location": "Oslo"}',
+        ])
+        with mock.patch.object(alerts.executor, 'submit') as submit, \
+                self.captureOnCommitCallbacks(execute=True):
+            report = import_feed(self.employer, BytesIO(feed), 'ndjson', batch_size=2)
+        # B1 is created by the first batch and updated by the second
+        self.assertEqual((report.created, report.updated), (3, 1))
+        ids = dict(Job.objects.filter(employer=self.employer, external_id__isnull=False).values_list('external_id', 'id'))
+        self.assertEqual(
+            [sorted(call.args[1]) for call in submit.call_args_list],
+            [sorted([ids['B1'], ids['B2']]), [ids['B3']]],
+        )
+        signature = JobSignature.objects.get(job_id=ids['B1']).signature
+        self.assertEqual(bytes(signature), minhash('Senior Data Engineer', 'Spark pipelines').tobytes())
+        self.assertEqual(JobSignatureBand.objects.filter(job_id__in=ids.values()).count(), 3 * BANDS)
+        duplicate, _, _ = find_near_duplicate(self.employer, 'ML Engineer', 'PyTorch models')
+        self.assertEqual(duplicate, ids['B3'])
+
+    def test_feed_import_size_limit(self):
+        self.client.force_authenticate(user=self.employer)
+        feed = b'[{"external_id": "C1", "title": "SRE", "description": "Kubernetes", "location": "Remote"}]'
+        with override_settings(JOB_IMPORT_MAX_BYTES=len(feed) - 1):
+            response = self.client.post(reverse('job_import'), feed, content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        self.assertFalse(Job.objects.filter(external_id='C1').exists())
+
+        # A body whose length isn't announced stops where it crosses the limit
+        Job.objects.create(employer=self.employer, external_id='C0', title='Old', location='Remote')
+        lines = [
+            f'{{"external_id": "C{n}", "title": "SRE", "description": "Kubernetes", "location": "Remote"}}'.encode()
+            for n in range(1, 4)
+        ]
+        stream = SizeLimitedStream(BytesIO(b'\n'.join(lines)), len(lines[0]) * 2)
+        report = import_feed(self.employer, stream, 'ndjson')
+        self.assertIn('larger than', report.aborted)
+        self.assertEqual(report.created, 1)
+        self.assertTrue(Job.objects.get(external_id='C0').is_active)
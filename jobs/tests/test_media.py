@@ -0,0 +1,35 @@
+import os
+import time
+from io import StringIO
+from django.core.management import call_command
+from django.core.files.base import ContentFile
+from ..models import Application
+from .base import JobAPITestCase
+
+
+class MediaGarbageCollectionTests(JobAPITestCase):
+    """
+    Orphaned media garbage collection
+    """
+    def test_gc_media_removes_only_old_unreferenced_files(self):
+        application = Application.objects.create(job=self.job, applicant=self.applicant, resume=self._resume())
+        storage = application.resume.storage
+        orphan = storage.save('resumes/orphans/left-behind.pdf', ContentFile(b'%PDF-1.4'))
+        fresh = storage.save('resumes/orphans/uploading.pdf', ContentFile(b'%PDF-1.4'))
+        old = time.time() - 2 * 24 * 3600
+        os.utime(storage.path(orphan), (old, old))
+        os.utime(storage.path(application.resume.name), (old, old))
+
+        out = StringIO()
+        call_command('gc_media', '--dry-run', stdout=out)
+        self.assertTrue(storage.exists(orphan))
+        self.assertIn('would be removed', out.getvalue())
+
+        call_command('gc_media', '--quarantine', stdout=StringIO())
+        self.assertFalse(storage.exists(orphan))
+        self.assertTrue(storage.exists(f'quarantine/{orphan}'))
+        # Still referenced, or younger than the grace period
+        self.assertTrue(storage.exists(application.resume.name))
+        self.assertTrue(storage.exists(fresh))
+        storage.delete(fresh)
+        storage.delete(f'quarantine/{orphan}')
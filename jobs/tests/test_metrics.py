@@ -0,0 +1,71 @@
+import os
+import re
+import tempfile
+from django.urls import reverse
+from rest_framework import status
+from django.test import override_settings
+from core import metrics
+from .base import JobAPITestCase
+
+
+class MetricsTests(JobAPITestCase):
+    """
+    Runtime metrics (/metrics)
+    """
+    def test_metrics_endpoint(self):
+        self.client.get(self.list_url)
+        facets_url = reverse('job_facets')
+        self.client.get(facets_url)
+        self.client.get(facets_url)
+        self.client.get('/no-such-page/')
+
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        body = response.content.decode()
+        self.assertIn('# TYPE careernode_http_request_duration_seconds histogram', body)
+        self.assertIn(
+            'careernode_http_request_duration_seconds_count{method="GET",route="job_list_create"} 1', body
+        )
+        self.assertIn(
+            'careernode_http_request_duration_seconds_bucket{method="GET",route="job_list_create",le="+Inf"} 1',
+            body,
+        )
+        self.assertIn('careernode_http_requests_total{method="GET",route="job_facets",status="200"} 2', body)
+        self.assertIn('careernode_http_requests_total{method="GET",route="unmatched",status="404"} 1', body)
+        self.assertIn('careernode_cache_lookups_total{cache="job_facets",result="hit"} 1', body)
+        self.assertIn('careernode_cache_lookups_total{cache="job_facets",result="miss"} 1', body)
+        # The scrape itself is in flight
+        self.assertIn('careernode_http_requests_in_flight 1', body)
+        queries = re.search(
+            r'careernode_http_request_db_queries_sum\{route="job_list_create"\} (\d+)', body
+        )
+        self.assertGreater(int(queries.group(1)), 0)
+
+        response = self.client.get('/metrics', REMOTE_ADDR='203.0.113.9')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        with override_settings(METRICS_ALLOWED_IPS=['203.0.113.0/24']):
+            response = self.client.get('/metrics', REMOTE_ADDR='203.0.113.9')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_metrics_add_up_across_processes(self):
+        with tempfile.TemporaryDirectory() as directory, override_settings(METRICS_DIR=directory):
+            metrics.incr('feeds_imported', 3)
+            pid = os.fork()
+            if pid == 0:
+                # A worker that records and exits
+                try:
+                    metrics.incr('feeds_imported', 2)
+                    metrics.observe('import_seconds', 0.3)
+                    metrics.gauge_add('imports_running', 1)
+                finally:
+                    os._exit(0)
+            os.waitpid(pid, 0)
+            metrics.gauge_add('imports_running', 1)
+
+            self.assertEqual(metrics.get('feeds_imported'), 5)
+            body = metrics.render()
+            self.assertIn('careernode_import_seconds_bucket{le="0.25"} 0', body)
+            self.assertIn('careernode_import_seconds_bucket{le="0.5"} 1', body)
+            # Only live processes count towards a gauge
+            self.assertIn('careernode_imports_running 1', body)
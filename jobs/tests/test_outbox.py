@@ -0,0 +1,74 @@
+from io import StringIO
+from unittest import mock
+from django.urls import reverse
+from django.utils import timezone
+from django.core import mail
+from django.core.management import call_command
+from core.models import OutboxMessage
+from .base import JobAPITestCase
+
+
+class OutboxTests(JobAPITestCase):
+    """
+    Outbox email delivery
+    """
+    def test_application_queues_employer_email(self):
+        """Applying queues the notification; send_outbox delivers it."""
+        self.client.force_authenticate(user=self.applicant)
+        self.client.post(reverse('job_apply', args=[self.job.id]), {"resume": self._resume()})
+        message = OutboxMessage.objects.get()
+        self.assertEqual(message.recipient, 'employer@test.com')
+        self.assertEqual(len(mail.outbox), 0)
+
+        call_command('send_outbox', '--once', stdout=StringIO())
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['employer@test.com'])
+        self.assertIsNotNone(OutboxMessage.objects.get().sent_at)
+
+    def test_outbox_coalesces_digest_per_recipient(self):
+        for i in range(3):
+            OutboxMessage.objects.create(
+                kind='application_received', recipient='employer@test.com',
+                subject=f'Update {i}', body='...'
+            )
+        OutboxMessage.objects.create(
+            kind='application_status', recipient='applicant@test.com', subject='Single', body='...'
+        )
+        call_command('send_outbox', '--once', stdout=StringIO())
+        self.assertEqual(len(mail.outbox), 2)
+        digest = next(email for email in mail.outbox if email.to == ['employer@test.com'])
+        self.assertEqual(digest.subject, '3 updates from CareerNode')
+        self.assertIn('Update 2', digest.body)
+        self.assertFalse(OutboxMessage.objects.filter(sent_at__isnull=True).exists())
+
+    def test_outbox_failure_is_retried_with_backoff(self):
+        message = OutboxMessage.objects.create(
+            kind='application_status', recipient='applicant@test.com', subject='S', body='B'
+        )
+        with mock.patch('django.core.mail.backends.locmem.EmailBackend.send_messages',
+                        side_effect=ConnectionError('down')):
+            call_command('send_outbox', '--once', stdout=StringIO())
+        message.refresh_from_db()
+        self.assertEqual(message.attempts, 1)
+        self.assertIsNone(message.sent_at)
+        self.assertIn('down', message.last_error)
+        self.assertGreater(message.available_at, timezone.now())
+
+        # Not due yet, so nothing is sent until the backoff has passed
+        call_command('send_outbox', '--once', stdout=StringIO())
+        self.assertEqual(len(mail.outbox), 0)
+        OutboxMessage.objects.update(available_at=timezone.now())
+        call_command('send_outbox', '--once', stdout=StringIO())
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_outbox_survives_an_smtp_outage(self):
+        message = OutboxMessage.objects.create(
+            kind='application_status', recipient='applicant@test.com', subject='S', body='B'
+        )
+        with mock.patch('django.core.mail.backends.locmem.EmailBackend.open',
+                        side_effect=ConnectionRefusedError('no SMTP')):
+            call_command('send_outbox', '--once', stdout=StringIO())
+        message.refresh_from_db()
+        self.assertEqual((message.attempts, message.sent_at), (1, None))
+        self.assertIn('no SMTP', message.last_error)
+        self.assertGreater(message.available_at, timezone.now())
@@ -0,0 +1,65 @@
+from io import StringIO
+from datetime import timedelta
+from unittest import skipUnless
+from django.utils import timezone
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from ..models import Job, Application, ArchivedJob, ArchivedApplication
+from ..partitions import add_months, month_start
+from .base import JobAPITestCase
+
+
+class PartitionTests(JobAPITestCase):
+    """
+    Partitioned applications & archival of inactive jobs
+    """
+    def test_one_application_per_job_and_applicant(self):
+        """The (job, applicant) guarantee holds on the partitioned table too."""
+        application = Application.objects.create(
+            job=self.job, applicant=self.applicant, resume='resumes/cv.pdf'
+        )
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Application.objects.create(job=self.job, applicant=self.applicant, resume='resumes/cv.pdf')
+
+        # Deleting the application frees the pair again
+        application.delete()
+        Application.objects.create(job=self.job, applicant=self.applicant, resume='resumes/cv.pdf')
+        self.assertEqual(Application.objects.recent(days=1).count(), 1)
+
+    @skipUnless(connection.vendor == 'postgresql', 'Partitions are PostgreSQL specific')
+    def test_manage_partitions_moves_rows_out_of_the_default_partition(self):
+        """A month that filled the default partition gets its own, with its rows."""
+        month = add_months(month_start(timezone.now()), 6)
+        application = Application.objects.create(
+            job=self.job, applicant=self.applicant, resume='resumes/cv.pdf'
+        )
+        Application.objects.filter(pk=application.pk).update(applied_at=timezone.now().replace(
+            year=month.year, month=month.month, day=1
+        ))
+
+        out = StringIO()
+        call_command('manage_partitions', '--months-ahead=6', stdout=out)
+        self.assertIn('Moved 1 rows out of the default partition', out.getvalue())
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT tableoid::regclass::text FROM jobs_application WHERE id = %s', [application.pk])
+            self.assertEqual(cursor.fetchone()[0], f'jobs_application_y{month.year}m{month.month:02d}')
+        # The moved row still holds its (job, applicant) claim
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Application.objects.create(job=self.job, applicant=self.applicant, resume='resumes/cv.pdf')
+
+    def test_archive_jobs_moves_inactive_jobs(self):
+        """Long-inactive jobs and their applications move to the archive tables."""
+        old_job = Job.objects.create(
+            employer=self.employer, category=self.category_tech,
+            title='Closed Role', location='Remote', is_active=False
+        )
+        Application.objects.create(job=old_job, applicant=self.applicant, resume='resumes/cv.pdf')
+        Job.objects.filter(pk=old_job.pk).update(updated_at=timezone.now() - timedelta(days=120))
+
+        call_command('archive_jobs', '--days=90', '--sleep=0', stdout=StringIO())
+
+        self.assertFalse(Job.objects.filter(pk=old_job.pk).exists())
+        self.assertTrue(Job.objects.filter(pk=self.job.pk).exists())
+        self.assertEqual(ArchivedJob.objects.get().title, 'Closed Role')
+        self.assertEqual(ArchivedApplication.objects.get().applicant_id, self.applicant.id)
+        self.assertFalse(Application.objects.exists())
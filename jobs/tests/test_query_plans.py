@@ -0,0 +1,216 @@
+import difflib
+import json
+import os
+import re
+from pathlib import Path
+from unittest import skipUnless
+from django.utils import timezone
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from core.pagination import OptionalCursorPagination
+from ..models import Job, Category, Application
+from ..partitions import add_months, ensure_application_partitions, month_start
+from ..views import JobDetailView, JobListCreateView
+
+User = get_user_model()
+
+
+PLAN_SNAPSHOT_DIR = Path(__file__).resolve().parent / 'plan_snapshots'
+# Plan keys that describe its shape; costs, row counts & literals are dropped
+PLAN_KEYS = (
+    'Node Type', 'Strategy', 'Partial Mode', 'Parent Relationship', 'Join Type',
+    'Relation Name', 'Index Name', 'Scan Direction', 'Sort Key',
+)
+# Tables (and partitions) at least this large must not be scanned sequentially
+LARGE_TABLE_ROWS = 1000
+# The `icontains` filters can only avoid a scan through the pg_trgm indexes
+TEXT_SEARCH_QUERIES = ('feed_location', 'feed_title', 'feed_search')
+
+
+def normalize_plan(node):
+    """
+    Shape of an EXPLAIN (FORMAT JSON) node. Monthly partitions are renamed to
+    jobs_application_<month> and identical sibling scans collapsed, so the
+    snapshot doesn't change as months pass.
+    """
+    shape = {key: node[key] for key in PLAN_KEYS if key in node}
+    for key in ('Relation Name', 'Index Name'):
+        if key in shape:
+            shape[key] = re.sub(r'_y\d{4}m\d{2}', '_<month>', shape[key])
+    children = []
+    for child in node.get('Plans', []):
+        child = normalize_plan(child)
+        if child not in children:
+            children.append(child)
+    if children:
+        shape['Plans'] = children
+    return shape
+
+
+def plan_nodes(node):
+    yield node
+    for child in node.get('Plans', []):
+        yield from plan_nodes(child)
+
+
+@skipUnless(connection.vendor == 'postgresql', 'Query plans are PostgreSQL specific')
+class QueryPlanTests(TestCase):
+    """
+    Captures EXPLAIN (FORMAT JSON) of the canonical queries against a seeded
+    dataset, checks the properties that matter (index used, no sequential
+    scan of a large table, no sort) and compares the plan shape with
+    jobs/tests/plan_snapshots/<name>.json. Set UPDATE_PLAN_SNAPSHOTS=1 to
+    rewrite the snapshots, then review them with git diff.
+    """
+    JOBS = 50000
+    USERS = 20000
+    EMPLOYERS = 200
+    APPLICATIONS = 100000
+    PAGE_SIZE = OptionalCursorPagination.page_size
+
+    @classmethod
+    def setUpTestData(cls):
+        # Applications fill the 24 months before this one, so which
+        # partitions are empty (and the plan shape) doesn't depend on the date
+        ensure_application_partitions(first_month=add_months(month_start(timezone.now()), -24))
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "INSERT INTO users_user (password, email, first_name, last_name, role, "
+                "is_active, is_staff, is_superuser, created_at) "
+                "SELECT '!', 'user' || g || '@example.com', 'First' || g, 'Last' || (g %% 997), "
+                "CASE WHEN g <= %s THEN 'employer' ELSE 'applicant' END, true, false, false, now() "
+                "FROM generate_series(1, %s) g",
+                [cls.EMPLOYERS, cls.USERS],
+            )
+            cursor.execute(
+                "INSERT INTO jobs_category (name, slug) "
+                "SELECT 'Category ' || g, 'category-' || g FROM generate_series(1, 20) g"
+            )
+            cursor.execute(
+                "INSERT INTO jobs_job (employer_id, category_id, title, description, location, "
+                "salary, job_type, is_active, created_at, updated_at) "
+                "SELECT e.id, c.id, "
+                "(ARRAY['Senior', 'Junior', 'Lead', 'Staff'])[g %% 4 + 1] || ' ' || "
+                "(ARRAY['Python', 'Django', 'Java', 'Go', 'React', 'Data', 'DevOps'])[g %% 7 + 1] || ' Engineer ' || g, "
+                "'We are hiring for role ' || g || '. You will build and ship product features.', "
+                "'City ' || (g %% 50), "
+                "CASE WHEN g %% 10 < 3 THEN NULL ELSE 30000 + (g * 37) %% 170000 END, "
+                "(ARRAY['FT', 'CT', 'RM'])[g %% 3 + 1], g %% 10 <> 0, "
+                "now() - (g %% 730) * interval '1 day', now() "
+                "FROM generate_series(1, %s) g "
+                "JOIN (SELECT id, row_number() OVER (ORDER BY id) - 1 AS n FROM users_user "
+                "      WHERE role = 'employer') e ON e.n = g %% %s "
+                "JOIN (SELECT id, row_number() OVER (ORDER BY id) - 1 AS n FROM jobs_category) c "
+                "  ON c.n = g %% 20",
+                [cls.JOBS, cls.EMPLOYERS],
+            )
+            cursor.execute(
+                "INSERT INTO jobs_application (job_id, applicant_id, resume, cover_letter, status, applied_at) "
+                "SELECT j.id, a.id, 'resumes/r' || g || '.pdf', '', 'pending', "
+                "date_trunc('month', now()) - (g %% 24 + 1) * interval '1 month' "
+                "+ (g %% 28) * interval '1 day' "
+                "FROM generate_series(0, %s - 1) g "
+                "JOIN (SELECT id, row_number() OVER (ORDER BY id) - 1 AS n FROM jobs_job) j "
+                "  ON j.n = (g * 7919) %% %s "
+                "JOIN (SELECT id, row_number() OVER (ORDER BY id) - 1 AS n FROM users_user "
+                "      WHERE role = 'applicant') a ON a.n = g %% %s",
+                [cls.APPLICATIONS, cls.JOBS, cls.USERS - cls.EMPLOYERS],
+            )
+            cursor.execute('ANALYZE')
+            cursor.execute(
+                "SELECT relname FROM pg_class WHERE relkind = 'r' AND reltuples >= %s",
+                [LARGE_TABLE_ROWS],
+            )
+            cls.large_tables = {row[0] for row in cursor.fetchall()}
+            cursor.execute("SELECT to_regclass('jobs_job_title_trgm') IS NOT NULL")
+            cls.has_trigram_indexes = cursor.fetchone()[0]
+        cls.job = Job.objects.filter(is_active=True).order_by('id').first()
+        cls.category = Category.objects.order_by('id').first()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        # ANALYZE isn't rolled back with the seeded rows; later tests (e.g.
+        # the estimated counts) would see 20000 users otherwise
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def feed(self, **params):
+        """
+        The first page of GET /api/jobs/ for the given query parameters.
+        """
+        view = JobListCreateView()
+        view.request = Request(APIRequestFactory().get('/api/jobs/', params))
+        view.format_kwarg, view.kwargs = None, {}
+        return view.filter_queryset(view.get_queryset())[:self.PAGE_SIZE + 1]
+
+    def canonical_queries(self):
+        return {
+            'feed': self.feed(),
+            'feed_category': self.feed(category=self.category.pk),
+            'feed_job_type': self.feed(job_type='CT'),
+            'feed_location': self.feed(location='city 7'),
+            'feed_title': self.feed(title='python'),
+            'feed_salary_range': self.feed(salary_min=50000, salary_max=120000, ordering='salary_desc'),
+            'feed_salary_asc': self.feed(ordering='salary_asc'),
+            'feed_search': self.feed(search='django'),
+            'job_detail': JobDetailView.queryset.filter(pk=self.job.pk),
+            'applications_by_job': Application.objects.filter(job=self.job),
+            'user_by_email': User.objects.filter(email='user1234@example.com'),
+        }
+
+    # Index each query must use; None where several plans are acceptable
+    EXPECTED_INDEXES = {
+        'feed': 'job_active_created_idx',
+        'feed_category': 'job_active_category_idx',
+        'feed_job_type': 'job_active_type_idx',
+        'feed_location': None,
+        'feed_title': None,
+        'feed_salary_range': 'job_active_salary_idx',
+        'feed_salary_asc': 'job_active_salary_idx',
+        'feed_search': None,
+        'job_detail': 'jobs_job_pkey',
+        'applications_by_job': None,
+        'user_by_email': None,
+    }
+
+    def explain(self, queryset):
+        return json.loads(queryset.explain(format='json'))[0]['Plan']
+
+    def assert_snapshot(self, name, plan):
+        path = PLAN_SNAPSHOT_DIR / f'{name}.json'
+        current = json.dumps(normalize_plan(plan), indent=2) + '\n'
+        if os.getenv('UPDATE_PLAN_SNAPSHOTS'):
+            PLAN_SNAPSHOT_DIR.mkdir(exist_ok=True)
+            path.write_text(current)
+            return
+        if not path.exists():
+            self.fail(f'No plan snapshot for {name}; run the tests with UPDATE_PLAN_SNAPSHOTS=1 to record it')
+        expected = path.read_text()
+        diff = ''.join(difflib.unified_diff(
+            expected.splitlines(True), current.splitlines(True), f'{name} (snapshot)', f'{name} (now)'
+        ))
+        self.assertEqual(expected, current, f'Plan of {name} changed:\n{diff}')
+
+    def test_canonical_query_plans(self):
+        for name, queryset in self.canonical_queries().items():
+            with self.subTest(query=name):
+                if name in TEXT_SEARCH_QUERIES and not self.has_trigram_indexes:
+                    self.skipTest('pg_trgm is not available')
+                plan = self.explain(queryset)
+                nodes = list(plan_nodes(plan))
+                seq_scans = [
+                    node['Relation Name'] for node in nodes
+                    if node['Node Type'] == 'Seq Scan' and node['Relation Name'] in self.large_tables
+                ]
+                self.assertEqual(seq_scans, [], f'{name} scans a large table sequentially')
+                if name not in TEXT_SEARCH_QUERIES:
+                    # Rare search terms are best served by a trigram bitmap scan + sort
+                    self.assertNotIn('Sort', [node['Node Type'] for node in nodes], f'{name} sorts')
+                index = self.EXPECTED_INDEXES[name]
+                if index is not None:
+                    self.assertIn(index, [node.get('Index Name') for node in nodes])
+                self.assert_snapshot(name, plan)
@@ -0,0 +1,83 @@
+import threading
+from unittest import mock
+from django.urls import reverse
+from rest_framework import status
+from django.core.cache import cache
+from ..models import Job, Application
+from ..recommendations import recommendation_index
+from .base import JobAPITestCase
+
+
+class RecommendationTests(JobAPITestCase):
+    """
+    GET /api/jobs/recommended/ - AUTHENTICATED
+    """
+    def test_recommendations_follow_past_applications(self):
+        """Applicants get jobs similar to the ones they applied to."""
+        python_job = Job.objects.create(
+            employer=self.other_employer, category=self.category_tech,
+            title='Python Backend Developer', description='Django and Python APIs.',
+            location='Remote'
+        )
+        Job.objects.create(
+            employer=self.other_employer, category=self.category_marketing,
+            title='Social Media Manager', description='Grow our audience.', location='Remote'
+        )
+        Application.objects.create(job=self.job, applicant=self.applicant, resume='resumes/cv.pdf')
+
+        # The first request of the process builds the index before scoring
+        self.client.force_authenticate(user=self.applicant)
+        response = self.client.get(reverse('job_recommended'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data[0]['id'], python_job.id)
+        # Jobs already applied to are never recommended
+        self.assertNotIn(self.job.id, [job['id'] for job in response.data])
+
+    def test_recommendations_include_new_jobs(self):
+        """Jobs created after the matrix was built are appended incrementally."""
+        Application.objects.create(job=self.job, applicant=self.applicant, resume='resumes/cv.pdf')
+        recommendation_index.rebuild()
+        self.client.force_authenticate(user=self.applicant)
+        self.assertEqual(self.client.get(reverse('job_recommended')).data, [])
+
+        new_job = Job.objects.create(
+            employer=self.other_employer, category=self.category_tech,
+            title='Python Developer', description='Django expert wanted.', location='Remote'
+        )
+        cache.clear()
+        recommendation_index.checked_at = 0.0
+        response = self.client.get(reverse('job_recommended'))
+        self.assertEqual([job['id'] for job in response.data], [new_job.id])
+
+    def test_recommendations_rebuild_in_the_background(self):
+        """A due full rebuild runs off the request; scoring keeps the previous matrix."""
+        Application.objects.create(job=self.job, applicant=self.applicant, resume='resumes/cv.pdf')
+        recommendation_index.rebuild()
+        new_job = Job.objects.create(
+            employer=self.other_employer, category=self.category_tech,
+            title='Python Developer', description='Django expert wanted.', location='Remote'
+        )
+        recommendation_index.rebuilt_at = recommendation_index.checked_at = 0.0
+        started, release = threading.Event(), threading.Event()
+
+        def rebuild():
+            started.set()
+            release.wait(5)
+
+        self.client.force_authenticate(user=self.applicant)
+        with mock.patch.object(recommendation_index, 'rebuild', side_effect=rebuild):
+            response = self.client.get(reverse('job_recommended'))
+            self.assertTrue(started.wait(5))
+            self.assertEqual(response.data, [])
+            release.set()
+            with recommendation_index._lock:
+                pass
+
+        cache.clear()
+        recommendation_index.rebuild()
+        response = self.client.get(reverse('job_recommended'))
+        self.assertEqual([job['id'] for job in response.data], [new_job.id])
+
+    def test_recommendations_require_authentication(self):
+        response = self.client.get(reverse('job_recommended'))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
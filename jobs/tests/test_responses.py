@@ -0,0 +1,102 @@
+import brotli
+import gzip
+import json
+import msgpack
+from decimal import Decimal
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from core import metrics
+from core.renderers import ORJSONRenderer
+from ..models import Job
+from ..serializers import CARD_DESCRIPTION_LENGTH
+from .base import JobAPITestCase
+
+
+class ResponseFormatTests(JobAPITestCase):
+    # ----------------------------------------------------------------
+    # 1. orjson & MessagePack renderers
+    # ----------------------------------------------------------------
+    def test_orjson_renderer_matches_drf_json(self):
+        self.job.title = 'Caf\u00e9 \u2028 line separator'
+        self.job.save()
+        response = self.client.get(self.list_url)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(response.content, JSONRenderer().render(response.data))
+        self.assertIn(b'\\u2028', response.content)
+
+        # Types the serializers leave to the encoder
+        data = {'salary': Decimal('1.50'), 'at': timezone.now(), 1: 'key'}
+        self.assertEqual(ORJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_msgpack_on_request(self):
+        response = self.client.get(self.list_url, HTTP_ACCEPT='application/msgpack')
+        self.assertEqual(response['Content-Type'], 'application/msgpack')
+        self.assertEqual(
+            msgpack.unpackb(response.content), json.loads(self.client.get(self.list_url).content)
+        )
+
+    def test_malformed_json_is_rejected(self):
+        self.client.force_authenticate(user=self.employer)
+        response = self.client.post(self.list_url, '{"title": ', content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    # ----------------------------------------------------------------
+    # 2. Job cards, sparse fieldsets & response compression
+    # ----------------------------------------------------------------
+    def test_list_shows_cards_unless_full_view(self):
+        self.job.description = 'word ' * 100
+        self.job.save()
+        response = self.client.get(self.list_url)
+        description = response.data[0]['description']
+        self.assertEqual(len(description), CARD_DESCRIPTION_LENGTH)
+        self.assertTrue(description.endswith('\u2026'))
+
+        response = self.client.get(self.list_url, {'view': 'full'})
+        self.assertEqual(response.data[0]['description'], self.job.description)
+        response = self.client.get(self.detail_url)
+        self.assertEqual(response.data['description'], self.job.description)
+
+        # No whitespace to strip before the ellipsis
+        Job.objects.filter(pk=self.job.pk).update(description='x' * 300)
+        description = self.client.get(self.list_url).data[0]['description']
+        self.assertEqual(description, 'x' * (CARD_DESCRIPTION_LENGTH - 1) + '\u2026')
+        Job.objects.filter(pk=self.job.pk).update(description='x' * CARD_DESCRIPTION_LENGTH)
+        description = self.client.get(self.list_url).data[0]['description']
+        self.assertEqual(description, 'x' * CARD_DESCRIPTION_LENGTH)
+
+    def test_sparse_fieldsets_narrow_the_query(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.list_url, {'fields': 'id,title,employer_name', 'view': 'full'})
+        self.assertEqual(list(response.data[0]), ['id', 'employer_name', 'title'])
+        self.assertEqual(response.data[0]['employer_name'], self.employer.first_name)
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('description', queries[0]['sql'])
+
+        response = self.client.get(self.list_url, {'omit': 'description,company_logo', 'page_size': 10})
+        self.assertNotIn('description', response.data['results'][0])
+        self.assertIn('salary', response.data['results'][0])
+
+        response = self.client.get(self.detail_url, {'fields': 'title'})
+        self.assertEqual(response.data, {'title': self.job.title})
+
+    def test_json_responses_are_compressed(self):
+        for i in range(20):
+            Job.objects.create(employer=self.employer, title=f'Job {i}', description='x' * 200, location='Remote')
+        response = self.client.get(self.list_url, HTTP_ACCEPT_ENCODING='gzip, br;q=0.9')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        body = brotli.decompress(response.content)
+        self.assertEqual(json.loads(body), json.loads(json.dumps(response.data)))
+        self.assertEqual(metrics.get('compression.bytes_in'), len(body))
+        self.assertGreater(metrics.get('compression.bytes_saved'), 0)
+
+        response = self.client.get(self.list_url, HTTP_ACCEPT_ENCODING='gzip, br;q=0')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), body)
+
+        # Too small to be worth it
+        response = self.client.get(self.detail_url, HTTP_ACCEPT_ENCODING='br')
+        self.assertFalse(response.has_header('Content-Encoding'))
@@ -0,0 +1,75 @@
+import threading
+from unittest import mock
+from django.urls import reverse
+from rest_framework import status
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from ..models import Job
+from ..suggest import suggest_index
+from .base import JobAPITestCase
+
+
+class JobSuggestTests(JobAPITestCase):
+    """
+    GET /api/jobs/suggest/ - PUBLIC
+    """
+    def test_suggest_ranks_titles_by_frequency(self):
+        """Typeahead returns distinct active titles, most frequent first."""
+        for _ in range(2):
+            Job.objects.create(
+                employer=self.employer, category=self.category_tech,
+                title='Senior Designer', location='Boston'
+            )
+        Job.objects.create(
+            employer=self.employer, category=self.category_tech,
+            title='Senior Accountant', location='Boston', is_active=False
+        )
+        # The first lookup of the process builds the index before answering
+        response = self.client.get(reverse('job_suggest'), {'q': 'Se'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(row['value'], row['count']) for row in response.data],
+            [('Senior Designer', 2), ('Senior Python Developer', 1)]
+        )
+
+        response = self.client.get(reverse('job_suggest'), {'q': 'bos', 'field': 'location'})
+        self.assertEqual([row['value'] for row in response.data], ['Boston'])
+
+    def test_suggest_picks_up_changed_jobs(self):
+        """Jobs changed after the index was built are merged in on refresh."""
+        suggest_index.rebuild()
+        self.job.title = 'Staff Python Developer'
+        self.job.save()
+        suggest_index.checked_at = 0.0
+
+        response = self.client.get(reverse('job_suggest'), {'q': 'sta'})
+        self.assertEqual([row['value'] for row in response.data], ['Staff Python Developer'])
+        # The title it left is recounted, and the row isn't applied twice
+        response = self.client.get(reverse('job_suggest'), {'q': 'sen'})
+        self.assertEqual(response.data, [])
+        suggest_index.checked_at = 0.0
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('job_suggest'), {'q': 'sta'})
+        self.assertEqual(len(queries), 1)
+
+    def test_suggest_rebuilds_in_the_background(self):
+        """A due full rebuild doesn't block lookups, which see the old index until it's swapped in."""
+        suggest_index.rebuild()
+        Job.objects.create(
+            employer=self.employer, category=self.category_tech,
+            title='Senior Designer', location='Boston'
+        )
+        suggest_index.rebuilt_at = suggest_index.checked_at = 0.0
+        started, release = threading.Event(), threading.Event()
+
+        def rebuild():
+            started.set()
+            release.wait(5)
+
+        with mock.patch.object(suggest_index, 'rebuild', side_effect=rebuild):
+            response = self.client.get(reverse('job_suggest'), {'q': 'senior'})
+            self.assertTrue(started.wait(5))
+            self.assertEqual([row['value'] for row in response.data], ['Senior Python Developer'])
+            release.set()
+            with suggest_index._lock:
+                pass
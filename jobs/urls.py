@@ -1,8 +1,24 @@
 from django.urls import path
-from .views import JobListCreateView, JobDetailView, CategoryListView
+from .views import (
+    JobListCreateView, JobDetailView, JobFacetsView, JobSuggestView,
+    JobRecommendationView, JobChangesView, JobImportView, JobApplyView, ApplicationStatusBulkView,
+    CategoryListView, SavedSearchListCreateView, SavedSearchDetailView, ApplicationEventTicketView,
+    application_event_stream,
+)
 
 urlpatterns = [
     path('categories/', CategoryListView.as_view(), name='category_list'),
     path('jobs/', JobListCreateView.as_view(), name='job_list_create'),
+    path('jobs/facets/', JobFacetsView.as_view(), name='job_facets'),
+    path('jobs/suggest/', JobSuggestView.as_view(), name='job_suggest'),
+    path('jobs/recommended/', JobRecommendationView.as_view(), name='job_recommended'),
+    path('jobs/changes/', JobChangesView.as_view(), name='job_changes'),
+    path('jobs/import/', JobImportView.as_view(), name='job_import'),
+    path('jobs/saved-searches/', SavedSearchListCreateView.as_view(), name='saved_search_list'),
+    path('jobs/saved-searches/<int:pk>/', SavedSearchDetailView.as_view(), name='saved_search_detail'),
+    path('jobs/applications/events/', application_event_stream, name='job_application_events'),
+    path('jobs/applications/events/ticket/', ApplicationEventTicketView.as_view(), name='job_application_event_ticket'),
     path('jobs/<int:pk>/', JobDetailView.as_view(), name='job_detail'),
+    path('jobs/<int:pk>/apply/', JobApplyView.as_view(), name='job_apply'),
+    path('jobs/<int:pk>/applications/status/', ApplicationStatusBulkView.as_view(), name='job_application_status'),
 ]
\ No newline at end of file
@@ -1,20 +1,70 @@
-from rest_framework import generics, permissions, filters
+import asyncio
+import json
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.http import JsonResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from rest_framework import generics, permissions, filters, status, serializers
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from rest_framework.settings import api_settings
+from rest_framework.exceptions import AuthenticationFailed, PermissionDenied, UnsupportedMediaType
+from rest_framework_simplejwt.exceptions import InvalidToken
 from django_filters import rest_framework as django_filters
-from .models import Job, Category
-from .serializers import JobSerializer, CategorySerializer
-from .permissions import IsEmployerOrReadOnly, IsOwnerOrReadOnly
+from .models import Job, Category, SavedSearch
+from .facets import cached_facets
+from .suggest import suggest_index, SUGGEST_FIELDS, MAX_RESULTS
+from .recommendations import recommend_for
+from .dedupe import find_near_duplicate, index_job
+from .alerts import percolate_on_commit
+from .applications import submit_application, set_statuses
+from .imports import SizeLimitedStream, format_for, import_feed
+from .counters import job_views
+from .events import broker, ensure_listening, issue_ticket, redeem_ticket
+from .changes import changes_since, InvalidCursor, PAGE_SIZE, MAX_PAGE_SIZE
+from .serializers import (
+    JobSerializer, JobCardSerializer, CategorySerializer, ApplicationSerializer,
+    ApplicationSubmitSerializer, ApplicationStatusBulkSerializer, SavedSearchSerializer
+)
+from .permissions import IsEmployerOrReadOnly, IsOwnerOrReadOnly, IsApplicant
+from core.idempotency import idempotent
+from core.pagination import OptionalCursorPagination
+from users.authentication import RevocationAwareJWTAuthentication
 
 
 # --- Custom Filter ---
+
+# Whitelisted ?ordering= values. Each one is served by a partial index on
+# active jobs (see Job.Meta.indexes) and ends with 'id' so cursors are stable.
+JOB_ORDERINGS = {
+    'newest': ('-created_at', '-id'),
+    'salary_desc': ('-salary', '-id'),
+    'salary_asc': ('salary', 'id'),
+}
+
 class JobFilter(django_filters.FilterSet):
     # Use 'icontains' (case-insensitive partial match) for location & title
     location = django_filters.CharFilter(lookup_expr='icontains')
     title = django_filters.CharFilter(lookup_expr='icontains')
-    
+    salary_min = django_filters.NumberFilter(field_name='salary', lookup_expr='gte')
+    salary_max = django_filters.NumberFilter(field_name='salary', lookup_expr='lte')
+    ordering = django_filters.ChoiceFilter(
+        choices=[(name, name) for name in JOB_ORDERINGS], method='filter_ordering'
+    )
+
     class Meta:
         model = Job
-        fields = ['category', 'job_type', 'location', 'title']
-        
+        fields = ['category', 'job_type', 'location', 'title', 'salary_min', 'salary_max']
+
+    def filter_ordering(self, queryset, name, value):
+        if value.startswith('salary'):
+            # Jobs without a salary have no position in a salary sort: the
+            # cursor compares salaries, and NULL never compares
+            queryset = queryset.filter(salary__isnull=False)
+        return queryset.order_by(*JOB_ORDERINGS[value])
+
 
 # --- Views ---
 
@@ -27,24 +77,148 @@ class CategoryListView(generics.ListAPIView):
     permission_classes = (permissions.AllowAny,)
 
 
-class JobListCreateView(generics.ListCreateAPIView):
+class JobSearchMixin:
     """
-    GET /api/jobs/ - Public List with filters
-    POST /api/jobs/ - Create (Employer Only)
+    Shared queryset & filter configuration for every view that searches active jobs.
     """
     # Show active jobs, ordered by newest first
-    queryset = Job.objects.filter(is_active=True).order_by('-created_at')
-    serializer_class = JobSerializer
-    permission_classes = (IsEmployerOrReadOnly,)
+    queryset = Job.objects.filter(is_active=True).order_by(*JOB_ORDERINGS['newest'])
 
     # Configure Filtering
     filter_backends = [django_filters.DjangoFilterBackend, filters.SearchFilter]
     filterset_class = JobFilter
     search_fields = ['title', 'description', 'location'] # For ?search= parameter
 
+
+class JobListCreateView(JobSearchMixin, generics.ListCreateAPIView):
+    """
+    GET /api/jobs/ - Public List with filters
+    POST /api/jobs/ - Create (Employer Only)
+    The list shows job cards (short description) unless ?view=full;
+    ?fields= / ?omit= pick the fields, and only their columns are read.
+    ?ordering=salary_desc / salary_asc only list the jobs with a salary.
+    """
+    serializer_class = JobSerializer
+    permission_classes = (IsEmployerOrReadOnly,)
+    pagination_class = OptionalCursorPagination
+
+    def get_serializer_class(self):
+        if self.request.method == 'GET' and self.request.query_params.get('view') != 'full':
+            return JobCardSerializer
+        return JobSerializer
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.request.method == 'GET':
+            # After the filters, which set the ordering the cursor reads
+            queryset = self.get_serializer().narrow_queryset(queryset)
+        return queryset
+
     def perform_create(self, serializer):
-        # Automatically set the 'employer' to the logged-in user
-        serializer.save(employer=self.request.user)
+        # Reject reposts of one of the employer's active jobs
+        duplicate_of, _, signature = find_near_duplicate(
+            self.request.user,
+            serializer.validated_data.get('title', ''),
+            serializer.validated_data.get('description', ''),
+        )
+        if duplicate_of is not None:
+            raise serializers.ValidationError({
+                "non_field_errors": [f"This posting is a near-duplicate of job {duplicate_of}."],
+                "duplicate_of": duplicate_of,
+            })
+
+        with transaction.atomic():
+            # Automatically set the 'employer' to the logged-in user
+            job = serializer.save(employer=self.request.user)
+            index_job(job, signature)
+            percolate_on_commit(job)
+
+
+class JobFacetsView(JobSearchMixin, generics.GenericAPIView):
+    """
+    GET /api/jobs/facets/
+    Counts per category, job_type & top location for the same filters as the list.
+    """
+    permission_classes = (permissions.AllowAny,)
+
+    def get(self, request):
+        queryset = self.filter_queryset(self.get_queryset())
+        allowed = [*JobFilter.base_filters, api_settings.SEARCH_PARAM]
+        return Response(cached_facets(queryset, request.query_params, allowed))
+
+
+class JobSuggestView(APIView):
+    """
+    GET /api/jobs/suggest/?q=pyth&field=title
+    Typeahead for job titles or locations, served from an in-memory prefix index.
+    """
+    permission_classes = (permissions.AllowAny,)
+
+    def get(self, request):
+        field = request.query_params.get('field', 'title')
+        if field not in SUGGEST_FIELDS:
+            return Response(
+                {"field": [f"Must be one of: {', '.join(SUGGEST_FIELDS)}."]},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        prefix = request.query_params.get('q', '')
+        try:
+            limit = min(max(int(request.query_params.get('limit', MAX_RESULTS)), 1), MAX_RESULTS)
+        except ValueError:
+            limit = MAX_RESULTS
+        if not prefix.strip():
+            return Response([])
+        return Response(suggest_index.lookup(field, prefix, limit))
+
+
+class JobRecommendationView(generics.ListAPIView):
+    """
+    GET /api/jobs/recommended/
+    Active jobs similar to the ones the logged-in applicant applied to, best match first.
+    """
+    serializer_class = JobSerializer
+    permission_classes = (permissions.IsAuthenticated,)
+
+    def list(self, request):
+        scores = dict(recommend_for(request.user))
+        jobs = Job.objects.filter(pk__in=scores, is_active=True).select_related('employer', 'category')
+        jobs = sorted(jobs, key=lambda job: -scores[job.pk])
+        data = self.get_serializer(jobs, many=True).data
+        for item in data:
+            item['score'] = scores[item['id']]
+        return Response(data)
+
+
+class JobChangesView(APIView):
+    """
+    GET /api/jobs/changes/?since=<cursor>&limit=
+    Jobs created, updated or deactivated and tombstones of deleted jobs since
+    the cursor, oldest change first. Keep the returned `next` cursor and poll
+    again with it; `has_more` means another page is ready right away.
+    """
+    permission_classes = (permissions.AllowAny,)
+
+    def get(self, request):
+        try:
+            limit = min(max(int(request.query_params.get('limit', PAGE_SIZE)), 1), MAX_PAGE_SIZE)
+        except ValueError:
+            limit = PAGE_SIZE
+        try:
+            changes, next_cursor, has_more = changes_since(request.query_params.get('since'), limit)
+        except InvalidCursor:
+            return Response({"since": ["Invalid cursor."]}, status=status.HTTP_400_BAD_REQUEST)
+
+        results = []
+        for change_seq, pk, job in changes:
+            if job is None:
+                results.append({"id": pk, "change": "deleted", "job": None})
+            else:
+                results.append({
+                    "id": pk,
+                    "change": "upsert" if job.is_active else "deactivated",
+                    "job": JobSerializer(job, context={'request': request}).data,
+                })
+        return Response({"results": results, "next": next_cursor, "has_more": has_more})
 
 
 class JobDetailView(generics.RetrieveUpdateDestroyAPIView):
@@ -55,4 +229,221 @@ class JobDetailView(generics.RetrieveUpdateDestroyAPIView):
     """
     queryset = Job.objects.all()
     serializer_class = JobSerializer
-    permission_classes = (IsOwnerOrReadOnly,)
\ No newline at end of file
+    permission_classes = (IsOwnerOrReadOnly,)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.request.method == 'GET':
+            queryset = self.get_serializer().narrow_queryset(queryset)
+        return queryset
+
+    def retrieve(self, request, *args, **kwargs):
+        response = super().retrieve(request, *args, **kwargs)
+        # Counted in memory and flushed in batches (shows up after a flush)
+        job_views.record(int(kwargs['pk']))
+        return response
+
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            job = serializer.save()
+            if {'title', 'description'} & serializer.validated_data.keys():
+                index_job(job)
+
+
+class JobApplyView(APIView):
+    """
+    POST /api/jobs/{id}/apply/ - Apply with a resume (Applicant Only)
+    Send an Idempotency-Key header to make retries & double clicks safe.
+    """
+    permission_classes = (IsApplicant,)
+
+    @idempotent
+    def post(self, request, pk):
+        job = get_object_or_404(Job, pk=pk, is_active=True)
+        serializer = ApplicationSubmitSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        application = submit_application(
+            job, request.user,
+            serializer.validated_data['resume'],
+            serializer.validated_data.get('cover_letter', ''),
+        )
+        if application is None:
+            return Response(
+                {"non_field_errors": ["You have already applied to this job."]},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        data = ApplicationSerializer(application, context={'request': request}).data
+        return Response(data, status=status.HTTP_201_CREATED)
+
+
+class JobImportView(APIView):
+    """
+    POST /api/jobs/import/ - Upsert the employer's jobs from an ATS feed
+    (Employer Only). The body is the feed itself, in the format its
+    Content-Type names: application/json (an array), application/x-ndjson,
+    text/csv or application/xml. It is read as a stream; imported jobs
+    missing from it are deactivated unless ?keep_missing=1. A body over
+    JOB_IMPORT_MAX_BYTES is refused (413), or, when its length isn't
+    announced, stops the import where it crosses the limit.
+    """
+    permission_classes = (IsEmployerOrReadOnly,)
+
+    def post(self, request):
+        feed_format = format_for(request.content_type)
+        if feed_format is None:
+            raise UnsupportedMediaType(request.content_type)
+        max_bytes = settings.JOB_IMPORT_MAX_BYTES
+        try:
+            content_length = int(request.META.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            content_length = 0
+        if content_length > max_bytes:
+            return Response(
+                {"detail": f"The feed is larger than {max_bytes} bytes; split it into several imports."},
+                status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            )
+        if request.stream is None:
+            return Response({"detail": "The feed is empty."}, status=status.HTTP_400_BAD_REQUEST)
+
+        report = import_feed(
+            request.user, SizeLimitedStream(request.stream, max_bytes), feed_format,
+            deactivate_missing=request.query_params.get('keep_missing') not in ('1', 'true'),
+        )
+        return Response(report.as_dict())
+
+
+class ApplicationStatusBulkView(APIView):
+    """
+    POST /api/jobs/{id}/applications/status/ - Accept or reject many
+    applications at once (Owner Only), e.g.
+    {"status": "rejected", "from_status": "pending"} rejects all pending ones.
+    """
+    permission_classes = (IsEmployerOrReadOnly,)
+
+    def post(self, request, pk):
+        job = get_object_or_404(Job.objects.only('id', 'employer_id', 'title', 'location'), pk=pk)
+        if job.employer_id != request.user.pk and not request.user.is_superuser:
+            raise PermissionDenied()
+        serializer = ApplicationStatusBulkSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        changed = set_statuses(job, **serializer.validated_data)
+        return Response({
+            "status": serializer.validated_data['status'],
+            "updated": len(changed),
+            "ids": changed,
+        })
+
+
+class SavedSearchListCreateView(generics.ListCreateAPIView):
+    """
+    GET/POST /api/jobs/saved-searches/ - APPLICANT ONLY
+    Job alerts: new jobs matching a saved search are emailed in a digest.
+    """
+    serializer_class = SavedSearchSerializer
+    permission_classes = (IsApplicant,)
+
+    def get_queryset(self):
+        return SavedSearch.objects.filter(user=self.request.user).order_by('-id')
+
+    def perform_create(self, serializer):
+        serializer.save(user=self.request.user)
+
+
+class SavedSearchDetailView(generics.RetrieveUpdateDestroyAPIView):
+    """
+    GET/PATCH/DELETE /api/jobs/saved-searches/{id}/ - OWNER ONLY
+    """
+    serializer_class = SavedSearchSerializer
+    permission_classes = (IsApplicant,)
+
+    def get_queryset(self):
+        return SavedSearch.objects.filter(user=self.request.user)
+
+
+class ApplicationEventTicketView(APIView):
+    """
+    POST /api/jobs/applications/events/ticket/ - EMPLOYER ONLY
+    A single-use ticket for opening the event stream with ?ticket=, since
+    browsers' EventSource can't send an Authorization header. It expires
+    after EVENTS_TICKET_SECONDS.
+    """
+    permission_classes = (IsEmployerOrReadOnly,)
+
+    def post(self, request):
+        return Response(
+            {"ticket": issue_ticket(request.user), "expires_in": settings.EVENTS_TICKET_SECONDS},
+            status=status.HTTP_201_CREATED,
+        )
+
+
+def _authenticate_stream(request):
+    """
+    JWT from the Authorization header, or a ticket from
+    ApplicationEventTicketView in ?ticket=. A JWT is never taken from the URL,
+    where access logs would record it.
+    """
+    auth = RevocationAwareJWTAuthentication()
+    header = auth.get_header(request)
+    if header:
+        raw_token = auth.get_raw_token(header)
+        if not raw_token:
+            return None
+        return auth.get_user(auth.get_validated_token(raw_token))
+    ticket = request.GET.get('ticket')
+    user_id = redeem_ticket(ticket) if ticket else None
+    if user_id is None:
+        return None
+    return get_user_model().objects.filter(pk=user_id, is_active=True).first()
+
+
+async def application_event_stream(request):
+    """
+    GET /api/jobs/applications/events/?job=<id>&ticket=<ticket> - EMPLOYER ONLY
+    Server-Sent Events stream of applications created (or changing status) on
+    the employer's jobs, optionally one job. Needs an ASGI server: in
+    production it's served by the `events` service, the rest of the API by
+    WSGI workers. Tickets are shared through the cache (Redis), so any
+    worker can redeem one another issued.
+    """
+    try:
+        user = await sync_to_async(_authenticate_stream)(request)
+    except (InvalidToken, AuthenticationFailed):
+        user = None
+    if user is None:
+        return JsonResponse({"detail": "Authentication credentials were not provided."}, status=401)
+    if getattr(user, 'role', None) != 'employer':
+        return JsonResponse({"detail": "Only employers can follow application events."}, status=403)
+    job_id = request.GET.get('job')
+
+    await sync_to_async(ensure_listening)()
+
+    async def stream():
+        subscription = broker.subscribe(user.pk)
+        try:
+            yield 'retry: 5000\n\n'
+            dropped = 0
+            while True:
+                try:
+                    event = await asyncio.wait_for(
+                        subscription.queue.get(), settings.EVENTS_HEARTBEAT_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    # Keeps proxies from closing an idle stream
+                    yield ': heartbeat\n\n'
+                    continue
+                if subscription.dropped > dropped:
+                    # This client fell behind; it should refetch its applications
+                    dropped = subscription.dropped
+                    yield f'event: overflow\ndata: {json.dumps({"dropped": dropped})}\n\n'
+                if job_id and str(event['job']) != job_id:
+                    continue
+                yield f'id: {event["application"]}\nevent: application\ndata: {json.dumps(event)}\n\n'
+        finally:
+            broker.unsubscribe(subscription)
+
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -1,4 +1,5 @@
 from django.contrib import admin
+from core.pagination import EstimatedCountPaginator
 from .models import User
 
 @admin.register(User)
@@ -7,6 +8,9 @@ class UserAdmin(admin.ModelAdmin):
     list_filter = ('role', 'is_staff', 'is_active')
     search_fields = ('email', 'first_name', 'last_name')
     ordering = ('email',)
+    # No exact COUNT(*) per changelist page
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     fieldsets = (
         (None, {'fields': ('email', 'password')}),
         ('Personal info', {'fields': ('first_name', 'last_name', 'role')}),
@@ -0,0 +1,15 @@
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from .revocation import denylist
+
+
+class RevocationAwareJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that also rejects access tokens revoked by logout.
+    """
+    def get_validated_token(self, raw_token):
+        token = super().get_validated_token(raw_token)
+        if denylist.is_revoked(token[jwt_settings.JTI_CLAIM]):
+            raise InvalidToken({"detail": "Token has been revoked.", "code": "token_revoked"})
+        return token
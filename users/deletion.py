@@ -0,0 +1,168 @@
+"""
+Account deletion in two steps. The request only deactivates the user and
+queues an AccountDeletion; the process_account_deletions command then removes
+everything the account owns in bounded batches of raw DELETE ... RETURNING
+statements (instead of letting the ORM collector load the whole tree), and
+removes the returned resume and logo files once each batch is committed.
+"""
+from datetime import timedelta
+from django.db import connection, models, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from jobs.models import Application, ArchivedApplication, ArchivedJob, Job
+from .models import AccountDeletion, User
+
+DELETE_BATCH = """
+DELETE FROM {table} WHERE id IN (
+    SELECT id FROM {table} WHERE {where} LIMIT %s
+) RETURNING {returning}
+"""
+
+
+def request_deletion(user, requested_by=None):
+    """
+    Deactivates the account (which also invalidates its tokens) and its job
+    postings, and queues its deletion. A single UPDATE per table; the slow
+    part is left to process_account_deletions.
+    """
+    with transaction.atomic():
+        User.objects.filter(pk=user.pk).update(is_active=False)
+        Job.objects.filter(employer_id=user.pk, is_active=True).update(is_active=False, updated_at=timezone.now())
+        deletion, _ = AccountDeletion.objects.get_or_create(
+            user_id=user.pk,
+            defaults={'requested_by_id': requested_by.pk if requested_by else None},
+        )
+    user.is_active = False
+    return deletion
+
+
+def _delete_batches(table, where, params, returning, batch_size):
+    """
+    Yields the `returning` column of each deleted batch; every batch is its
+    own short transaction.
+    """
+    sql = DELETE_BATCH.format(table=table, where=where, returning=returning)
+    while True:
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(sql, [*params, batch_size])
+            rows = cursor.fetchall()
+        if not rows:
+            return
+        yield [row[0] for row in rows]
+
+
+def _remove_files(storage, names):
+    removed = 0
+    for name in names:
+        if not name:
+            continue
+        try:
+            storage.delete(name)
+        except OSError:
+            continue
+        removed += 1
+    return removed
+
+
+class DeletionRun:
+    """
+    Deletes what one AccountDeletion's user owns, recording progress on the
+    AccountDeletion after each batch. `progress` is called with it too.
+    """
+    def __init__(self, deletion, batch_size=500, progress=None):
+        self.deletion = deletion
+        self.user_id = deletion.user_id
+        self.batch_size = batch_size
+        self.progress = progress or (lambda deletion: None)
+        self.resumes = Application._meta.get_field('resume').storage
+        self.logos = Job._meta.get_field('company_logo').storage
+
+    def record(self, **counts):
+        AccountDeletion.objects.filter(pk=self.deletion.pk).update(
+            updated_at=timezone.now(),
+            **{field: F(field) + count for field, count in counts.items()},
+        )
+        for field, count in counts.items():
+            setattr(self.deletion, field, getattr(self.deletion, field) + count)
+        self.progress(self.deletion)
+
+    def delete_applications(self, model, where, params):
+        for resumes in _delete_batches(
+            model._meta.db_table, where, params, 'resume', self.batch_size
+        ):
+            self.record(
+                applications_deleted=len(resumes),
+                files_deleted=_remove_files(self.resumes, resumes),
+            )
+
+    def delete_jobs(self, batch):
+        placeholders = ', '.join(['%s'] * len(batch))
+        self.delete_applications(Application, f'job_id IN ({placeholders})', batch)
+        with transaction.atomic(), connection.cursor() as cursor:
+            # Side tables (signatures, ...) other than the applications
+            for relation in Job._meta.related_objects:
+                table, column = relation.related_model._meta.db_table, relation.field.column
+                if relation.related_model is Application:
+                    continue
+                if relation.on_delete is models.CASCADE:
+                    cursor.execute(f'DELETE FROM {table} WHERE {column} IN ({placeholders})', batch)
+                elif relation.on_delete is models.SET_NULL:
+                    cursor.execute(
+                        f'UPDATE {table} SET {column} = NULL WHERE {column} IN ({placeholders})', batch
+                    )
+            cursor.execute(
+                f'DELETE FROM jobs_job WHERE id IN ({placeholders}) RETURNING company_logo', batch
+            )
+            logos = [row[0] for row in cursor.fetchall()]
+        self.record(jobs_deleted=len(logos), files_deleted=_remove_files(self.logos, logos))
+
+    def run(self):
+        user_id = self.user_id
+
+        # Already done by request_deletion(); kept for deletions queued before
+        Job.objects.filter(employer_id=user_id, is_active=True).update(is_active=False, updated_at=timezone.now())
+
+        self.delete_applications(Application, 'applicant_id = %s', [user_id])
+        jobs = Job.objects.filter(employer_id=user_id).order_by('id').values_list('id', flat=True)
+        while batch := list(jobs[:self.batch_size]):
+            self.delete_jobs(batch)
+
+        self.delete_applications(ArchivedApplication, 'applicant_id = %s', [user_id])
+        self.delete_applications(
+            ArchivedApplication,
+            f'job_id IN (SELECT id FROM {ArchivedJob._meta.db_table} WHERE employer_id = %s)',
+            [user_id],
+        )
+        for logos in _delete_batches(
+            ArchivedJob._meta.db_table, 'employer_id = %s', [user_id], 'company_logo', self.batch_size
+        ):
+            self.record(jobs_deleted=len(logos), files_deleted=_remove_files(self.logos, logos))
+
+        # Only small dependents are left for the collector now
+        with transaction.atomic():
+            User.objects.filter(pk=user_id).delete()
+            AccountDeletion.objects.filter(pk=self.deletion.pk).update(finished_at=timezone.now())
+        self.deletion.refresh_from_db()
+        return self.deletion
+
+
+def claim_deletion(stale_after=timedelta(minutes=30)):
+    """
+    Claims the next pending AccountDeletion for this worker, or returns None.
+    One that stopped reporting progress for stale_after (a crashed worker)
+    is picked up again; deleting is idempotent, so it just resumes.
+    """
+    now = timezone.now()
+    candidates = AccountDeletion.objects.filter(
+        Q(started_at__isnull=True) | Q(updated_at__lt=now - stale_after),
+        finished_at__isnull=True,
+    ).order_by('requested_at', 'id')
+    for deletion in candidates[:10]:
+        # Compare-and-set, so two workers never claim the same one
+        claimed = AccountDeletion.objects.filter(
+            pk=deletion.pk, started_at=deletion.started_at, updated_at=deletion.updated_at
+        ).update(started_at=deletion.started_at or now, updated_at=now)
+        if claimed:
+            deletion.refresh_from_db()
+            return deletion
+    return None
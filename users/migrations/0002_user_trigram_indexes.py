@@ -0,0 +1,46 @@
+"""
+Trigram indexes for the case-insensitive substring search (`icontains`) on
+email and names used by GET /api/users/?search= and the admin changelist.
+Django compiles icontains to UPPER(col::text) LIKE UPPER(%s) on PostgreSQL,
+so the indexes are on that expression. Built CONCURRENTLY so the users table
+stays writable; other backends, and servers without the pg_trgm
+extension available, are skipped.
+"""
+from django.db import migrations
+
+FIELDS = ('email', 'first_name', 'last_name')
+
+
+def create_indexes(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != 'postgresql':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+        if cursor.fetchone() is None:
+            return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for field in FIELDS:
+        schema_editor.execute(
+            f'CREATE INDEX CONCURRENTLY IF NOT EXISTS users_user_{field}_trgm '
+            f'ON users_user USING gin (UPPER({field}::text) gin_trgm_ops)'
+        )
+
+
+def drop_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for field in FIELDS:
+        schema_editor.execute(f'DROP INDEX CONCURRENTLY IF EXISTS users_user_{field}_trgm')
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin, BaseUserManager
 
 class CustomUserManager(BaseUserManager):
@@ -51,4 +52,39 @@ class User(AbstractBaseUser, PermissionsMixin):
     REQUIRED_FIELDS = ['first_name', 'last_name']
 
     def __str__(self):
-        return f"{self.email} ({self.role})"
\ No newline at end of file
+        return f"{self.email} ({self.role})"
+
+class AccountDeletion(models.Model):
+    """
+    A deactivated account waiting for the process_account_deletions command
+    to remove it with everything it owns. Kept afterwards as a record of
+    the deletion and its progress.
+    """
+    user_id = models.BigIntegerField(unique=True)
+    requested_by_id = models.BigIntegerField(null=True, blank=True)
+    requested_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    # Last progress report; a stale one lets another worker take over
+    updated_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    jobs_deleted = models.PositiveIntegerField(default=0)
+    applications_deleted = models.PositiveIntegerField(default=0)
+    files_deleted = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"Deletion of user {self.user_id}"
+
+class RevokedToken(models.Model):
+    """
+    A JWT revoked before it expires (logout). users.revocation mirrors the
+    table into a per-process Bloom filter, following the id sequence; rows
+    are pruned once the token has expired anyway.
+    """
+    jti = models.CharField(max_length=255, unique=True)
+    token_type = models.CharField(max_length=10)
+    user_id = models.BigIntegerField(null=True, blank=True)
+    revoked_at = models.DateTimeField(default=timezone.now, db_index=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"Revoked {self.token_type} token {self.jti}"
@@ -0,0 +1,145 @@
+"""
+Denylist of revoked JWTs (logout).
+
+RevokedToken rows are the source of truth. Each process mirrors their jtis
+into a Bloom filter, so checking a token that was never revoked, the common
+case, costs no I/O; only a filter hit is confirmed against the table. The
+filter follows the table's id sequence: every REVOCATION_SYNC_SECONDS the
+next check loads the rows past its watermark (plus those revoked within
+REVOCATION_SYNC_OVERLAP_SECONDS, as ids can commit out of order). Another
+process' revocation is therefore seen within REVOCATION_SYNC_SECONDS; this
+process' own at once.
+
+Expired rows are pruned on the same schedule, every
+REVOCATION_PRUNE_SECONDS, and the filter is rebuilt from the live rows
+once it holds more keys than it was sized for.
+"""
+import hashlib
+import math
+import threading
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from .models import RevokedToken
+
+
+class BloomFilter:
+    """
+    Bit array with `hashes` positions per key, derived from one blake2b
+    digest by double hashing. Sized for `capacity` keys at `error_rate`.
+    """
+    def __init__(self, capacity, error_rate):
+        self.capacity = capacity
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, key):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+class Denylist:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.filter = BloomFilter(
+                settings.REVOCATION_BLOOM_CAPACITY, settings.REVOCATION_BLOOM_ERROR_RATE
+            )
+            self.watermark = 0
+            self.synced_at = None
+            self.next_sync = 0
+            self.next_prune = time.monotonic() + settings.REVOCATION_PRUNE_SECONDS
+
+    def _load(self, rows, bloom):
+        for pk, jti in rows.order_by('id').values_list('id', 'jti').iterator(chunk_size=5000):
+            # The overlap re-reads rows; adding them again would only inflate count
+            if jti not in bloom:
+                bloom.add(jti)
+            self.watermark = max(self.watermark, pk)
+
+    def _rebuild(self):
+        # is_revoked() reads the filter without the lock: the new one only
+        # replaces it once it's complete
+        live = RevokedToken.objects.filter(expires_at__gt=timezone.now())
+        capacity = max(settings.REVOCATION_BLOOM_CAPACITY, 2 * live.count())
+        bloom = BloomFilter(capacity, settings.REVOCATION_BLOOM_ERROR_RATE)
+        self._load(live, bloom)
+        self.filter = bloom
+
+    def sync(self, force=False):
+        """
+        Brings the filter up to date with the table, at most once every
+        REVOCATION_SYNC_SECONDS unless forced.
+        """
+        now = time.monotonic()
+        if not force and now < self.next_sync:
+            return
+        with self.lock:
+            if not force and now < self.next_sync:
+                return
+            self.next_sync = now + settings.REVOCATION_SYNC_SECONDS
+            if now >= self.next_prune:
+                self.next_prune = now + settings.REVOCATION_PRUNE_SECONDS
+                prune()
+            started = timezone.now()
+            if self.synced_at is None or self.filter.count > self.filter.capacity:
+                self._rebuild()
+            else:
+                overlap = timedelta(seconds=settings.REVOCATION_SYNC_OVERLAP_SECONDS)
+                self._load(RevokedToken.objects.filter(
+                    Q(id__gt=self.watermark) | Q(revoked_at__gte=self.synced_at - overlap)
+                ), self.filter)
+            self.synced_at = started
+
+    def is_revoked(self, jti):
+        self.sync()
+        if jti not in self.filter:
+            return False
+        return RevokedToken.objects.filter(jti=jti).exists()
+
+    def add(self, jti):
+        with self.lock:
+            self.filter.add(jti)
+
+
+denylist = Denylist()
+
+
+def revoke(token):
+    """
+    Revokes a validated simplejwt token until it expires.
+    """
+    jti = token[jwt_settings.JTI_CLAIM]
+    RevokedToken.objects.get_or_create(jti=jti, defaults={
+        'token_type': token.get(jwt_settings.TOKEN_TYPE_CLAIM, ''),
+        'user_id': token.get(jwt_settings.USER_ID_CLAIM),
+        'expires_at': datetime.fromtimestamp(token['exp'], tz=dt_timezone.utc),
+    })
+    denylist.add(jti)
+
+
+def prune(batch_size=1000):
+    """
+    Deletes up to batch_size rows of tokens that have expired anyway.
+    """
+    expired = RevokedToken.objects.filter(expires_at__lte=timezone.now()).values_list('pk', flat=True)
+    deleted, _ = RevokedToken.objects.filter(pk__in=list(expired[:batch_size])).delete()
+    return deleted
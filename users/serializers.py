@@ -1,6 +1,10 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from .revocation import denylist
 
 User = get_user_model()
 
@@ -52,6 +56,25 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
         })
         return data
 
+class RevocableTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Refuses to refresh a refresh token revoked by logout.
+    """
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        if denylist.is_revoked(refresh[jwt_settings.JTI_CLAIM]):
+            raise TokenError("Token has been revoked.")
+        return super().validate(attrs)
+
+class LogoutSerializer(serializers.Serializer):
+    refresh = serializers.CharField()
+
+    def validate_refresh(self, value):
+        try:
+            return RefreshToken(value)
+        except TokenError:
+            raise serializers.ValidationError("Token is invalid or expired.")
+
 class ChangePasswordSerializer(serializers.Serializer):
     """
     Serializer for password change endpoint.
@@ -1,7 +1,24 @@
+import tempfile
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils import timezone
+from rest_framework.settings import api_settings
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import override_settings
+from core import metrics
+from core.pagination import EstimatedCountPaginator
+from core.throttling import AuthIPThrottle, AuthEmailThrottle
+from jobs.models import Application, Job
+from .models import AccountDeletion, RevokedToken
+from .revocation import BloomFilter, Denylist, denylist, revoke
 
 User = get_user_model()
 
@@ -54,4 +71,225 @@ class AuthTests(APITestCase):
     def test_access_denied_without_token(self):
         """Test that protected routes fail without a token"""
         response = self.client.get(self.me_url)
-        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
\ No newline at end of file
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class AuthThrottleTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        metrics.reset()
+        self.login_url = reverse('auth_login')
+        User.objects.create_user(email='victim@example.com', password='testpassword123')
+
+    def test_login_throttled_per_email_before_hashing(self):
+        """Attempts past the per-email limit get 429 without checking the password."""
+        rates = dict(api_settings.DEFAULT_THROTTLE_RATES, auth_email='3/min')
+        with mock.patch.object(AuthEmailThrottle, 'THROTTLE_RATES', rates):
+            for _ in range(3):
+                response = self.client.post(self.login_url, {"email": "Victim@example.com", "password": "nope"})
+                self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+            with mock.patch.object(User, 'check_password') as check_password:
+                response = self.client.post(self.login_url, {"email": "victim@example.com", "password": "x"})
+            self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+            self.assertIn('Retry-After', response)
+            check_password.assert_not_called()
+
+            # Another account from the same IP is still allowed
+            response = self.client.post(self.login_url, {"email": "other@example.com", "password": "x"})
+            self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        self.assertEqual(metrics.get('throttle.auth_email.rejected'), 1)
+        self.assertEqual(metrics.get('throttle.auth_email.admitted'), 4)
+
+    def test_registration_throttled_per_ip(self):
+        rates = dict(api_settings.DEFAULT_THROTTLE_RATES, auth_ip='2/min')
+        with mock.patch.object(AuthIPThrottle, 'THROTTLE_RATES', rates):
+            statuses = [
+                self.client.post(reverse('auth_register'), {"email": f"u{i}@example.com"}).status_code
+                for i in range(3)
+            ]
+        self.assertEqual(statuses[-1], status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertNotIn(status.HTTP_429_TOO_MANY_REQUESTS, statuses[:2])
+
+    def test_spoofed_forwarded_for_keeps_the_ip_bucket(self):
+        """A client can't get a fresh per-IP budget by making up X-Forwarded-For."""
+        rates = dict(api_settings.DEFAULT_THROTTLE_RATES, auth_ip='2/min')
+        with mock.patch.object(AuthIPThrottle, 'THROTTLE_RATES', rates):
+            statuses = [
+                self.client.post(
+                    self.login_url, {"email": f"u{i}@example.com", "password": "x"},
+                    HTTP_X_FORWARDED_FOR=f'203.0.113.{i}',
+                ).status_code
+                for i in range(3)
+            ]
+        self.assertEqual(statuses[-1], status.HTTP_429_TOO_MANY_REQUESTS)
+
+
+class AdminUserListTests(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser(email='admin@example.com', password='testpassword123')
+        for i in range(5):
+            User.objects.create_user(email=f'applicant{i}@example.com', first_name=f'Name{i}')
+        self.url = reverse('admin_user_list')
+
+    def test_list_is_paginated_and_searchable(self):
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.get(self.url, {'page_size': 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 6)
+        self.assertFalse(response.data['count_is_estimate'])
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertIsNotNone(response.data['next'])
+
+        response = self.client.get(self.url, {'search': 'NAME3'})
+        self.assertEqual([user['email'] for user in response.data['results']], ['applicant3@example.com'])
+
+    def test_count_is_capped(self):
+        self.client.force_authenticate(user=self.admin)
+        with mock.patch.object(EstimatedCountPaginator, 'count_cap', 3):
+            response = self.client.get(self.url, {'page_size': 2, 'search': 'applicant', 'page': 3})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 3)
+        self.assertTrue(response.data['count_is_estimate'])
+        # Pages past the estimate are still served
+        self.assertEqual(len(response.data['results']), 1)
+
+    def test_admin_changelist_search(self):
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse('admin:users_user_changelist'), {'q': 'applicant1'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertContains(response, 'applicant1@example.com')
+
+
+class AccountDeletionTests(APITestCase):
+    def setUp(self):
+        # Uploads go to a throwaway MEDIA_ROOT, never the working tree
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=media_root.name))
+        self.employer = User.objects.create_user(email='employer@example.com', role='employer')
+        self.applicant = User.objects.create_user(email='applicant@example.com')
+        self.jobs = [
+            Job.objects.create(employer=self.employer, title=f'Job {i}', location='Remote')
+            for i in range(3)
+        ]
+        self.applications = [
+            Application.objects.create(
+                job=job, applicant=self.applicant,
+                resume=SimpleUploadedFile('resume.pdf', b'%PDF-1.4', content_type='application/pdf'),
+            )
+            for job in self.jobs
+        ]
+
+    def test_delete_me_deactivates_then_worker_removes_everything(self):
+        self.client.force_authenticate(user=self.employer)
+        response = self.client.delete(reverse('users_delete_me'))
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.employer.refresh_from_db()
+        self.assertFalse(self.employer.is_active)
+        self.assertEqual(Job.objects.count(), 3)
+
+        storage = Application._meta.get_field('resume').storage
+        resumes = [application.resume.name for application in self.applications]
+        self.assertTrue(all(storage.exists(name) for name in resumes))
+
+        out = StringIO()
+        call_command('process_account_deletions', '--once', '--batch-size', '2', stdout=out)
+        self.assertFalse(User.objects.filter(pk=self.employer.pk).exists())
+        self.assertEqual(Job.objects.count(), 0)
+        self.assertEqual(Application.objects.count(), 0)
+        self.assertFalse(any(storage.exists(name) for name in resumes))
+
+        deletion = AccountDeletion.objects.get(user_id=self.employer.pk)
+        self.assertIsNotNone(deletion.finished_at)
+        self.assertEqual(
+            (deletion.jobs_deleted, deletion.applications_deleted, deletion.files_deleted), (3, 3, 3)
+        )
+        self.assertIn('3 jobs, 3 applications, 3 files', out.getvalue())
+
+    def test_deletion_takes_jobs_off_the_feed_first(self):
+        self.client.force_authenticate(user=self.employer)
+        requested = timezone.now()
+        self.client.delete(reverse('users_delete_me'))
+        # Deactivated with a new updated_at before any worker runs, so the
+        # change watermarks see it
+        for job in Job.objects.all():
+            self.assertFalse(job.is_active)
+            self.assertGreaterEqual(job.updated_at, requested)
+
+    def test_admin_delete_is_queued(self):
+        admin = User.objects.create_superuser(email='admin@example.com', password='testpassword123')
+        self.client.force_authenticate(user=admin)
+        response = self.client.delete(reverse('admin_user_detail', args=[self.applicant.pk]))
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(AccountDeletion.objects.get().requested_by_id, admin.pk)
+
+        call_command('process_account_deletions', '--once', stdout=StringIO())
+        self.assertFalse(User.objects.filter(pk=self.applicant.pk).exists())
+        self.assertEqual(Application.objects.count(), 0)
+        self.assertEqual(Job.objects.count(), 3)
+
+class LogoutTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        denylist.reset()
+        User.objects.create_user(email='user@example.com', password='testpassword123')
+        response = self.client.post(
+            reverse('auth_login'), {'email': 'user@example.com', 'password': 'testpassword123'}
+        )
+        self.access, self.refresh = response.data['access'], response.data['refresh']
+
+    def test_logout_revokes_access_and_refresh_tokens(self):
+        me_url = reverse('auth_me')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.access}')
+        self.assertEqual(self.client.get(me_url).status_code, status.HTTP_200_OK)
+
+        response = self.client.post(reverse('auth_logout'), {'refresh': self.refresh})
+        self.assertEqual(response.status_code, status.HTTP_205_RESET_CONTENT)
+        self.assertEqual(RevokedToken.objects.count(), 2)
+
+        self.assertEqual(self.client.get(me_url).status_code, status.HTTP_401_UNAUTHORIZED)
+        self.client.credentials()
+        response = self.client.post(reverse('token_refresh'), {'refresh': self.refresh})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_logout_with_a_stale_access_token_revokes_the_refresh_token(self):
+        expired = AccessToken(self.access)
+        expired.set_exp(lifetime=-timedelta(minutes=1))
+        revoked = AccessToken(self.access)
+        revoke(revoked)
+        for access in (expired, revoked):
+            with self.subTest(access=access):
+                RevokedToken.objects.filter(token_type='refresh').delete()
+                self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+                response = self.client.post(reverse('auth_logout'), {'refresh': self.refresh})
+                self.assertEqual(response.status_code, status.HTTP_205_RESET_CONTENT)
+                self.assertTrue(RevokedToken.objects.filter(token_type='refresh').exists())
+
+    def test_other_processes_pick_up_revocations(self):
+        response = self.client.post(reverse('auth_logout'), {'refresh': self.refresh})
+        self.assertEqual(response.status_code, status.HTTP_205_RESET_CONTENT)
+        jti = RevokedToken.objects.get().jti
+        other = Denylist()
+        self.assertTrue(other.is_revoked(jti))
+
+        # Unrevoked tokens are answered by the filter alone
+        with self.assertNumQueries(0):
+            self.assertFalse(other.is_revoked('never-revoked'))
+
+    def test_expired_entries_are_pruned(self):
+        RevokedToken.objects.create(jti='old', token_type='access', expires_at=timezone.now() - timedelta(minutes=1))
+        RevokedToken.objects.create(jti='live', token_type='access', expires_at=timezone.now() + timedelta(minutes=1))
+        with self.settings(REVOCATION_PRUNE_SECONDS=0):
+            denylist.reset()
+            denylist.sync(force=True)
+        self.assertEqual(list(RevokedToken.objects.values_list('jti', flat=True)), ['live'])
+        self.assertTrue(denylist.is_revoked('live'))
+
+    def test_bloom_filter_false_positive_rate(self):
+        bloom = BloomFilter(capacity=10000, error_rate=0.01)
+        for i in range(10000):
+            bloom.add(f'revoked-{i}')
+        self.assertTrue(all(f'revoked-{i}' in bloom for i in range(10000)))
+        false_positives = sum(f'other-{i}' in bloom for i in range(10000))
+        self.assertLess(false_positives, 200)
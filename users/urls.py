@@ -6,7 +6,8 @@ from .views import (
     UserProfileView, 
     AdminUserListView,
     AdminUserDetailView,
-    ChangePasswordView
+    ChangePasswordView,
+    LogoutView
 )
 
 urlpatterns = [
@@ -14,6 +15,7 @@ urlpatterns = [
     path('auth/register/', RegisterView.as_view(), name='auth_register'),
     path('auth/login/', CustomTokenObtainPairView.as_view(), name='auth_login'), # Using Custom View
     path('auth/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('auth/logout/', LogoutView.as_view(), name='auth_logout'),
     path('auth/password/change/', ChangePasswordView.as_view(), name='auth_password_change'),
 
     # --- Profile
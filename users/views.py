@@ -1,13 +1,21 @@
-from rest_framework import generics, permissions, status
+from rest_framework import generics, permissions, status, filters
+from rest_framework.exceptions import AuthenticationFailed
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from django.contrib.auth import get_user_model
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
 from rest_framework_simplejwt.views import TokenObtainPairView
+from core.pagination import EstimatedCountPagination
+from core.throttling import AuthIPThrottle, AuthEmailThrottle
+from .authentication import RevocationAwareJWTAuthentication
+from .deletion import request_deletion
+from .revocation import revoke
 from .serializers import (
     RegisterSerializer, 
     UserSerializer, 
     CustomTokenObtainPairSerializer,
-    ChangePasswordSerializer
+    ChangePasswordSerializer,
+    LogoutSerializer
 )
 
 User = get_user_model()
@@ -20,6 +28,7 @@ class RegisterView(generics.CreateAPIView):
     """
     queryset = User.objects.all()
     permission_classes = (permissions.AllowAny,)
+    throttle_classes = (AuthIPThrottle, AuthEmailThrottle)
     serializer_class = RegisterSerializer
 
 class CustomTokenObtainPairView(TokenObtainPairView):
@@ -28,6 +37,41 @@ class CustomTokenObtainPairView(TokenObtainPairView):
     Returns JWT tokens + User Role/ID.
     """
     serializer_class = CustomTokenObtainPairSerializer
+    throttle_classes = (AuthIPThrottle, AuthEmailThrottle)
+
+class LogoutView(APIView):
+    """
+    POST /api/auth/logout/ {"refresh": "<token>"}
+    Revokes the refresh token, and the access token sent in the
+    Authorization header, if it is still valid. An expired or revoked access
+    token doesn't stop the refresh token from being revoked.
+    """
+    authentication_classes = ()
+    permission_classes = (permissions.AllowAny,)
+
+    def access_token(self, request):
+        authenticator = RevocationAwareJWTAuthentication()
+        header = authenticator.get_header(request)
+        try:
+            raw_token = authenticator.get_raw_token(header) if header else None
+            return authenticator.get_validated_token(raw_token) if raw_token else None
+        except AuthenticationFailed:
+            return None
+
+    def post(self, request):
+        serializer = LogoutSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        refresh = serializer.validated_data['refresh']
+        access = self.access_token(request)
+        if access is not None:
+            if access.get(jwt_settings.USER_ID_CLAIM) != refresh.get(jwt_settings.USER_ID_CLAIM):
+                return Response(
+                    {"refresh": ["Token belongs to another user."]},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            revoke(access)
+        revoke(refresh)
+        return Response(status=status.HTTP_205_RESET_CONTENT)
 
 class ChangePasswordView(APIView):
     """
@@ -35,6 +79,7 @@ class ChangePasswordView(APIView):
     Allows logged-in users to change their password.
     """
     permission_classes = (permissions.IsAuthenticated,)
+    throttle_classes = (AuthIPThrottle, AuthEmailThrottle)
 
     def post(self, request):
         serializer = ChangePasswordSerializer(data=request.data)
@@ -78,19 +123,24 @@ class UserProfileView(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     def delete(self, request):
-        self.get_object().delete()
-        return Response({"message": "Account deleted."}, status=status.HTTP_204_NO_CONTENT)
+        # Deactivated now, removed with its data by process_account_deletions
+        request_deletion(self.get_object(), requested_by=request.user)
+        return Response({"message": "Account scheduled for deletion."}, status=status.HTTP_202_ACCEPTED)
 
 # --- 3. Admin Endpoints -----
 
 class AdminUserListView(generics.ListAPIView):
     """
-    GET /api/users/
-    List all users (Admin only).
+    GET /api/users/?search=&page=
+    List all users (Admin only), paginated. `search` matches email, first and
+    last name through trigram indexes (PostgreSQL).
     """
-    queryset = User.objects.all()
+    queryset = User.objects.order_by('-id')
     serializer_class = UserSerializer
     permission_classes = (permissions.IsAdminUser,)
+    pagination_class = EstimatedCountPagination
+    filter_backends = (filters.SearchFilter,)
+    search_fields = ('email', 'first_name', 'last_name')
 
 class AdminUserDetailView(generics.DestroyAPIView):
     """
@@ -98,4 +148,8 @@ class AdminUserDetailView(generics.DestroyAPIView):
     """
     queryset = User.objects.all()
     serializer_class = UserSerializer
-    permission_classes = (permissions.IsAdminUser,)
\ No newline at end of file
+    permission_classes = (permissions.IsAdminUser,)
+
+    def destroy(self, request, *args, **kwargs):
+        request_deletion(self.get_object(), requested_by=request.user)
+        return Response({"message": "Account scheduled for deletion."}, status=status.HTTP_202_ACCEPTED)
\ No newline at end of file